@@ -0,0 +1,31 @@
+"""
+gunicorn settings for the CRM:
+
+    gunicorn -c gunicorn.conf.py
+
+Each worker builds its LLM client as soon as it has loaded the app, so
+the first chat it serves doesn't pay for the SDK import, connection pool
+and TLS setup. With preload_app the workers drop the client inherited
+from the master instead of sharing its sockets.
+"""
+import os
+
+wsgi_app = "study_abroad_ai.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+
+def post_fork(server, worker):
+    from django.apps import apps
+
+    if apps.ready:
+        from leads import llm
+
+        llm.reset()
+
+
+def post_worker_init(worker):
+    from leads import llm
+
+    llm.warm_up()
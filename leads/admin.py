@@ -1,5 +1,31 @@
-from django.contrib import admin
-from .models import Lead
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from . import archive
+from .models import AIJob, CounsellorProfile, Lead, LeadArchive, LeadEvent, Notification, ScoringRuleSet
+from .search import search_leads
+
+
+def _set_status_action(status, label):
+
+    @admin.action(description=f"Mark selected leads as {label}")
+    def action(modeladmin, request, queryset):
+        updated = queryset.bulk_set(crm_status=status)
+        modeladmin.message_user(request, f"{updated} leads marked as {label}.")
+
+    action.__name__ = f"mark_{status}"
+    return action
+
+
+class LeadActionForm(ActionForm):
+    # Shown next to the action dropdown; read by LeadAdmin.assign.
+    counsellor = forms.ModelChoiceField(
+        queryset=User.objects.filter(counsellor_profile__is_active=True).order_by('username'),
+        required=False,
+    )
 
 
 @admin.register(Lead)
@@ -29,3 +55,178 @@ class LeadAdmin(admin.ModelAdmin):
     )
 
     ordering = ('-created_at',)
+
+    # One UPDATE for the whole selection; see LeadQuerySet.bulk_set.
+    actions = [_set_status_action(status, label) for status, label in Lead.CRM_STATUS_CHOICES] + ['assign', 'unassign']
+
+    action_form = LeadActionForm
+
+    @admin.action(description="Assign selected leads to counsellor")
+    def assign(self, request, queryset):
+        try:
+            counsellor = LeadActionForm.base_fields['counsellor'].clean(request.POST.get('counsellor'))
+        except ValidationError:
+            counsellor = None
+        if counsellor is None:
+            self.message_user(request, "Choose an active counsellor to assign the leads to.", messages.ERROR)
+            return
+        updated = queryset.bulk_set(assigned_to_id=counsellor.id)
+        self.message_user(request, f"{updated} leads assigned to {counsellor}.")
+
+    @admin.action(description="Unassign selected leads")
+    def unassign(self, request, queryset):
+        updated = queryset.bulk_set(assigned_to_id=None)
+        self.message_user(request, f"{updated} leads unassigned.")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS / trigram index instead of three LIKE '%q%' scans.
+        if not search_term:
+            return queryset, False
+        return search_leads(queryset, search_term), False
+
+
+@admin.register(AIJob)
+class AIJobAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'lead',
+        'status',
+        'attempts',
+        'run_after',
+        'locked_by',
+        'created_at',
+        'finished_at'
+    )
+
+    list_filter = ('status',)
+
+    raw_id_fields = ('lead',)
+
+
+class CounsellorProfileForm(forms.ModelForm):
+    # Stored as JSON lists of Lead.Country / Lead.Quality values.
+    countries = forms.TypedMultipleChoiceField(
+        choices=Lead.Country.choices, coerce=int, required=False, widget=forms.CheckboxSelectMultiple,
+    )
+    qualities = forms.TypedMultipleChoiceField(
+        choices=Lead.Quality.choices, coerce=int, required=False, widget=forms.CheckboxSelectMultiple,
+    )
+
+    class Meta:
+        model = CounsellorProfile
+        fields = '__all__'
+
+
+@admin.register(CounsellorProfile)
+class CounsellorProfileAdmin(admin.ModelAdmin):
+
+    form = CounsellorProfileForm
+
+    list_display = (
+        'user',
+        'is_active',
+        'open_leads',
+        'capacity',
+        'countries',
+        'qualities'
+    )
+
+    list_filter = ('is_active',)
+
+    # Maintained by leads.assignment; fix drift with rebuild_counsellor_load.
+    readonly_fields = ('open_leads',)
+
+
+@admin.register(LeadArchive)
+class LeadArchiveAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'id',
+        '__str__',
+        'lead_quality',
+        'crm_status',
+        'created_at',
+        'archived_at'
+    )
+
+    list_filter = ('crm_status', 'lead_quality')
+
+    actions = ['restore']
+
+    # Written by archive_leads; use the restore action to edit a lead again.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Archived leads are still counted in LeadStat and LeadRollup.
+        return False
+
+    @admin.action(description="Restore selected leads")
+    def restore(self, request, queryset):
+        restored = archive.restore(list(queryset.values_list("id", flat=True)))
+        self.message_user(request, f"{len(restored)} leads restored.")
+
+
+@admin.register(LeadEvent)
+class LeadEventAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'at',
+        'lead_id',
+        'from_status',
+        'crm_status',
+        'assigned_to_id'
+    )
+
+    list_filter = ('crm_status',)
+
+    # Append-only: written by leads.events, archived by archive_lead_events.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'to',
+        'counsellor',
+        'status',
+        'attempts',
+        'created_at',
+        'sent_at'
+    )
+
+    list_filter = ('status',)
+
+    raw_id_fields = ('lead', 'counsellor')
+
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected notifications")
+    def requeue(self, request, queryset):
+        queryset.exclude(status="sent").update(status="pending", attempts=0, run_after=timezone.now())
+
+
+@admin.register(ScoringRuleSet)
+class ScoringRuleSetAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'version',
+        'is_active',
+        'note',
+        'created_at'
+    )
+
+    def get_readonly_fields(self, request, obj=None):
+        # A version's rules are fixed once saved; add a new version instead.
+        return ('version', 'rules') if obj else ('version',)
@@ -0,0 +1,438 @@
+"""
+Cache for AI profile analyses.
+
+Replies are keyed on a fingerprint of everything that goes into the
+prompt: score, recommended country, quality and a canonicalized
+``user_summary``. Identity lines (name, email, phone) are stripped from the
+summary before it is fingerprinted *and* before it is sent to the model,
+so a cached reply never mentions another visitor.
+
+The backend is chosen by ``settings.AI_REPLY_CACHE["BACKEND"]``:
+
+* ``leads.ai_cache.LocMemBackend``   per-process LRU with TTL (default)
+* ``leads.ai_cache.DjangoCacheBackend``  any configured Django cache alias
+* ``leads.ai_cache.DatabaseBackend``  the ``AIReplyCache`` table
+* ``leads.ai_cache.NullBackend``      caching disabled
+"""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import llm
+
+
+IDENTITY_LABELS = ("name", "email", "e-mail", "phone", "mobile", "whatsapp")
+
+_identity_line = re.compile(
+    r"^\s*(%s)\s*:.*$" % "|".join(re.escape(label) for label in IDENTITY_LABELS),
+    re.IGNORECASE | re.MULTILINE,
+)
+_trailing_zero = re.compile(r"\b(\d+)\.0+\b")
+_label_spacing = re.compile(r"\s*:\s*")
+
+
+# =====================================
+# FINGERPRINT
+# =====================================
+
+def redact_summary(user_summary):
+    """Drop name/email/phone lines; what remains is safe to share across visitors."""
+    return _identity_line.sub("", user_summary).strip()
+
+
+def canonical_summary(user_summary):
+    text = unicodedata.normalize("NFKC", redact_summary(user_summary)).lower()
+    text = _trailing_zero.sub(r"\1", text)
+    lines = []
+    for line in text.splitlines():
+        line = _label_spacing.sub(": ", " ".join(line.split())).strip(" .,;")
+        if line:
+            lines.append(line)
+    return "\n".join(sorted(lines))
+
+
+def fingerprint(score, recommended_country, lead_quality, user_summary):
+    raw = "\x1f".join([
+        settings.OPENAI_MODEL,
+        str(score),
+        str(recommended_country),
+        str(lead_quality),
+        canonical_summary(user_summary),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# =====================================
+# COUNTERS
+# =====================================
+
+class CacheStats:
+    """Per-process hit/miss counters and cumulative latencies (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.lookup_seconds = 0.0
+            self.llm_seconds = 0.0
+
+    def record(self, hit, lookup_seconds):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.lookup_seconds += lookup_seconds
+
+    def record_llm(self, seconds):
+        with self._lock:
+            self.llm_seconds += seconds
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0,
+                "avg_llm_ms": round(self.llm_seconds / self.misses * 1000, 1) if self.misses else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+# =====================================
+# BACKENDS
+# =====================================
+
+class BaseBackend:
+
+    def __init__(self, ttl, max_entries, **options):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, value):
+        return await sync_to_async(self.set)(key, value)
+
+
+class NullBackend(BaseBackend):
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LocMemBackend(BaseBackend):
+    """Thread-safe LRU dict; entries expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, ttl, max_entries, **options):
+        super().__init__(ttl, max_entries)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # Pure in-memory work: no need to hop to a thread.
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+
+class DjangoCacheBackend(BaseBackend):
+    """
+    Delegates to ``caches[alias]``; eviction follows that cache's own policy.
+    Keys include a generation stamp kept in the same cache. ``clear()``
+    replaces the stamp, so the old replies are no longer found and expire
+    after ``ttl``, while the alias's other entries (report fragments, the
+    stats version) are left alone.
+    """
+
+    GENERATION_KEY = "ai_reply:generation"
+
+    def __init__(self, ttl, max_entries, alias="default", **options):
+        super().__init__(ttl, max_entries)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, generation, key):
+        return f"ai_reply:{generation}:{key}"
+
+    # A new stamp rather than a counter: if the cache evicts it, the
+    # replacement can't bring back replies from before a clear().
+    def _generation(self):
+        return self.cache.get_or_set(self.GENERATION_KEY, time.time_ns, None)
+
+    async def _ageneration(self):
+        return await self.cache.aget_or_set(self.GENERATION_KEY, time.time_ns, None)
+
+    def get(self, key):
+        return self.cache.get(self._key(self._generation(), key))
+
+    def set(self, key, value):
+        self.cache.set(self._key(self._generation(), key), value, self.ttl)
+
+    def clear(self):
+        self.cache.set(self.GENERATION_KEY, time.time_ns(), None)
+
+    async def aget(self, key):
+        return await self.cache.aget(self._key(await self._ageneration(), key))
+
+    async def aset(self, key, value):
+        await self.cache.aset(self._key(await self._ageneration(), key), value, self.ttl)
+
+
+class DatabaseBackend(BaseBackend):
+    """
+    Stores replies in ``AIReplyCache`` so every worker process shares them.
+    Least recently used rows are trimmed once the table grows past
+    ``max_entries``; the check runs every ``prune_every`` writes.
+    """
+
+    def __init__(self, ttl, max_entries, prune_every=100, **options):
+        super().__init__(ttl, max_entries)
+        self.prune_every = prune_every
+        self._writes = 0
+
+    def get(self, key):
+        from .models import AIReplyCache
+
+        now = timezone.now()
+        row = (
+            AIReplyCache.objects
+            .filter(key=key, created_at__gte=now - timedelta(seconds=self.ttl))
+            .values_list("reply", "last_used_at")
+            .first()
+        )
+        if row is None:
+            return None
+
+        reply, last_used_at = row
+        # Only touch the row once a minute so hot keys don't turn reads into writes.
+        if now - last_used_at > timedelta(minutes=1):
+            AIReplyCache.objects.filter(key=key).update(last_used_at=now)
+        return reply
+
+    def set(self, key, value):
+        from .models import AIReplyCache
+
+        now = timezone.now()
+        AIReplyCache.objects.update_or_create(
+            key=key, defaults={"reply": value, "created_at": now, "last_used_at": now}
+        )
+
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        from .models import AIReplyCache
+
+        expired = timezone.now() - timedelta(seconds=self.ttl)
+        AIReplyCache.objects.filter(created_at__lt=expired).delete()
+
+        cutoff = (
+            AIReplyCache.objects
+            .order_by("-last_used_at")
+            .values_list("last_used_at", flat=True)[self.max_entries:self.max_entries + 1]
+        )
+        cutoff = list(cutoff)
+        if cutoff:
+            AIReplyCache.objects.filter(last_used_at__lte=cutoff[0]).delete()
+
+    def clear(self):
+        from .models import AIReplyCache
+
+        AIReplyCache.objects.all().delete()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = settings.AI_REPLY_CACHE
+                backend = import_string(config["BACKEND"])
+                _cache = backend(
+                    ttl=config["TTL"],
+                    max_entries=config["MAX_ENTRIES"],
+                    **config.get("OPTIONS", {}),
+                )
+    return _cache
+
+
+def reset():
+    global _cache
+    with _cache_lock:
+        _cache = None
+    stats.reset()
+
+
+# =====================================
+# CACHED COMPLETIONS
+# =====================================
+
+def _prompt(lead, user_summary):
+    key = fingerprint(
+        lead.lead_score, lead.recommended_country, lead.lead_quality, user_summary
+    )
+    messages = llm.build_messages(
+        lead.lead_score,
+        lead.get_recommended_country_display(),
+        lead.get_lead_quality_display(),
+        redact_summary(user_summary),
+    )
+    return key, messages
+
+
+def _lookup(key):
+    started = time.perf_counter()
+    try:
+        value = get_cache().get(key)
+    except Exception:
+        stats.record_error()
+        value = None
+    stats.record(value is not None, time.perf_counter() - started)
+    return value
+
+
+async def _alookup(key):
+    started = time.perf_counter()
+    try:
+        value = await get_cache().aget(key)
+    except Exception:
+        stats.record_error()
+        value = None
+    stats.record(value is not None, time.perf_counter() - started)
+    return value
+
+
+def _store(key, value):
+    try:
+        get_cache().set(key, value)
+    except Exception:
+        stats.record_error()
+
+
+async def _astore(key, value):
+    try:
+        await get_cache().aset(key, value)
+    except Exception:
+        stats.record_error()
+
+
+def complete_for_lead(lead, user_summary):
+    key, messages = _prompt(lead, user_summary)
+
+    cached = _lookup(key)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    ai_text = llm.complete(messages)
+    stats.record_llm(time.perf_counter() - started)
+
+    _store(key, ai_text)
+    return ai_text
+
+
+async def acomplete_for_lead(lead, user_summary):
+    key, messages = _prompt(lead, user_summary)
+
+    cached = await _alookup(key)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    ai_text = await llm.acomplete(messages)
+    stats.record_llm(time.perf_counter() - started)
+
+    await _astore(key, ai_text)
+    return ai_text
+
+
+async def astream_for_lead(lead, user_summary):
+    """Like ``llm.astream``; a cache hit arrives as a single chunk."""
+    key, messages = _prompt(lead, user_summary)
+
+    cached = await _alookup(key)
+    if cached is not None:
+        yield cached
+        return
+
+    started = time.perf_counter()
+    parts = []
+    async for text in llm.astream(messages):
+        parts.append(text)
+        yield text
+    stats.record_llm(time.perf_counter() - started)
+
+    await _astore(key, "".join(parts))
@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class LeadsConfig(AppConfig):
     name = "leads"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from django.conf import settings
+
+        from . import llm, signals
+
+        post_migrate.connect(signals.install_search_index, sender=self)
+        if settings.LLM_WARM_UP:
+            llm.warm_up()
@@ -0,0 +1,222 @@
+"""
+Cold storage for leads nobody works on any more.
+
+``manage.py archive_leads`` moves leads created more than
+LEAD_ARCHIVE_AFTER_DAYS ago that are lost, or cold and not converted,
+from ``Lead`` into ``LeadArchive``, LEAD_ARCHIVE_BATCH_SIZE at a time,
+each batch in its own short transaction. The lead list, dashboard and
+admin then only scan the leads still being worked.
+
+Archived leads keep their id and still count in LeadStat and LeadRollup
+(``rebuild()`` of either counts both tables); they no longer count
+against a counsellor's open_leads. Their finished AI jobs are deleted and
+their notifications kept with no lead.
+
+* get_lead()   a lead by id from either table
+* restore()    move archived leads back into ``Lead``
+* archived()   archived leads matching the lead list filters, for exports
+"""
+import datetime
+import decimal
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import assignment
+from .filters import start_of_day
+from .models import AIJob, Lead, LeadArchive, Notification
+
+
+# Columns of LeadArchive copied from the lead besides ``data``.
+COLUMNS = ("created_at", "crm_status", "lead_quality", "recommended_country", "intake", "assigned_to_id")
+
+# exporting.COLUMNS, read from an archived row.
+EXPORT_FIELDS = ("data__name", "data__phone", "data__lead_score", "lead_quality", "recommended_country", "crm_status")
+
+
+def candidates(before):
+    """Leads created before ``before`` that can be archived."""
+    return (
+        Lead.objects
+        .filter(created_at__lt=before)
+        .filter(Q(crm_status="lost") | (Q(lead_quality=Lead.Quality.COLD) & ~Q(crm_status="converted")))
+        .exclude(ai_jobs__status__in=["pending", "running"])
+    )
+
+
+def _dump(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def to_archive(lead):
+    data = {field.attname: _dump(field.value_from_object(lead)) for field in Lead._meta.concrete_fields}
+    return LeadArchive(id=lead.pk, data=data, **{name: getattr(lead, name) for name in COLUMNS})
+
+
+def from_archive(row):
+    """The Lead an archived row was, unsaved, marked ``archived``."""
+    values = {}
+    for field in Lead._meta.concrete_fields:
+        if field.attname in row.data:
+            values[field.attname] = field.to_python(row.data[field.attname])
+    lead = Lead(**values)
+    lead.archived = True
+    return lead
+
+
+def _delete_leads(ids):
+    # Not QuerySet.delete(): its post_delete handlers would take archived
+    # leads out of LeadStat and LeadRollup.
+    connection = connections[Lead.objects.db]
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {connection.ops.quote_name(Lead._meta.db_table)} WHERE id IN ({placeholders})", ids)
+
+
+def _load(leads):
+    return Counter(lead.load_owner() for lead in leads)
+
+
+def archive_batch(before, batch_size=None):
+    """Archive up to ``batch_size`` leads, oldest first. Returns how many."""
+    batch_size = batch_size or settings.LEAD_ARCHIVE_BATCH_SIZE
+    with transaction.atomic():
+        ids = list(candidates(before).order_by("created_at", "id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return 0
+        leads = list(Lead.objects.select_for_update().filter(id__in=ids))
+
+        LeadArchive.objects.bulk_create([to_archive(lead) for lead in leads])
+        AIJob.objects.filter(lead_id__in=ids).delete()
+        Notification.objects.filter(lead_id__in=ids).update(lead=None)
+        _delete_leads(ids)
+        assignment.apply_load({owner: -n for owner, n in _load(leads).items()})
+    return len(leads)
+
+
+def archive_leads(days=None, batch_size=None, limit=None, pause=None, progress=None):
+    """
+    Archive every candidate older than ``days``, one batch per
+    transaction with ``pause`` seconds between batches so other writers
+    are never kept waiting long. Stops after ``limit`` leads. Returns the
+    number archived.
+    """
+    days = settings.LEAD_ARCHIVE_AFTER_DAYS if days is None else days
+    pause = settings.LEAD_ARCHIVE_PAUSE if pause is None else pause
+    batch_size = batch_size or settings.LEAD_ARCHIVE_BATCH_SIZE
+    before = timezone.now() - datetime.timedelta(days=days)
+
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        archived = archive_batch(before, size)
+        total += archived
+        if progress:
+            progress(total)
+        if archived < size:
+            break
+        time.sleep(pause)
+    if total:
+        assignment.reset()
+    return total
+
+
+def restore(ids):
+    """Move the archived leads in ``ids`` back into ``Lead``. Returns them."""
+    with transaction.atomic():
+        rows = list(LeadArchive.objects.select_for_update().filter(id__in=ids))
+        if not rows:
+            return []
+        # bulk_create, not save(): the restored leads keep their score and
+        # are already counted in the stats. It stamps created_at (auto_now_add),
+        # so the original is written back after.
+        leads = [from_archive(row) for row in rows]
+        created = [lead.created_at for lead in leads]
+        Lead.objects.bulk_create(leads)
+        for lead, created_at in zip(leads, created):
+            lead.created_at = created_at
+        Lead.objects.bulk_update(leads, ["created_at"])
+        LeadArchive.objects.filter(id__in=[row.id for row in rows]).delete()
+        assignment.apply_load(_load(leads))
+    assignment.reset()
+    for lead in leads:
+        lead.archived = False
+    return leads
+
+
+def get_lead(lead_id, restore_archived=False):
+    """
+    The lead with ``lead_id`` from ``Lead``, else from the archive (an
+    unsaved instance with ``archived`` set, or moved back into ``Lead``
+    with ``restore_archived``). None when there is no such lead.
+    """
+    lead = Lead.objects.filter(id=lead_id).first()
+    if lead is not None:
+        lead.archived = False
+        return lead
+    if restore_archived:
+        restored = restore([lead_id])
+        return restored[0] if restored else None
+    row = LeadArchive.objects.filter(id=lead_id).first()
+    return from_archive(row) if row else None
+
+
+def archived(params):
+    """Archived leads matching the lead list filters in ``params``."""
+    rows = LeadArchive.objects.all()
+
+    query = (params.get("q") or "").strip()
+    if query:
+        rows = rows.filter(
+            Q(data__name__icontains=query) | Q(data__email__icontains=query) | Q(data__phone__icontains=query)
+        )
+    if params.get("status"):
+        rows = rows.filter(crm_status=params["status"])
+    date_from = parse_date(params.get("from") or "")
+    if date_from:
+        rows = rows.filter(created_at__gte=start_of_day(date_from))
+    date_to = parse_date(params.get("to") or "")
+    if date_to:
+        rows = rows.filter(created_at__lt=start_of_day(date_to + datetime.timedelta(days=1)))
+    assigned_to = params.get("assigned_to")
+    if assigned_to == "none":
+        rows = rows.filter(assigned_to_id__isnull=True)
+    elif assigned_to and assigned_to.isdigit():
+        rows = rows.filter(assigned_to_id=int(assigned_to))
+    return rows
+
+
+# =====================================
+# COUNTERS
+# =====================================
+
+def stat_rows():
+    """LeadStat rows for the archived leads, like stats.rebuild() reads from Lead."""
+    return (
+        LeadArchive.objects
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "lead_quality", "crm_status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+
+def rollup_rows(field):
+    """LeadRollup rows of one dimension for the archived leads, like rollups.rebuild()."""
+    return (
+        LeadArchive.objects
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "crm_status", *([field] if field else []))
+        .annotate(count=Count("id"))
+        .order_by()
+    )
@@ -0,0 +1,216 @@
+"""
+Automatic counsellor assignment for new leads.
+
+Each process keeps a LoadIndex: the active CounsellorProfile rows with
+their capacity, specialisations and last known ``open_leads``, refreshed
+every ASSIGN_INDEX_TTL seconds. Picking a counsellor is an in-memory
+ranking, with no per-assignment recount of leads:
+
+1. eligible: active, below capacity, and taking the lead's country and
+   quality (an empty list means any),
+2. specialists (who list the country / quality) before generalists,
+3. then the lowest open_leads / capacity, then the fewest open leads.
+
+The pick is only a guess. The slot is taken with one conditional
+``UPDATE ... SET open_leads = open_leads + 1 WHERE open_leads < capacity``,
+so two processes working from stale indexes can't push anyone past
+capacity; the loser refreshes that entry and moves on to the next
+candidate.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+
+from .models import CounsellorProfile, Lead
+
+
+class _Entry:
+    __slots__ = ("profile_id", "user_id", "capacity", "open_leads", "countries", "qualities")
+
+    def __init__(self, profile):
+        self.profile_id = profile.id
+        self.user_id = profile.user_id
+        self.capacity = profile.capacity
+        self.open_leads = profile.open_leads
+        self.countries = frozenset(profile.countries or ())
+        self.qualities = frozenset(profile.qualities or ())
+
+    def rank(self, lead):
+        """Sort key, or None if this counsellor can't take ``lead``."""
+        if self.open_leads >= self.capacity:
+            return None
+        if self.countries and lead.recommended_country not in self.countries:
+            return None
+        if self.qualities and lead.lead_quality not in self.qualities:
+            return None
+        generalist = (not self.countries) + (not self.qualities)
+        return (generalist, self.open_leads / self.capacity, self.open_leads, self.profile_id)
+
+
+class LoadIndex:
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.ASSIGN_INDEX_TTL if ttl is None else ttl
+        self.entries = {}
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        profiles = CounsellorProfile.objects.filter(is_active=True, capacity__gt=0)
+        self.entries = {p.id: _Entry(p) for p in profiles}
+        self.loaded_at = time.monotonic()
+
+    def candidates(self, lead):
+        with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl:
+                self.refresh()
+            ranked = [(entry.rank(lead), entry) for entry in self.entries.values()]
+        return [entry for key, entry in sorted((r for r in ranked if r[0] is not None), key=lambda r: r[0])]
+
+    def update(self, entry, open_leads):
+        with self.lock:
+            entry.open_leads = open_leads
+
+    def reset(self):
+        with self.lock:
+            self.entries = {}
+            self.loaded_at = None
+
+
+_index = LoadIndex()
+
+
+def get_index():
+    return _index
+
+
+def reset():
+    _index.reset()
+
+
+# =====================================
+# COUNTERS
+# =====================================
+
+def adjust_load(user_id, delta):
+    """Move one counsellor's open_leads counter without a capacity check."""
+    if user_id and delta:
+        CounsellorProfile.objects.filter(user_id=user_id).update(open_leads=F("open_leads") + delta)
+
+
+def apply_load(deltas):
+    """Apply a {user_id: delta} mapping to open_leads in one UPDATE."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and delta}
+    if deltas:
+        CounsellorProfile.objects.filter(user_id__in=deltas).update(open_leads=F("open_leads") + Case(
+            *[When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+            default=Value(0),
+        ))
+
+
+def rebuild_load():
+    """Recount open_leads for every profile from the Lead table."""
+    counts = dict(
+        Lead.objects
+        .filter(assigned_to__isnull=False)
+        .exclude(crm_status__in=Lead.CLOSED_STATUSES)
+        .values_list("assigned_to")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        for profile in CounsellorProfile.objects.select_for_update():
+            profile.open_leads = counts.get(profile.user_id, 0)
+            profile.save(update_fields=["open_leads"])
+    reset()
+    return len(counts)
+
+
+# =====================================
+# ASSIGN
+# =====================================
+
+def _claim(entry):
+    """Take one slot on ``entry``'s counsellor. Returns True if there was room."""
+    return bool(
+        CounsellorProfile.objects
+        .filter(id=entry.profile_id, is_active=True, open_leads__lt=F("capacity"))
+        .update(open_leads=F("open_leads") + 1)
+    )
+
+
+def assign(lead, index=None):
+    """
+    Give an unassigned, open ``lead`` to the best counsellor with room.
+    Returns the chosen user id, or None if nobody can take it.
+    """
+    if lead.assigned_to_id or lead.crm_status in Lead.CLOSED_STATUSES:
+        return None
+
+    index = index or _index
+    for entry in index.candidates(lead):
+        if not _claim(entry):
+            # Our count was stale; someone else filled this counsellor.
+            current = CounsellorProfile.objects.filter(id=entry.profile_id).values_list("open_leads", flat=True).first()
+            index.update(entry, entry.capacity if current is None else current)
+            continue
+
+        taken = (
+            Lead.objects
+            .filter(Q(assigned_to__isnull=True), pk=lead.pk)
+            .update(assigned_to_id=entry.user_id)
+        )
+        if not taken:
+            # Assigned by someone else in the meantime; give the slot back.
+            adjust_load(entry.user_id, -1)
+            return None
+
+        index.update(entry, entry.open_leads + 1)
+        lead.assigned_to_id = entry.user_id
+        lead._load_owner = entry.user_id
+        return entry.user_id
+
+    return None
+
+
+def assign_batch(leads, index=None):
+    """
+    Pick counsellors for unsaved leads, e.g. an import batch, setting
+    ``assigned_to_id`` before they are inserted. Owners are ranked from
+    the index as if each earlier lead of the batch had already been
+    counted, then each chosen counsellor's slots are taken with one
+    conditional UPDATE. When that fails on a stale count, that
+    counsellor's leads are claimed one at a time and the ones that don't
+    fit stay unassigned. Returns the number of leads assigned.
+    """
+    index = index or _index
+    picked = {}
+    for lead in leads:
+        if lead.assigned_to_id or lead.crm_status in Lead.CLOSED_STATUSES:
+            continue
+        candidates = index.candidates(lead)
+        if candidates:
+            entry = candidates[0]
+            index.update(entry, entry.open_leads + 1)
+            picked.setdefault(entry, []).append(lead)
+
+    assigned = 0
+    for entry, group in picked.items():
+        n = len(group)
+        claimed = (
+            CounsellorProfile.objects
+            .filter(id=entry.profile_id, is_active=True, open_leads__lte=F("capacity") - n)
+            .update(open_leads=F("open_leads") + n)
+        )
+        if not claimed:
+            group = [lead for lead in group if _claim(entry)]
+            current = CounsellorProfile.objects.filter(id=entry.profile_id).values_list("open_leads", flat=True).first()
+            index.update(entry, entry.capacity if current is None else current)
+        for lead in group:
+            lead.assigned_to_id = entry.user_id
+            lead._load_owner = entry.user_id
+        assigned += len(group)
+    return assigned
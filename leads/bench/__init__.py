@@ -0,0 +1,70 @@
+"""
+Benchmarks for the CRM. Each module is runnable on its own, e.g.
+
+    python -m leads.bench.chat_load
+
+and prints its results as JSON. They run against a throwaway database file,
+never the project's db.sqlite3.
+
+``manage.py bench`` runs the request scenarios in leads.bench.scenarios
+and is the one to keep results from, to compare across commits:
+
+    python manage.py bench -o before.json
+    python manage.py bench --baseline before.json
+"""
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "study_abroad_ai.settings")
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def bench_database():
+    """Create a migrated scratch database and tear it down afterwards."""
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    tmpdir = tempfile.mkdtemp(prefix="crm-bench-")
+    test_settings = settings.DATABASES["default"].setdefault("TEST", {})
+    if connection.vendor == "sqlite":
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one run."""
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def report(results):
+    print(json.dumps(results, indent=2, default=str))
@@ -0,0 +1,99 @@
+"""
+Latency of /api/analytics/ (served from LeadRollup) against the same
+question answered with a GROUP BY over the Lead table.
+
+Each request cycles through a mix of buckets, breakdowns and filters.
+The rollup table grows with days x statuses x dimension values, not with
+leads, so the API's numbers should barely move as --rows grows.
+
+    python -m leads.bench.analytics_api --rows 5000000 --requests 500
+"""
+import argparse
+import itertools
+import time
+
+from leads.bench import bench_database, report, setup_django, summarize
+
+
+QUERIES = [
+    {},
+    {"bucket": "day", "by": "lead_quality"},
+    {"bucket": "week", "by": "recommended_country", "from": "{half}"},
+    {"by": "intake", "status": "converted"},
+    {"by": "crm_status", "lead_quality": "1", "from": "{half}"},
+    {"bucket": "day", "by": "assigned_to"},
+]
+
+
+def direct(params):
+    """The same counts from Lead, for comparison."""
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+    from leads.filters import filter_leads
+
+    trunc = {"day": TruncDate, "week": TruncWeek, "month": TruncMonth}[params.get("bucket", "month")]
+    by = params.get("by", "crm_status")
+    leads = filter_leads(params)
+    if params.get("lead_quality"):
+        leads = leads.filter(lead_quality=params["lead_quality"])
+    field = "assigned_to_id" if by == "assigned_to" else by
+    return list(
+        leads.annotate(period=trunc("created_at"))
+        .values("period", field, "crm_status")
+        .annotate(total=Count("id"))
+        .order_by("period")
+    )
+
+
+def measure(call, queries, requests):
+    latencies = []
+    started = time.perf_counter()
+    for params in itertools.islice(itertools.cycle(queries), requests):
+        request_started = time.perf_counter()
+        call(params)
+        latencies.append(time.perf_counter() - request_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--direct-requests", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import timezone
+    from leads.bench.synthetic import insert_leads
+    from leads.models import LeadRollup
+
+    with bench_database():
+        started = time.perf_counter()
+        insert_leads(args.rows)
+        load_seconds = time.perf_counter() - started
+
+        half = (timezone.localdate() - timezone.timedelta(days=365)).isoformat()
+        queries = [{k: v.format(half=half) for k, v in q.items()} for q in QUERIES]
+
+        client = Client()
+        client.force_login(User.objects.create_user("bench"))
+
+        def api(params):
+            response = client.get("/api/analytics/", params)
+            assert response.status_code == 200, response.content
+
+        results = {
+            "rows": args.rows,
+            "rollup_rows": LeadRollup.objects.count(),
+            "load_and_rebuild_seconds": round(load_seconds, 1),
+            "api": measure(api, queries, args.requests),
+            "direct_group_by": measure(direct, queries, args.direct_requests),
+        }
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
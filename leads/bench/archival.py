@@ -0,0 +1,84 @@
+"""
+Hot-table query latency before and after archiving. Loads --rows
+synthetic leads spread over --months months, times the lead list, lead
+list API and admin changelist, runs the archive (leads older than
+--days that are lost or cold) and times the same requests again. Keyset
+pages use indexes and barely move; scans (counts, exports) shrink with
+the table.
+
+    python -m leads.bench.archival --rows 500000 --requests 50
+"""
+import argparse
+import itertools
+import time
+
+from leads.bench import bench_database, report, setup_django, summarize
+
+
+REQUESTS = {
+    "lead_list": ("/leads/", {}),
+    "lead_list_status": ("/leads/", {"status": "new"}),
+    "lead_list_search": ("/leads/", {"q": "Sharma"}),
+    "lead_list_api_unassigned": ("/api/leads/", {"assigned_to": "none", "page_size": 25}),
+    "admin_changelist": ("/admin/leads/lead/", {}),
+    "admin_cold_filter": ("/admin/leads/lead/", {"lead_quality__exact": "3"}),
+    "admin_lost_filter": ("/admin/leads/lead/", {"crm_status__exact": "lost"}),
+    "export_lost": ("/export/", {"status": "lost"}),
+}
+
+
+def measure(client, requests):
+    results = {}
+    for name, (path, params) in REQUESTS.items():
+        latencies = []
+        started = time.perf_counter()
+        for _ in itertools.repeat(None, requests):
+            request_started = time.perf_counter()
+            response = client.get(path, params)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - request_started)
+            assert response.status_code == 200, (name, response.status_code)
+        results[name] = summarize(latencies, time.perf_counter() - started)["p50_ms"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from leads import archive
+    from leads.bench.synthetic import insert_leads
+    from leads.models import Lead, LeadArchive
+
+    with bench_database():
+        insert_leads(args.rows, months=args.months)
+        client = Client()
+        client.force_login(User.objects.create_superuser("bench", "bench@example.com", "bench"))
+
+        before = measure(client, args.requests)
+        started = time.perf_counter()
+        archived = archive.archive_leads(days=args.days, batch_size=2000, pause=0)
+        archive_seconds = time.perf_counter() - started
+        after = measure(client, args.requests)
+
+        report({
+            "rows": args.rows,
+            "archived": archived,
+            "hot_rows": Lead.objects.count(),
+            "archive_rows": LeadArchive.objects.count(),
+            "archive_seconds": round(archive_seconds, 1),
+            "archive_leads_per_second": round(archived / archive_seconds) if archive_seconds else None,
+            "p50_ms": {name: {"before": before[name], "after": after[name]} for name in REQUESTS},
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Counsellor auto-assignment under parallel lead creation.
+
+Several forked processes create leads at once. "before" assigns each lead
+the obvious way: recount open leads per counsellor and pick the least
+loaded, with no capacity check at write time. "after" relies on the
+post_save hook (leads.assignment: in-memory load index + conditional
+counter UPDATE). Reports leads/second, and checks afterwards that nobody
+is over capacity and that the open_leads counters match the table.
+
+    python -m leads.bench.assignment --processes 4 --leads 500 --counsellors 20
+"""
+import argparse
+import multiprocessing
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def naive_assign(lead):
+    from django.db.models import Count, Q
+    from leads.models import CounsellorProfile, Lead
+
+    profiles = (
+        CounsellorProfile.objects
+        .filter(is_active=True)
+        .annotate(load=Count(
+            "user__lead",
+            filter=~Q(user__lead__crm_status__in=Lead.CLOSED_STATUSES),
+        ))
+        .order_by("load", "id")
+    )
+    for profile in profiles:
+        if profile.load < profile.capacity:
+            Lead.objects.filter(pk=lead.pk).update(assigned_to_id=profile.user_id)
+            return profile.user_id
+    return None
+
+
+def _create(worker, count, naive, results):
+    from django.conf import settings
+    from django.db import connections
+    from leads.models import Lead
+
+    connections.close_all()
+    settings.AUTO_ASSIGN_LEADS = not naive
+    assigned = 0
+    started = time.perf_counter()
+    for i in range(count):
+        lead = Lead.objects.create(
+            name=f"Bench {worker}-{i}", email=f"b{worker}-{i}@example.com",
+            phone=f"9{worker:02d}{i:07d}", budget=10 + (i * 7) % 30,
+        )
+        owner = naive_assign(lead) if naive else lead.assigned_to_id
+        assigned += owner is not None
+    results.put((assigned, time.perf_counter() - started))
+
+
+def run(processes, leads, naive):
+    from django.db import connections
+
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_create, args=(n, leads, naive, results))
+        for n in range(processes)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    total = processes * leads
+    return {
+        "leads": total,
+        "assigned": sum(a for a, _ in outcomes),
+        "seconds": round(elapsed, 2),
+        "leads_per_second": round(total / elapsed, 1),
+    }
+
+
+def check():
+    from django.db.models import Count, Q
+    from leads.models import CounsellorProfile, Lead
+
+    over, drift = 0, 0
+    profiles = CounsellorProfile.objects.annotate(
+        actual=Count("user__lead", filter=~Q(user__lead__crm_status__in=Lead.CLOSED_STATUSES))
+    )
+    for profile in profiles:
+        over += profile.actual > profile.capacity
+        drift += profile.actual != profile.open_leads
+    return {"over_capacity": over, "counter_drift": drift}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--leads", type=int, default=500, help="per process")
+    parser.add_argument("--counsellors", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=80)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from leads import assignment
+    from leads.models import CounsellorProfile, Lead
+
+    countries = list(Lead.Country)
+    results = {}
+    with bench_database():
+        for name, naive in (("before", True), ("after", False)):
+            Lead.objects.all().delete()
+            CounsellorProfile.objects.all().delete()
+            User.objects.all().delete()
+            for n in range(args.counsellors):
+                CounsellorProfile.objects.create(
+                    user=User.objects.create_user(f"counsellor{n}"),
+                    capacity=args.capacity,
+                    # Every third counsellor specialises in one country.
+                    countries=[countries[n % len(countries)]] if n % 3 == 0 else [],
+                )
+            assignment.reset()
+            if naive:
+                CounsellorProfile.objects.update(open_leads=0)
+
+            results[name] = run(args.processes, args.leads, naive)
+            if naive:
+                # The naive path never maintained the counters.
+                assignment.rebuild_load()
+            results[name].update(check())
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
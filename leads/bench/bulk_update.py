@@ -0,0 +1,72 @@
+"""
+Changing the status and assignee of N leads: one POST to /update-status/
+per lead (the fetch plus a save each) against one POST to
+/api/leads/bulk/. Reports queries and wall time for each; the bulk
+endpoint's query count should not move with --leads.
+
+    python -m leads.bench.bulk_update --rows 100000 --leads 10 100 1000
+"""
+import argparse
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def measure(call):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - started
+    return {"queries": len(queries), "seconds": round(elapsed, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--leads", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from leads.bench.synthetic import insert_leads
+    from leads.models import CounsellorProfile, Lead
+
+    results = []
+    with bench_database():
+        insert_leads(args.rows)
+        counsellor = User.objects.create_user("counsellor")
+        CounsellorProfile.objects.create(user=counsellor)
+        client = Client()
+        client.force_login(counsellor)
+        # Skip the session-loading queries in the first measurement.
+        client.get("/api/leads/", {"page_size": 1})
+
+        for n in args.leads:
+            per_lead, bulk = (
+                list(Lead.objects.filter(crm_status="new").order_by("id").values_list("id", flat=True)[i * n:(i + 1) * n])
+                for i in range(2)
+            )
+
+            def one_by_one():
+                for lead_id in per_lead:
+                    client.post(f"/update-status/{lead_id}/", {"status": "contacted", "assigned_to": counsellor.id})
+
+            def at_once():
+                response = client.post(
+                    "/api/leads/bulk/",
+                    {"ids": bulk, "status": "contacted", "assigned_to": counsellor.id},
+                    content_type="application/json",
+                )
+                assert response.json() == {"updated": n}, response.content
+
+            results.append({"leads": n, "update_status": measure(one_by_one), "bulk": measure(at_once)})
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
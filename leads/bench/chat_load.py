@@ -0,0 +1,133 @@
+"""
+Load test for the chat endpoint against a local fake OpenAI server.
+
+"before" drives the sync ``ai_chat`` view through a fixed number of
+threads, the way a pool of gunicorn sync workers would serve it. "after"
+drives ``ai_chat_async`` from a single event loop, the way one ASGI worker
+would. Both hit the same fake model with the same latency, with the
+reply cache and chat dedup turned off so every request reaches the model.
+"cache_hit" repeats the async run with the in-process reply cache on and
+reports its hit ratio.
+
+    python -m leads.bench.chat_load --requests 200 --workers 4 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from leads.bench import bench_database, report, setup_django, summarize
+
+
+PAYLOAD = {
+    "name": "Bench Student",
+    "email": "bench@example.com",
+    "phone": "9876543210",
+    "ielts_score": 7,
+    "budget": 28,
+    "qualification": "Graduation",
+    "intake": "September",
+    "user_summary": "Name: Bench Student\nIELTS: 7\nBudget: 28",
+}
+
+
+def use_reply_cache(backend):
+    """Select the ai_cache backend; dedup is off so every request is a new lead."""
+    from django.conf import settings
+    from leads import ai_cache
+
+    settings.AI_REPLY_CACHE = {**settings.AI_REPLY_CACHE, "BACKEND": backend}
+    settings.DEDUP_CHAT_MODE = "off"
+    ai_cache.reset()
+
+
+def run_sync(requests, workers):
+    from django.test import Client
+
+    def one(_):
+        client = Client()
+        started = time.perf_counter()
+        response = client.post("/ai_chat/", PAYLOAD, content_type="application/json")
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_async(requests, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+        fallbacks = 0
+
+        async def one():
+            nonlocal fallbacks
+            async with gate:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/ai_chat/async/", PAYLOAD, content_type="application/json"
+                )
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.content
+                if "Student Profile Summary" in response.json()["ai_reply"]:
+                    fallbacks += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        result = summarize(latencies, time.perf_counter() - started)
+        result["fallback_replies"] = fallbacks
+        return result
+
+    return asyncio.run(main())
+
+
+def run_cached(requests, concurrency):
+    from leads import ai_cache
+
+    use_reply_cache("leads.ai_cache.LocMemBackend")
+    # One request fills the cache; concurrent first requests would all miss.
+    run_async(1, 1)
+    ai_cache.stats.reset()
+    result = run_async(requests, concurrency)
+    result["cache"] = ai_cache.stats.as_dict()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="sync worker threads for the 'before' run")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="in-flight requests for the 'after' run")
+    parser.add_argument("--delay", type=float, default=0.2,
+                        help="fake model latency in seconds")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from leads import llm
+    from leads.bench.fake_openai import FakeOpenAIServer
+
+    with bench_database(), FakeOpenAIServer(delay=args.delay) as server:
+        settings.OPENAI_BASE_URL = server.base_url
+        settings.OPENAI_API_KEY = "sk-bench"
+        llm.reset()
+        use_reply_cache("leads.ai_cache.NullBackend")
+
+        report({
+            "model_delay_s": args.delay,
+            "before_sync": run_sync(args.requests, args.workers),
+            "after_async": run_async(args.requests, args.concurrency),
+            "cache_hit": run_cached(args.requests, args.concurrency),
+        })
+
+
+if __name__ == "__main__":
+    main()
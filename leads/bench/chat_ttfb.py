@@ -0,0 +1,102 @@
+"""
+Time-to-first-byte for the chat reply, buffered vs server-sent events,
+against a local fake OpenAI server that streams tokens.
+
+"buffered" is ai_chat/async/, whose first byte is the whole reply.
+"stream" is ai_chat/stream/, whose first byte is the ``meta`` event written
+right after the lead is saved. ``db_write`` times Lead.objects.create on
+its own, the floor the streaming TTFB should sit near. The reply cache
+and chat dedup are off, so every request waits for the model.
+
+    python -m leads.bench.chat_ttfb --requests 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from leads.bench import bench_database, report, setup_django
+from leads.bench.chat_load import PAYLOAD, use_reply_cache
+
+
+def _ms(samples):
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def run(requests):
+    from django.test import AsyncClient
+    from leads.models import Lead
+
+    async def main():
+        client = AsyncClient()
+        buffered, first_byte, first_token, total = [], [], [], []
+
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.post(
+                "/ai_chat/async/", PAYLOAD, content_type="application/json"
+            )
+            assert response.status_code == 200
+            buffered.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = await client.post(
+                "/ai_chat/stream/", PAYLOAD, content_type="application/json"
+            )
+            ttfb = token_at = None
+            async for chunk in response.streaming_content:
+                now = time.perf_counter() - started
+                if ttfb is None:
+                    ttfb = now
+                if token_at is None and b"event: token" in chunk:
+                    token_at = now
+            first_byte.append(ttfb)
+            first_token.append(token_at)
+            total.append(time.perf_counter() - started)
+
+        return buffered, first_byte, first_token, total
+
+    buffered, first_byte, first_token, total = asyncio.run(main())
+
+    writes = []
+    for _ in range(requests):
+        fields = {k: v for k, v in PAYLOAD.items() if k != "user_summary"}
+        started = time.perf_counter()
+        Lead.objects.create(**fields)
+        writes.append(time.perf_counter() - started)
+
+    return {
+        "db_write": _ms(writes),
+        "buffered_ttfb": _ms(buffered),
+        "stream_ttfb": _ms(first_byte),
+        "stream_first_token": _ms(first_token),
+        "stream_complete": _ms(total),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.3,
+                        help="fake model latency before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from leads import llm
+    from leads.bench.fake_openai import FakeOpenAIServer
+
+    with bench_database(), FakeOpenAIServer(args.delay, args.token_delay) as server:
+        settings.OPENAI_BASE_URL = server.base_url
+        settings.OPENAI_API_KEY = "sk-bench"
+        llm.reset()
+        use_reply_cache("leads.ai_cache.NullBackend")
+        report(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Dashboard and analytics cost with many leads: the original per-request
+COUNT / TruncMonth queries over Lead versus the LeadStat-backed views.
+
+    python -m leads.bench.dashboard_stats --rows 1000000
+"""
+import argparse
+import statistics
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def legacy_dashboard():
+    from leads.models import Lead
+
+    Lead.objects.count()
+    Lead.objects.filter(lead_quality=Lead.Quality.HOT).count()
+    Lead.objects.filter(lead_quality=Lead.Quality.WARM).count()
+    Lead.objects.filter(lead_quality=Lead.Quality.COLD).count()
+    Lead.objects.filter(crm_status="converted").count()
+
+
+def legacy_analytics():
+    from django.db.models import Count
+    from django.db.models.functions import TruncMonth
+    from leads.models import Lead
+
+    list(Lead.objects.annotate(month=TruncMonth("created_at"))
+         .values("month").annotate(total=Count("id")).order_by("month"))
+    list(Lead.objects.filter(crm_status="converted").annotate(month=TruncMonth("created_at"))
+         .values("month").annotate(total=Count("id")).order_by("month"))
+    Lead.objects.filter(lead_quality=Lead.Quality.HOT).count()
+    Lead.objects.filter(lead_quality=Lead.Quality.WARM).count()
+    Lead.objects.filter(lead_quality=Lead.Quality.COLD).count()
+
+
+def measure(fn, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        fn()
+    queries = len(ctx.captured_queries)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    return {"queries": queries, "p50_ms": round(statistics.median(timings) * 1000, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from leads.bench.synthetic import insert_leads
+
+    with bench_database():
+        started = time.perf_counter()
+        insert_leads(args.rows)
+        seeded = time.perf_counter() - started
+
+        client = Client()
+        client.force_login(User.objects.create_superuser("bench", "bench@example.com", "x"))
+
+        def page(url):
+            def fetch():
+                assert client.get(url).status_code == 200
+            return fetch
+
+        report({
+            "rows": args.rows,
+            "seed_seconds": round(seeded, 1),
+            "before": {
+                "dashboard_queries": measure(legacy_dashboard, args.repeat),
+                "analytics_queries": measure(legacy_analytics, args.repeat),
+            },
+            # Page timings include the session/user lookups of a real request.
+            "after": {
+                "dashboard_page": measure(page("/dashboard/"), args.repeat),
+                "analytics_page": measure(page("/analytics/"), args.repeat),
+            },
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Duplicate detection cost. For each --rows size, loads synthetic leads of
+which --duplicate-share repeat an earlier lead's email or phone, then
+times dedup.duplicate_groups() (exact keys, and with fuzzy names) and the
+single-lead find_duplicate() lookup done at ingest. Time per row should
+stay flat as the table grows.
+
+    python -m leads.bench.dedup --rows 50000 100000 200000
+"""
+import argparse
+import random
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def insert_with_duplicates(rows, share, seed=7):
+    from django.db import transaction
+    from leads.bench.synthetic import generate_leads, keep_created_at
+    from leads.models import Lead, normalize_email, normalize_phone
+
+    rng = random.Random(seed)
+    batch, originals = [], []
+    with keep_created_at():
+        for lead in generate_leads(rows, seed=seed):
+            if originals and rng.random() < share:
+                original = rng.choice(originals)
+                if rng.random() < 0.5:
+                    lead.email = original.email.upper()
+                    lead.email_key = normalize_email(lead.email)
+                else:
+                    lead.phone = original.phone
+                    lead.phone_digits = normalize_phone(lead.phone)
+            else:
+                originals.append(lead)
+            batch.append(lead)
+            if len(batch) >= 5000:
+                with transaction.atomic():
+                    Lead.objects.bulk_create(batch)
+                batch = []
+        with transaction.atomic():
+            Lead.objects.bulk_create(batch)
+
+
+def timed(call):
+    started = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 100_000, 200_000])
+    parser.add_argument("--duplicate-share", type=float, default=0.05)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from leads import dedup
+    from leads.models import Lead
+
+    results = []
+    for rows in args.rows:
+        with bench_database():
+            insert_with_duplicates(rows, args.duplicate_share)
+
+            groups, exact = timed(lambda: dedup.duplicate_groups(fuzzy=False))
+            fuzzy_groups, fuzzy = timed(lambda: dedup.duplicate_groups(fuzzy=True))
+
+            probes = list(Lead.objects.order_by("?").values_list("name", "email", "phone")[:args.lookups])
+            _, lookups = timed(lambda: [dedup.find_duplicate(*probe) for probe in probes])
+
+            results.append({
+                "rows": rows,
+                "groups": len(groups),
+                "fuzzy_groups": len(fuzzy_groups),
+                "exact_seconds": round(exact, 3),
+                "exact_us_per_row": round(exact / rows * 1e6, 2),
+                "fuzzy_seconds": round(fuzzy, 3),
+                "fuzzy_us_per_row": round(fuzzy / rows * 1e6, 2),
+                "find_duplicate_ms": round(lookups / len(probes) * 1000, 3),
+            })
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
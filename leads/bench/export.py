@@ -0,0 +1,126 @@
+"""
+Lead export memory: peak RSS growth of the original buffered CSV export
+versus the streaming exports in leads.exporting, at one or more table sizes.
+Each export runs in a forked child so its high-water mark is its own.
+Exits non-zero if a streaming export grows by more than --max-rss-mb.
+
+    python -m leads.bench.export --rows 100000,1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise LookupError(field)
+
+
+def legacy_export():
+    """The export_csv view as it was: one HttpResponse holding every row."""
+    import csv
+
+    from django.http import HttpResponse
+    from leads.models import Lead
+
+    response = HttpResponse(content_type="text/csv")
+    writer = csv.writer(response)
+    writer.writerow(["Name", "Phone", "Score", "Quality", "Country", "Status"])
+    for lead in Lead.objects.all():
+        writer.writerow([
+            lead.name,
+            lead.phone,
+            lead.lead_score,
+            lead.get_lead_quality_display(),
+            lead.get_recommended_country_display(),
+            lead.crm_status,
+        ])
+    return [response.content]
+
+
+def streaming_export(fmt):
+    def run():
+        from leads import exporting
+        from leads.models import Lead
+
+        return exporting.stream_export(Lead.objects.all(), fmt)
+    return run
+
+
+def measure(export):
+    """Run ``export`` in a child; return (peak RSS growth in MB, seconds)."""
+    from django.db import connections
+
+    connections.close_all()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            with open("/proc/self/clear_refs", "w") as clear:
+                clear.write("5")  # reset VmHWM to the current RSS
+        except OSError:
+            pass
+        baseline = _status_kb("VmRSS")
+        started = time.perf_counter()
+        with open(os.devnull, "wb") as sink:
+            for chunk in export():
+                sink.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+        elapsed = time.perf_counter() - started
+        os.write(write_fd, f"{_status_kb('VmHWM') - baseline} {elapsed}".encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as result:
+        grown_kb, elapsed = result.read().split()
+    os.waitpid(pid, 0)
+    return round(int(grown_kb) / 1024, 1), round(float(elapsed), 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="100000,1000000",
+                        help="comma-separated table sizes")
+    parser.add_argument("--max-rss-mb", type=float, default=64,
+                        help="fail if a streaming export grows RSS by more than this")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from leads.bench.synthetic import insert_leads
+
+    exports = {
+        "legacy_csv": legacy_export,
+        "csv": streaming_export("csv"),
+        "ndjson": streaming_export("ndjson"),
+        "columnar": streaming_export("columnar"),
+    }
+
+    results = []
+    over_budget = []
+    with bench_database():
+        inserted = 0
+        for rows in sorted(int(n) for n in args.rows.split(",")):
+            insert_leads(rows - inserted, seed=rows)
+            inserted = rows
+
+            runs = {}
+            for name, export in exports.items():
+                grown_mb, seconds = measure(export)
+                runs[name] = {"rss_growth_mb": grown_mb, "seconds": seconds}
+                if name != "legacy_csv" and grown_mb > args.max_rss_mb:
+                    over_budget.append((rows, name, grown_mb))
+            results.append({"rows": rows, "exports": runs})
+
+    report(results)
+    if over_budget:
+        sys.exit(f"streaming export over the {args.max_rss_mb} MB budget: {over_budget}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+A tiny stand-in for Twilio's Messages API. It accepts
+``POST /2010-04-01/Accounts/<sid>/Messages.json``, sleeps for a fixed
+delay, and records each message it "delivers". It can also be told to
+throttle (429 with Retry-After), fail (500), or reject numbers (400), so
+retries and dead-lettering can be exercised without the real API.
+"""
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+MESSAGES_PATH = re.compile(r"^/2010-04-01/Accounts/(?P<sid>[^/]+)/Messages\.json$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every request on a kept-alive connection.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+
+        match = MESSAGES_PATH.match(self.path)
+        if not match:
+            return self.reply(404, {"code": 20404, "message": "Not found"})
+
+        expected = "Basic " + base64.b64encode(f"{server.sid}:{server.token}".encode()).decode()
+        if match["sid"] != server.sid or self.headers.get("Authorization") != expected:
+            return self.reply(401, {"code": 20003, "message": "Authenticate"})
+
+        time.sleep(server.delay)
+
+        with server.lock:
+            server.requests += 1
+            attempt = server.requests
+        if server.throttle_every and attempt % server.throttle_every == 0:
+            return self.reply(429, {"code": 20429, "message": "Too Many Requests"}, {"Retry-After": "0"})
+        if server.fail_every and attempt % server.fail_every == 0:
+            return self.reply(500, {"code": 20500, "message": "Internal Server Error"})
+        if form.get("To") in server.reject:
+            return self.reply(400, {"code": 21211, "message": "Invalid 'To' Phone Number"})
+
+        with server.lock:
+            sid = f"SM{len(server.messages):032d}"
+            server.messages.append({
+                "sid": sid, "to": form.get("To"), "from": form.get("From"),
+                "body": form.get("Body"), "at": time.time(),
+            })
+        self.reply(201, {"sid": sid, "status": "queued", "to": form.get("To")})
+
+
+class FakeTwilioServer:
+    """
+    Usage::
+
+        with FakeTwilioServer(delay=0.05) as server:
+            settings.TWILIO_API_BASE = server.base_url
+            settings.TWILIO_SID, settings.TWILIO_TOKEN = server.sid, server.token
+    """
+
+    def __init__(self, delay=0.0, throttle_every=0, fail_every=0, reject=(),
+                 host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.delay = delay
+        self.httpd.throttle_every = throttle_every
+        self.httpd.fail_every = fail_every
+        self.httpd.reject = set(reject)
+        self.httpd.sid = "ACfake"
+        self.httpd.token = "fake-token"
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self.httpd.connections = 0
+        self.httpd.messages = []
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __getattr__(self, name):
+        # sid, token, requests, connections, messages
+        return getattr(self.httpd, name)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
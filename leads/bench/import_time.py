@@ -0,0 +1,92 @@
+"""
+Cold-start import cost, read from ``python -X importtime``. Each target
+runs in --processes fresh interpreters:
+
+* setup: ``django.setup()``, what every manage.py command pays,
+* urls: setup plus the URLconf (views, serializers), what a web worker
+  pays before its first request.
+
+Reports the median total import time, the heaviest top-level imports and
+whether any of the lazily loaded SDKs (LAZY) came in anyway, and exits 1
+when the urls target is over --budget-ms (~300ms today). It is a
+wall-clock number, so it is checked here rather than in the test suite.
+
+    python -m leads.bench.import_time --processes 5 --budget-ms 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from leads.bench import report
+
+
+TARGETS = {
+    "setup": "import django; django.setup()",
+    "urls": "import django; django.setup(); import study_abroad_ai.urls",
+}
+
+# Only imported when a message is sent or a completion requested.
+LAZY = ("openai", "httpx", "twilio")
+
+
+def measure(code, **env):
+    """
+    Run ``code`` in a fresh interpreter under -X importtime. Returns
+    (total_ms, {module: cumulative_us}) for every module it imported;
+    the total sums the top-level imports, interpreter startup included.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True, capture_output=True, text=True,
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE="study_abroad_ai.settings", **env),
+    ).stderr
+
+    modules = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules[name.strip()] = int(cumulative)
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def loaded(modules, packages=LAZY):
+    """Which of ``packages`` (or their submodules) are in ``modules``."""
+    return sorted({name.split(".")[0] for name in modules if name.split(".")[0] in packages})
+
+
+def heaviest(modules, count):
+    top_level = [name for name in modules if "." not in name]
+    return {name: round(modules[name] / 1000, 1) for name in sorted(top_level, key=modules.get, reverse=True)[:count]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=500)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for target, code in TARGETS.items():
+        runs = [measure(code) for _ in range(args.processes)]
+        modules = runs[-1][1]
+        results[target] = {
+            "total_ms": round(statistics.median(total for total, _ in runs), 1),
+            "lazy_sdks_loaded": loaded(modules),
+            "heaviest_ms": heaviest(modules, args.top),
+        }
+    report(results)
+    if results["urls"]["total_ms"] > args.budget_ms:
+        sys.exit(f"urls import took {results['urls']['total_ms']}ms (budget {args.budget_ms}ms)")
+
+
+if __name__ == "__main__":
+    main()
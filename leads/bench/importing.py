@@ -0,0 +1,93 @@
+"""
+Bulk import throughput: leads.importing against one Lead.save() per row.
+Writes a synthetic CSV (with a share of duplicate and invalid rows), then
+imports it into an empty table. Exits non-zero if the bulk import of
+--rows takes longer than --max-seconds.
+
+    python -m leads.bench.importing --rows 100000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+HEADER = ["name", "email", "phone", "ielts_score", "budget", "qualification", "backlogs", "intake"]
+
+
+def write_csv(path, rows):
+    from leads.bench.synthetic import generate_leads
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i, lead in enumerate(generate_leads(rows)):
+            if i % 50 == 49:
+                # Every 50th row repeats an earlier email; every 100th is invalid.
+                lead.email = f"dup{i - 1}@example.com" if i % 100 != 99 else "not-an-email"
+            elif i % 50 == 48:
+                lead.email = f"dup{i}@example.com"
+            writer.writerow([
+                lead.name, lead.email, lead.phone, lead.ielts_score or "", lead.budget or "",
+                lead.qualification, "yes" if lead.backlogs else "no", lead.intake,
+            ])
+
+
+def one_by_one(path, limit):
+    """The only write path before bulk import: Lead.save() per row."""
+    from leads.importing import build_lead, read_csv
+    from django.core.exceptions import ValidationError
+
+    count = 0
+    started = time.perf_counter()
+    with open(path, newline="") as f:
+        for _, row in read_csv(f):
+            if count >= limit:
+                break
+            try:
+                build_lead(row).save()
+            except ValidationError:
+                continue
+            count += 1
+    elapsed = time.perf_counter() - started
+    return {"rows": count, "seconds": round(elapsed, 2), "rows_per_second": round(count / elapsed, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--save-sample", type=int, default=2000,
+                        help="rows to time through Lead.save() for comparison")
+    parser.add_argument("--max-seconds", type=float, default=60)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from leads import importing
+    from leads.models import Lead
+
+    path = os.path.join(tempfile.mkdtemp(prefix="crm-import-"), "leads.csv")
+    write_csv(path, args.rows)
+
+    with bench_database():
+        baseline = one_by_one(path, args.save_sample)
+        Lead.objects.all().delete()
+
+        with open(path, newline="") as f:
+            result = importing.import_stream(f, "csv", args.batch_size)
+
+    summary = result.as_dict()
+    summary.pop("errors")
+    report({"save_per_row": baseline, "bulk_import": summary})
+    os.remove(path)
+
+    if result.seconds > args.max_seconds:
+        sys.exit(f"bulk import of {args.rows} rows took {result.seconds:.1f}s (budget {args.max_seconds}s)")
+
+
+if __name__ == "__main__":
+    main()
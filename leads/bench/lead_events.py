@@ -0,0 +1,125 @@
+"""
+Lead event log costs. Writes synthetic status histories for --leads leads
+over --months months, then times:
+
+* logging: events.record() inside one transaction, as a save in a view
+  or import runs it, against one autocommitted INSERT per event,
+* archive: moving all but the last two months into gzip segments,
+* replay: events per second streamed from segments plus table,
+* conversion: events.conversion_times() over the whole history.
+
+    python -m leads.bench.lead_events --leads 200000 --months 24
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from leads.bench import bench_database, report, setup_django
+
+
+def histories(count, months, seed=11):
+    """(lead_id, at, from_status, crm_status) tuples, each lead's in order."""
+    from django.utils import timezone
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    for lead_id in range(1, count + 1):
+        at = now - timedelta(days=rng.uniform(0, months * 30))
+        yield lead_id, at, "", "new"
+        status = "new"
+        for stage in ("contacted", "followup", "converted"):
+            if rng.random() < 0.3:
+                if rng.random() < 0.5:
+                    yield lead_id, at + timedelta(hours=1), status, "lost"
+                break
+            at += timedelta(hours=rng.expovariate(1 / 48))
+            if at >= now:
+                break
+            yield lead_id, at, status, stage
+            status = stage
+
+
+def timed(call):
+    started = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--leads", type=int, default=200_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--logged-saves", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.db import transaction
+    from django.utils import timezone
+    from leads import events
+    from leads.models import Lead, LeadEvent
+
+    with bench_database():
+        rows = sorted(histories(args.leads, args.months), key=lambda row: row[1])
+        batch = []
+        for lead_id, at, from_status, crm_status in rows:
+            batch.append(LeadEvent(lead_id=lead_id, at=at, from_status=from_status, crm_status=crm_status))
+            if len(batch) >= 5000:
+                LeadEvent.objects.bulk_create(batch)
+                batch = []
+        LeadEvent.objects.bulk_create(batch)
+
+        lead = Lead(id=0, crm_status="contacted")
+
+        def in_transaction():
+            with transaction.atomic():
+                for _ in range(args.logged_saves):
+                    events.record(lead, from_status="new")
+
+        def autocommit():
+            for _ in range(args.logged_saves):
+                events.record(lead, from_status="new")
+
+        _, transaction_seconds = timed(in_transaction)
+        _, autocommit_seconds = timed(autocommit)
+        LeadEvent.objects.filter(lead_id=0).delete()
+
+        directory = tempfile.mkdtemp(prefix="crm-events-")
+        before = timezone.localdate() - timedelta(days=31)
+        archived, archive_seconds = timed(lambda: events.archive(before, directory=directory))
+        segment_bytes = sum(os.path.getsize(path) for path, _ in archived)
+        archived_events = sum(count for _, count in archived)
+
+        replayed, replay_seconds = timed(lambda: sum(1 for _ in events.replay(directory=directory)))
+        conversion, conversion_seconds = timed(lambda: events.conversion_times(directory=directory))
+        shutil.rmtree(directory, True)
+
+        report({
+            "leads": args.leads,
+            "events": len(rows),
+            "logging_us_per_event": {
+                "in_transaction": round(transaction_seconds / args.logged_saves * 1e6, 1),
+                "autocommit": round(autocommit_seconds / args.logged_saves * 1e6, 1),
+            },
+            "archive": {
+                "segments": len(archived),
+                "events": archived_events,
+                "seconds": round(archive_seconds, 2),
+                "bytes_per_event": round(segment_bytes / max(archived_events, 1), 1),
+                "left_in_table": LeadEvent.objects.count(),
+            },
+            "replay": {
+                "events": replayed,
+                "seconds": round(replay_seconds, 2),
+                "events_per_second": round(replayed / replay_seconds),
+            },
+            "conversion_seconds": round(conversion_seconds, 2),
+            "converted": conversion["converted"],
+        })
+
+
+if __name__ == "__main__":
+    main()
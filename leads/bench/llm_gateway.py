@@ -0,0 +1,106 @@
+"""
+What the LLM gateway saves per request and what it costs at startup.
+
+* per_request_us: building an OpenAI client per request (what ai_chat
+  did before the shared client) against fetching the shared one, and
+  building the prompt.
+* first_chat_ms: the first completion in a fresh process against the
+  fake OpenAI server, cold against after llm.warm_up(connect=True).
+* startup_ms: django.setup() in a fresh process without and with
+  LLM_WARM_UP, i.e. what moving the client build to boot adds there.
+
+    python -m leads.bench.llm_gateway --repeat 200 --processes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from leads.bench import report, setup_django
+
+
+FIRST_CHAT = """
+import json, os, time
+import django
+django.setup()
+from django.conf import settings
+from leads import llm
+settings.OPENAI_BASE_URL = os.environ["BENCH_BASE_URL"]
+settings.OPENAI_API_KEY = "sk-bench"
+if os.environ.get("BENCH_WARM") == "1":
+    llm.warm_up(connect=True)
+started = time.perf_counter()
+llm.complete(llm.build_messages(80, "UK", "Hot", "Name: Asha"))
+print(json.dumps(time.perf_counter() - started))
+"""
+
+STARTUP = """
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+print(json.dumps(time.perf_counter() - started))
+"""
+
+
+def in_process(code, processes, **env):
+    samples = []
+    for _ in range(processes):
+        out = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE="study_abroad_ai.settings", **env),
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def per_call_us(call, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return round((time.perf_counter() - started) / repeat * 1e6, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from openai import OpenAI
+    from leads import llm
+    from leads.bench.fake_openai import FakeOpenAIServer
+
+    settings.OPENAI_API_KEY = "sk-bench"
+    llm.reset()
+    llm.get_client()
+
+    results = {
+        "http2": llm.http2_enabled(),
+        "per_request_us": {
+            "new_client_each_request": per_call_us(lambda: OpenAI(**llm._client_kwargs()), args.repeat),
+            "shared_client": per_call_us(llm.get_client, args.repeat),
+            "build_messages": per_call_us(lambda: llm.build_messages(80, "UK", "Hot", "Name: Asha"), args.repeat),
+        },
+    }
+
+    with FakeOpenAIServer(delay=0) as server:
+        results["first_chat_ms"] = {
+            "cold": in_process(FIRST_CHAT, args.processes, BENCH_BASE_URL=server.base_url),
+            "warmed": in_process(FIRST_CHAT, args.processes, BENCH_BASE_URL=server.base_url, BENCH_WARM="1"),
+        }
+
+    results["startup_ms"] = {
+        "django_setup": in_process(STARTUP, args.processes),
+        "django_setup_with_warm_up": in_process(STARTUP, args.processes, LLM_WARM_UP="1"),
+    }
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cost of MetricsMiddleware on ordinary requests.
+
+Three variants take turns requesting the same pages so that noise hits
+them equally: the project's MIDDLEWARE without MetricsMiddleware, with it
+as configured by default (metrics + slow-request sampler), and with the
+optional per-request JSON log line enabled as well. Logs go to a file, as
+they would to a log shipper, not the terminal. Reports median latency per
+variant and the overhead relative to the bare stack; exits non-zero when
+the default configuration exceeds --budget percent.
+
+    python -m leads.bench.metrics_overhead --rounds 2000 --leads 2000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+PATHS = ("/dashboard/", "/api/leads/", "/leads/")
+
+
+def make_client(middleware):
+    from django.test import Client, override_settings
+
+    client = Client()
+    with override_settings(MIDDLEWARE=middleware):
+        # The handler builds its middleware chain on the first request.
+        client.get(PATHS[0])
+    return client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--budget", type=float, default=1.0, help="max overhead in percent")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from leads import middleware
+    from leads.bench.synthetic import insert_leads
+    from leads.logs import JsonFormatter
+
+    log_path = os.path.join(tempfile.mkdtemp(prefix="crm-bench-"), "requests.log")
+    handler = logging.FileHandler(log_path)
+    handler.setFormatter(JsonFormatter())
+    logging.getLogger("leads").handlers = [handler]
+    # Swapping the middleware's logger per request rather than calling
+    # setLevel, which flushes every logger's level cache.
+    request_log = logging.getLogger("leads.requests")
+    request_log.setLevel(logging.INFO)
+    quiet_log = logging.getLogger("leads.bench.quiet")
+    quiet_log.setLevel(logging.WARNING)
+
+    with bench_database():
+        insert_leads(args.leads)
+        User.objects.create_superuser("bench", password="bench")
+
+        full = list(settings.MIDDLEWARE)
+        bare = [m for m in full if m != "leads.middleware.MetricsMiddleware"]
+        # name -> (client, logger the middleware writes request lines to)
+        variants = {
+            "bare": (make_client(bare), quiet_log),
+            "metrics": (make_client(full), quiet_log),
+            "metrics_and_request_log": (make_client(full), request_log),
+        }
+        for client, _ in variants.values():
+            client.login(username="bench", password="bench")
+
+        timings = {name: [] for name in variants}
+        order = list(variants.items())
+        for i in range(args.rounds):
+            path = PATHS[i % len(PATHS)]
+            # Rotate which variant goes first to cancel out cache effects.
+            for name, (client, log) in order[i % 3:] + order[:i % 3]:
+                middleware.request_log = log
+                started = time.perf_counter()
+                client.get(path)
+                timings[name].append(time.perf_counter() - started)
+
+    medians = {name: statistics.median(samples) for name, samples in timings.items()}
+    overhead = {
+        name: round((medians[name] - medians["bare"]) / medians["bare"] * 100, 2)
+        for name in ("metrics", "metrics_and_request_log")
+    }
+    report({
+        "median_ms": {name: round(value * 1000, 3) for name, value in medians.items()},
+        "overhead_percent": overhead,
+        "budget_percent": args.budget,
+        "log_lines": sum(1 for _ in open(log_path)),
+    })
+    if overhead["metrics"] > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
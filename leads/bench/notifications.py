@@ -0,0 +1,98 @@
+"""
+Counsellor notification delivery against a local fake Twilio server.
+
+"before" sends each message on its own fresh HTTP session, the way
+``send_whatsapp_to_counsellor`` built a new Twilio Client per call.
+"after" queues the same messages and drains them with one
+leads.notify.Dispatcher (shared session, token bucket, per-number
+digests). Reports messages/second, API requests, TCP connections and
+delivery latency (queued -> sent).
+
+    python -m leads.bench.notifications --messages 500 --counsellors 20
+"""
+import argparse
+import time
+
+from leads.bench import bench_database, percentile, report, setup_django
+
+
+def run_before(server, messages, counsellors):
+    import requests
+
+    url = f"{server.base_url}/2010-04-01/Accounts/{server.sid}/Messages.json"
+    latencies = []
+    started = time.perf_counter()
+    for i in range(messages):
+        queued = time.perf_counter()
+        with requests.Session() as session:
+            session.post(url, auth=(server.sid, server.token), data={
+                "From": "whatsapp:+10000000000",
+                "To": f"whatsapp:+9100000{i % counsellors:05d}",
+                "Body": f"Hot lead {i}",
+            }).raise_for_status()
+        latencies.append(time.perf_counter() - queued)
+    return time.perf_counter() - started, latencies
+
+
+def run_after(server, messages, counsellors):
+    from leads import notify
+    from leads.models import Notification
+
+    for i in range(messages):
+        notify.enqueue(f"Hot lead {i}", to=f"whatsapp:+9100000{i % counsellors:05d}")
+
+    dispatcher = notify.Dispatcher(name="bench", client=notify.TwilioClient(
+        sid=server.sid, token=server.token, api_base=server.base_url,
+    ))
+    started = time.perf_counter()
+    dispatcher.run(burst=True)
+    elapsed = time.perf_counter() - started
+
+    latencies = [
+        (sent_at - created_at).total_seconds()
+        for created_at, sent_at in Notification.objects.filter(status="sent").values_list("created_at", "sent_at")
+    ]
+    return elapsed, latencies
+
+
+def summary(server, messages, elapsed, latencies):
+    return {
+        "messages": messages,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(messages / elapsed, 1),
+        "api_requests": server.requests,
+        "connections": server.connections,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--counsellors", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02,
+                        help="fake API latency per request, seconds")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from leads.bench.fake_twilio import FakeTwilioServer
+
+    # Benchmark the transport, not the production rate limit.
+    settings.NOTIFY_RATE = settings.NOTIFY_BURST = 10000
+
+    results = {}
+    with FakeTwilioServer(delay=args.delay) as server:
+        elapsed, latencies = run_before(server, args.messages, args.counsellors)
+        results["before"] = summary(server, args.messages, elapsed, latencies)
+
+    with bench_database(), FakeTwilioServer(delay=args.delay) as server:
+        elapsed, latencies = run_after(server, args.messages, args.counsellors)
+        results["after"] = summary(server, args.messages, elapsed, latencies)
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Dashboard and analytics requests/second with and without the report
+fragment cache, and for polling clients that revalidate with the ETag.
+
+"uncached" sets REPORT_FRAGMENT_TTL to 0 so every hit recomputes and
+renders the tiles and charts; "cached" reuses the fragments; "revalidate"
+sends If-None-Match and gets 304s.
+
+    python -m leads.bench.report_cache --rows 200000 --requests 1000
+"""
+import argparse
+import time
+
+from leads.bench import bench_database, report, setup_django, summarize
+
+
+def measure(client, path, requests, **headers):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = client.get(path, **headers)
+        latencies.append(time.perf_counter() - request_started)
+        assert response.status_code in (200, 304), response.status_code
+    result = summarize(latencies, time.perf_counter() - started)
+    result["status"] = response.status_code
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+    from leads.bench.synthetic import insert_leads
+
+    results = {}
+    with bench_database():
+        insert_leads(args.rows)
+        client = Client()
+        client.force_login(User.objects.create_user("bench"))
+
+        for path in ("/dashboard/", "/analytics/"):
+            cache.clear()
+            with override_settings(REPORT_FRAGMENT_TTL=0):
+                uncached = measure(client, path, args.requests)
+            client.get(path)
+            cached = measure(client, path, args.requests)
+            etag = client.get(path)["ETag"]
+            revalidate = measure(client, path, args.requests, HTTP_IF_NONE_MATCH=etag)
+            results[path] = {"uncached": uncached, "cached": cached, "revalidate": revalidate}
+
+    report({"rows": args.rows, **results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Bulk rescoring: leads.scoring.rescore (CASE UPDATEs per id range) against
+loading rows and saving them back with bulk_update. The rescore applies a
+rule version identical to the built-in rules, then every row is checked
+against the original if/elif logic; exits non-zero on any mismatch.
+
+    python -m leads.bench.rescoring --rows 1000000
+"""
+import argparse
+import sys
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+def legacy_scores(ielts_score, budget, qualification, backlogs):
+    """Lead.calculate_score / get_country_recommendation / get_lead_quality before leads.scoring."""
+    from leads.models import Lead
+
+    score = 0
+    if ielts_score:
+        if ielts_score >= 7:
+            score += 30
+        elif ielts_score >= 6:
+            score += 20
+        elif ielts_score >= 5.5:
+            score += 10
+        else:
+            score += 5
+    if budget:
+        if budget >= 30:
+            score += 30
+        elif budget >= 25:
+            score += 25
+        elif budget >= 20:
+            score += 15
+        elif budget >= 15:
+            score += 10
+        else:
+            score += 5
+    score += 20 if qualification == "Graduation" else 10
+    score += 20 if not backlogs else -10
+
+    if not budget:
+        country = Lead.Country.SINGAPORE
+    elif budget >= 30:
+        country = Lead.Country.AUSTRALIA
+    elif budget >= 25:
+        country = Lead.Country.UK
+    elif budget >= 15:
+        country = Lead.Country.DUBAI
+    else:
+        country = Lead.Country.SINGAPORE
+
+    if score >= 85:
+        quality = Lead.Quality.HOT
+    elif score >= 65:
+        quality = Lead.Quality.WARM
+    else:
+        quality = Lead.Quality.COLD
+    return score, country, quality
+
+
+def python_rescore(limit, batch_size=2000):
+    """Load, score in Python and bulk_update ``limit`` rows."""
+    from leads import scoring
+    from leads.models import Lead
+
+    fields = ["lead_score", "recommended_country", "lead_quality", "score_version"]
+    started = time.perf_counter()
+    leads = list(Lead.objects.order_by("id")[:limit])
+    scoring.score_leads(leads)
+    Lead.objects.bulk_update(leads, fields, batch_size=batch_size)
+    return time.perf_counter() - started
+
+
+def mismatches():
+    from leads.models import Lead
+
+    rows = Lead.objects.values_list(
+        "ielts_score", "budget", "qualification", "backlogs",
+        "lead_score", "recommended_country", "lead_quality",
+    ).iterator(chunk_size=10000)
+    return sum(1 for *inputs, score, country, quality in rows
+               if legacy_scores(*inputs) != (score, country, quality))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--python-sample", type=int, default=50000,
+                        help="rows to time through bulk_update for comparison")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from leads import scoring
+    from leads.bench.synthetic import insert_leads
+    from leads.models import Lead, ScoringRuleSet
+
+    with bench_database():
+        insert_leads(args.rows)
+        # Scramble the stored results so the rescore has to recompute them.
+        Lead.objects.update(lead_score=0, lead_quality=Lead.Quality.COLD)
+
+        ScoringRuleSet.objects.create(rules=scoring.DEFAULT_RULES, is_active=True, note="bench")
+        started = time.perf_counter()
+        updated = scoring.rescore(chunk_size=args.chunk_size)
+        sql_seconds = time.perf_counter() - started
+        wrong = mismatches()
+
+        sample = min(args.python_sample, args.rows)
+        python_seconds = python_rescore(sample)
+
+    report({
+        "rows": args.rows,
+        "sql_case_update": {
+            "rescored": updated,
+            "seconds": round(sql_seconds, 2),
+            "rows_per_second": round(updated / sql_seconds, 1),
+        },
+        "python_bulk_update": {
+            "rows": sample,
+            "seconds": round(python_seconds, 2),
+            "rows_per_second": round(sample / python_seconds, 1),
+        },
+        "mismatches": wrong,
+    })
+    if wrong:
+        sys.exit(f"{wrong} rows differ from the original scoring logic")
+
+
+if __name__ == "__main__":
+    main()
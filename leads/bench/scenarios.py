@@ -0,0 +1,110 @@
+"""
+Request scenarios for ``manage.py bench``. Each one drives a view through
+the Django test client in-process: no network, so the numbers are the cost
+of our own code and queries, comparable from one commit to the next.
+
+A scenario is a function ``(client, state, i)`` that makes request ``i``
+and returns the response. ``state`` is a dict shared by the requests of
+one run (lead ids, the current cursor, ...). ``run`` times each request
+and counts its queries.
+"""
+import time
+
+from leads.bench import summarize
+
+
+def _chat_payload(i):
+    # Twenty distinct profiles, so most requests hit the reply cache the way
+    # repeat visitors with similar profiles do.
+    ielts = 5.5 + (i % 5) * 0.5
+    budget = 15 + (i % 4) * 5
+    return {
+        "name": f"Bench Student {i}",
+        "email": f"bench{i}@example.com",
+        "phone": f"8{i:09d}",
+        "ielts_score": ielts,
+        "budget": budget,
+        "qualification": "Graduation",
+        "intake": "September",
+        "user_summary": f"IELTS: {ielts}\nBudget: {budget}",
+    }
+
+
+def ai_chat(client, state, i):
+    return client.post("/ai_chat/", _chat_payload(i), content_type="application/json")
+
+
+def dashboard(client, state, i):
+    return client.get("/dashboard/")
+
+
+def analytics(client, state, i):
+    return client.get("/analytics/")
+
+
+def lead_list(client, state, i):
+    """Searches for a name, then pages forward five times before the next search."""
+    from leads.bench.synthetic import FIRST_NAMES
+
+    params = {"q": FIRST_NAMES[(i // 6) % len(FIRST_NAMES)]}
+    if i % 6 and state.get("cursor"):
+        params["after"] = state["cursor"]
+    response = client.get("/leads/", params)
+    state["cursor"] = response.context["leads"].next_cursor if response.context else None
+    return response
+
+
+def export_csv(client, state, i):
+    response = client.get("/export/", {"status": "converted"})
+    # Streaming: the work happens while the body is consumed.
+    state["bytes"] = state.get("bytes", 0) + sum(len(chunk) for chunk in response.streaming_content)
+    return response
+
+
+def update_status(client, state, i):
+    from leads.bench.synthetic import DEFAULT_DISTRIBUTION
+
+    if "ids" not in state:
+        from leads.models import Lead
+        state["ids"] = list(Lead.objects.order_by("?").values_list("id", flat=True)[:1000])
+    statuses = [status for status, _ in DEFAULT_DISTRIBUTION["crm_status"]]
+    lead_id = state["ids"][i % len(state["ids"])]
+    return client.post(f"/update-status/{lead_id}/", {"status": statuses[i % len(statuses)]})
+
+
+# name -> (scenario, expected status code)
+SCENARIOS = {
+    "ai_chat": (ai_chat, 200),
+    "dashboard": (dashboard, 200),
+    "analytics": (analytics, 200),
+    "lead_list": (lead_list, 200),
+    "export_csv": (export_csv, 200),
+    "update_status": (update_status, 302),
+}
+
+
+def run(name, client, requests, warmup=5):
+    """Run one scenario; returns throughput, latency percentiles and queries per request."""
+    from leads.middleware import QueryRecorder
+
+    scenario, expected = SCENARIOS[name]
+    state = {}
+    for i in range(warmup):
+        scenario(client, state, i)
+
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for i in range(warmup, warmup + requests):
+        recorder = QueryRecorder(keep=0)
+        request_started = time.perf_counter()
+        with recorder.install():
+            response = scenario(client, state, i)
+        latencies.append(time.perf_counter() - request_started)
+        queries.append(recorder.count)
+        errors += response.status_code != expected
+    result = summarize(latencies, time.perf_counter() - started)
+
+    result["queries_mean"] = round(sum(queries) / len(queries), 2)
+    result["queries_max"] = max(queries)
+    result["errors"] = errors
+    return result
@@ -0,0 +1,79 @@
+"""
+Lead search latency: the original three-column icontains filter versus
+leads.search.search_leads, at one or more table sizes.
+
+    python -m leads.bench.search --rows 100000,1000000
+"""
+import argparse
+import statistics
+import time
+
+from leads.bench import bench_database, report, setup_django
+
+
+QUERIES = {
+    "name": "Sharma",
+    "email_fragment": "iyer12",
+    "phone_full": "+91 98765 43210",
+    "phone_prefix": "98765",
+    "miss": "zzzz",
+}
+
+
+def legacy_search(queryset, query):
+    from django.db.models import Q
+
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(phone__icontains=query) |
+        Q(email__icontains=query)
+    )
+
+
+def time_page(search, query, repeat):
+    """First page of the lead list (10 rows) for ``query``."""
+    from leads.models import Lead
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(search(Lead.objects.order_by("-created_at"), query)[:10])
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="100000,1000000",
+                        help="comma-separated table sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from leads.bench.synthetic import insert_leads
+    from leads.search import search_leads
+
+    results = []
+    with bench_database():
+        inserted = 0
+        for rows in sorted(int(n) for n in args.rows.split(",")):
+            # Grow the same table up to the next size.
+            insert_leads(rows - inserted, seed=rows)
+            inserted = rows
+
+            results.append({
+                "rows": rows,
+                "p50_ms": {
+                    name: {
+                        "before": time_page(legacy_search, query, args.repeat),
+                        "after": time_page(search_leads, query, args.repeat),
+                    }
+                    for name, query in QUERIES.items()
+                },
+            })
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Synthetic leads for benchmarks. Rows are inserted with bulk_create, so
+score, country, quality and phone_digits are filled in here, and
+created_at is spread over the last ``months`` months.
+
+Field values are drawn from a distribution: ``[value, weight]`` pairs per
+field, plus the probability of ``backlogs``. ``load_distribution`` merges
+a JSON file of overrides into DEFAULT_DISTRIBUTION, e.g.
+
+    {"ielts_score": [[6.5, 1], [7.0, 1]], "crm_status": [["new", 1]]}
+"""
+import contextlib
+import itertools
+import json
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+
+FIRST_NAMES = ["Asha", "Ravi", "Priya", "Arjun", "Neha", "Karan", "Meera", "Vikram", "Sara", "Rohan"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Iyer", "Khan", "Das", "Nair", "Gupta", "Reddy", "Joshi"]
+
+DEFAULT_DISTRIBUTION = {
+    "ielts_score": [[None, 10], [5.0, 5], [5.5, 10], [6.0, 20], [6.5, 25], [7.0, 15], [7.5, 10], [8.0, 5]],
+    "budget": [[None, 10], [10, 10], [15, 15], [18, 10], [20, 15], [25, 15], [28, 10], [30, 10], [35, 5]],
+    "qualification": [["12th", 40], ["Graduation", 60]],
+    "intake": [["January", 30], ["May", 15], ["September", 55]],
+    "crm_status": [["new", 50], ["contacted", 20], ["followup", 15], ["converted", 10], ["lost", 5]],
+    "backlogs": 0.2,
+}
+
+
+@contextlib.contextmanager
+def keep_created_at():
+    """Let bulk_create store our created_at instead of auto_now_add's."""
+    from leads.models import Lead
+
+    field = Lead._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def load_distribution(path=None):
+    """DEFAULT_DISTRIBUTION with the overrides from a JSON file, if given."""
+    distribution = dict(DEFAULT_DISTRIBUTION)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(distribution)
+        if unknown:
+            raise ValueError(f"Unknown distribution fields: {', '.join(sorted(unknown))}")
+        distribution.update(overrides)
+    return distribution
+
+
+class _Sampler:
+    """Draws every field of a distribution from one seeded Random."""
+
+    def __init__(self, distribution, rng):
+        self.rng = rng
+        self.backlogs = distribution["backlogs"]
+        self.fields = {}
+        for field, pairs in distribution.items():
+            if field != "backlogs":
+                values, weights = zip(*pairs)
+                self.fields[field] = (values, list(itertools.accumulate(weights)))
+
+    def draw(self):
+        row = {
+            field: self.rng.choices(values, cum_weights=cumulative)[0]
+            for field, (values, cumulative) in self.fields.items()
+        }
+        row["backlogs"] = self.rng.random() < self.backlogs
+        return row
+
+
+def make_lead(i, sampler, now, months):
+    from leads.models import Lead, name_key, normalize_email, normalize_phone
+    from leads.scoring import score_leads
+
+    rng = sampler.rng
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    phone = f"9{rng.randrange(10 ** 9):09d}"
+    name, email = f"{first} {last}", f"{first.lower()}.{last.lower()}{i}@example.com"
+    lead = Lead(
+        name=name,
+        email=email,
+        phone=phone,
+        phone_digits=normalize_phone(phone),
+        email_key=normalize_email(email),
+        name_key=name_key(name),
+        created_at=now - timedelta(seconds=rng.randrange(months * 30 * 24 * 3600)),
+        **sampler.draw(),
+    )
+    score_leads([lead])
+    return lead
+
+
+def generate_leads(count, seed=42, months=24, distribution=None):
+    sampler = _Sampler(distribution or DEFAULT_DISTRIBUTION, random.Random(seed))
+    now = timezone.now()
+    for i in range(count):
+        yield make_lead(i, sampler, now, months)
+
+
+def insert_leads(count, seed=42, months=24, batch_size=5000, distribution=None):
+    """Insert ``count`` synthetic leads, then rebuild the stats and rollups."""
+    from django.db import transaction
+    from leads import rollups, stats
+    from leads.models import Lead
+
+    batch = []
+    with keep_created_at():
+        for lead in generate_leads(count, seed, months, distribution):
+            batch.append(lead)
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    Lead.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                Lead.objects.bulk_create(batch)
+
+    stats.rebuild()
+    rollups.rebuild()
@@ -0,0 +1,232 @@
+"""
+Duplicate lead detection.
+
+Two leads are the same student when they share a normalized email
+(``Lead.email_key``) or phone (``Lead.phone_digits``). Both columns are
+indexed, so the check at ingest is a single indexed lookup.
+
+With DEDUP_FUZZY_NAMES on, leads created within DEDUP_FUZZY_WINDOW of
+each other also match when their names are at least DEDUP_NAME_SIMILARITY
+alike, which catches a resubmission with a mistyped email and phone.
+Names are only compared within a block of leads sharing ``Lead.name_key``,
+never pairwise across the table.
+
+* save_chat_lead()    create the lead for a chat submission, or (with
+                      DEDUP_CHAT_MODE "merge") update the one it duplicates
+* duplicate_groups()  union-find over existing leads, for ``dedup_leads``
+* merge_group()       fold one group into its oldest lead
+"""
+from collections import defaultdict, deque
+from datetime import timedelta
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ai_cache, metrics
+from .models import AIJob, Lead, Notification, name_key, name_tokens, normalize_email, normalize_phone
+from .rollups import FUNNEL
+from .scoring import score_leads
+
+
+# Fields a newer submission overwrites when it is merged into a lead.
+MERGE_FIELDS = [
+    "name", "email", "phone", "country_interest", "course_interest",
+    "ielts_score", "budget", "intake", "qualification", "backlogs",
+]
+# The chat form is anonymous: knowing a lead's email or phone must not be
+# enough to change who that lead is.
+IDENTITY_FIELDS = ("name", "email", "phone")
+CHAT_MERGE_FIELDS = [field for field in MERGE_FIELDS if field not in IDENTITY_FIELDS]
+
+
+def _name_text(name):
+    return " ".join(name_tokens(name))
+
+
+def _similar(a, b):
+    return bool(a and b) and SequenceMatcher(None, a, b).ratio() >= settings.DEDUP_NAME_SIMILARITY
+
+
+def similar_names(a, b):
+    return _similar(_name_text(a), _name_text(b))
+
+
+def _fuzzy_window():
+    return timedelta(hours=settings.DEDUP_FUZZY_WINDOW_HOURS)
+
+
+# =====================================
+# INGEST
+# =====================================
+
+def find_duplicate(name, email, phone, fuzzy=None):
+    """The oldest existing lead this submission duplicates, or None."""
+    keys = Q()
+    if normalize_email(email):
+        keys |= Q(email_key=normalize_email(email))
+    if normalize_phone(phone):
+        keys |= Q(phone_digits=normalize_phone(phone))
+    if keys:
+        match = Lead.objects.filter(keys).order_by("created_at", "id").first()
+        if match:
+            return match
+
+    if fuzzy is None:
+        fuzzy = settings.DEDUP_FUZZY_NAMES
+    if not fuzzy or not name_key(name):
+        return None
+    block = Lead.objects.filter(
+        name_key=name_key(name), created_at__gte=timezone.now() - _fuzzy_window()
+    ).order_by("created_at", "id")
+    return next((lead for lead in block[:50] if similar_names(name, lead.name)), None)
+
+
+def merge_fields(lead, values, fields=MERGE_FIELDS):
+    """Copy the non-empty ``fields`` in ``values`` onto ``lead``."""
+    for field in fields:
+        value = values.get(field)
+        if value is None or value == "":
+            continue
+        setattr(lead, field, value)
+
+
+def save_chat_lead(fields, user_summary):
+    """
+    The lead for a chat submission. In DEDUP_CHAT_MODE "merge" a
+    submission matching an existing lead updates that lead's profile
+    (CHAT_MERGE_FIELDS, never its name, email or phone) instead of
+    creating another. Returns (lead, merged).
+
+    ``ai_reply_key`` is always the fingerprint of this submission's
+    summary, so a merged lead is never answered with a reply cached for
+    somebody else's summary.
+    """
+    lead = None
+    if settings.DEDUP_CHAT_MODE == "merge":
+        lead = find_duplicate(fields.get("name"), fields.get("email"), fields.get("phone"))
+    merged = lead is not None
+
+    if merged:
+        merge_fields(lead, fields, CHAT_MERGE_FIELDS)
+    else:
+        lead = Lead(**fields)
+
+    # save() scores again; this gives the fingerprint before the one write.
+    score_leads([lead])
+    lead.ai_reply_key = ai_cache.fingerprint(
+        lead.lead_score, lead.recommended_country, lead.lead_quality, user_summary
+    )
+    lead.save()
+
+    metrics.CHAT_LEADS.inc(("merged" if merged else "created",))
+    return lead, merged
+
+
+# =====================================
+# BATCH
+# =====================================
+
+class _UnionFind:
+    """Disjoint sets of lead ids, union by size with path halving."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, x):
+        parent = self.parent
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size.get(a, 1) < self.size.get(b, 1):
+            a, b = b, a
+        self.parent[b] = a
+        self.parent.setdefault(a, a)
+        self.size[a] = self.size.get(a, 1) + self.size.pop(b, 1)
+
+    def groups(self):
+        members = defaultdict(list)
+        for x in self.parent:
+            members[self.find(x)].append(x)
+        return [sorted(ids) for ids in members.values() if len(ids) > 1]
+
+
+def duplicate_groups(fuzzy=None):
+    """
+    Sorted id lists of leads that are the same student, from one pass over
+    the table in creation order: each lead is joined to the first lead
+    seen with its email or phone key and, with ``fuzzy``, to similar names
+    in its name block created within the window. Near-linear in the number
+    of leads; memory holds one entry per distinct key.
+    """
+    if fuzzy is None:
+        fuzzy = settings.DEDUP_FUZZY_NAMES
+    window = _fuzzy_window()
+
+    sets = _UnionFind()
+    first_email, first_phone = {}, {}
+    blocks = defaultdict(deque)
+
+    rows = (
+        Lead.objects
+        .order_by("created_at", "id")
+        .values_list("id", "email_key", "phone_digits", "name", "name_key", "created_at")
+        .iterator(chunk_size=5000)
+    )
+    for lead_id, email, phone, name, block, created_at in rows:
+        for first, key in ((first_email, email), (first_phone, phone)):
+            if key:
+                seen = first.setdefault(key, lead_id)
+                if seen != lead_id:
+                    sets.union(seen, lead_id)
+
+        if fuzzy and block:
+            recent = blocks[block]
+            while recent and recent[0][0] < created_at - window:
+                recent.popleft()
+            text = _name_text(name)
+            for _, other_id, other_text in recent:
+                if _similar(text, other_text):
+                    sets.union(other_id, lead_id)
+            recent.append((created_at, lead_id, text))
+
+    return sorted(sets.groups())
+
+
+def merge_group(ids):
+    """
+    Fold the leads in ``ids`` into the oldest one and delete the rest.
+    Newer non-empty details win, the status furthest along the funnel is
+    kept, AI jobs and notifications move to the survivor. Counters are
+    kept right by the usual save and delete signals. Returns the survivor.
+    """
+    with transaction.atomic():
+        leads = list(Lead.objects.select_for_update().filter(id__in=ids).order_by("created_at", "id"))
+        if len(leads) < 2:
+            return leads[0] if leads else None
+        survivor, duplicates = leads[0], leads[1:]
+
+        for duplicate in duplicates:
+            merge_fields(survivor, {field: getattr(duplicate, field) for field in MERGE_FIELDS})
+            if not survivor.assigned_to_id:
+                survivor.assigned_to_id = duplicate.assigned_to_id
+        open_statuses = [lead.crm_status for lead in leads if lead.crm_status in FUNNEL]
+        if open_statuses:
+            survivor.crm_status = max(open_statuses, key=FUNNEL.index)
+
+        duplicate_ids = [lead.id for lead in duplicates]
+        AIJob.objects.filter(lead_id__in=duplicate_ids).update(lead=survivor)
+        Notification.objects.filter(lead_id__in=duplicate_ids).update(lead=survivor)
+        Lead.objects.filter(id__in=duplicate_ids).delete()
+        survivor.save()
+
+    return survivor
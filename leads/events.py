@@ -0,0 +1,273 @@
+"""
+The lead event log: one LeadEvent row per change to a lead's CRM status
+or assignee, never updated, so funnel timing can be read back without
+scanning or joining ``Lead``.
+
+* record()          write an event from the save signal, in the save's
+                    transaction
+* record_created()  the creation events for a bulk_create()d batch
+* record_changes()  one INSERT ... SELECT for a bulk update
+* archive()         move whole months out of the table into gzip JSON
+                    Lines segments under LEAD_EVENT_ARCHIVE_DIR
+* replay()          stream events oldest first, segments then table
+* conversion_times() hours from creation to each funnel stage
+
+A segment is ``lead-events-YYYY-MM-<first id>.jsonl.gz``, one JSON array
+per line in FIELDS order. Archiving a month again (after a crash between
+writing the file and deleting the rows) rewrites the same segment.
+"""
+import gzip
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import DateTimeField, F, IntegerField, Q, Value
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import LeadEvent
+from .rollups import FUNNEL
+
+
+FIELDS = ("id", "lead_id", "at", "from_status", "crm_status", "assigned_to_id")
+
+Event = namedtuple("Event", FIELDS)
+
+
+# =====================================
+# WRITING
+# =====================================
+
+def record(lead, from_status=""):
+    """
+    Log ``lead``'s current status and assignee, changed from
+    ``from_status``. The row is written straight away, in the same
+    transaction (or savepoint) as the save that called it, so a rollback
+    drops it with the change.
+    """
+    LeadEvent.objects.using(lead._state.db or router.db_for_write(LeadEvent)).create(
+        lead_id=lead.pk, from_status=from_status,
+        crm_status=lead.crm_status, assigned_to_id=lead.assigned_to_id,
+    )
+
+
+def record_created(leads):
+    """Creation events for leads written with bulk_create()."""
+    LeadEvent.objects.bulk_create(
+        [
+            LeadEvent(lead_id=lead.pk, at=lead.created_at, crm_status=lead.crm_status,
+                      assigned_to_id=lead.assigned_to_id)
+            for lead in leads
+        ],
+        batch_size=500,
+    )
+
+
+def record_changes(leads, changes):
+    """
+    Log ``changes`` (the crm_status and/or assigned_to_id about to be
+    passed to ``leads.update()``) for each lead they change, in one
+    INSERT ... SELECT. Call it before the update.
+    """
+    unchanged = Q()
+    if "crm_status" in changes:
+        unchanged &= Q(crm_status=changes["crm_status"])
+    if "assigned_to_id" in changes:
+        owner = changes["assigned_to_id"]
+        unchanged &= Q(assigned_to__isnull=True) if owner is None else Q(assigned_to_id=owner)
+
+    def new(field, output_field):
+        return Value(changes[field], output_field=output_field) if field in changes else F(field)
+
+    rows = (
+        leads.exclude(unchanged)
+        .order_by()
+        .annotate(
+            event_lead=F("id"),
+            event_at=Value(timezone.now(), output_field=DateTimeField()),
+            event_from=F("crm_status"),
+            event_status=new("crm_status", LeadEvent._meta.get_field("crm_status")),
+            event_owner=new("assigned_to_id", IntegerField()),
+        )
+        .values_list("event_lead", "event_at", "event_from", "event_status", "event_owner")
+    )
+    sql, params = rows.query.sql_with_params()
+    connection = connections[rows.db]
+    columns = ", ".join(connection.ops.quote_name(name) for name in FIELDS[1:])
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {connection.ops.quote_name(LeadEvent._meta.db_table)} ({columns}) {sql}", params)
+
+
+# =====================================
+# ARCHIVE SEGMENTS
+# =====================================
+
+_SEGMENT = re.compile(r"^lead-events-(\d{4})-(\d{2})-(\d+)\.jsonl\.gz$")
+
+
+def _month_bounds(year, month):
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def segments(start=None, end=None, directory=None):
+    """Segment paths holding events in [start, end), oldest first."""
+    directory = directory or settings.LEAD_EVENT_ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = _SEGMENT.match(name)
+        if not match:
+            continue
+        year, month, first_id = map(int, match.groups())
+        month_start, month_end = _month_bounds(year, month)
+        if (start is None or month_end > start) and (end is None or month_start < end):
+            found.append(((year, month, first_id), os.path.join(directory, name)))
+    return [path for _, path in sorted(found)]
+
+
+def _write_segment(path, rows):
+    tmp = path + ".tmp"
+    count = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as out:
+        for event_id, lead_id, at, from_status, crm_status, assigned_to_id in rows:
+            out.write(json.dumps(
+                [event_id, lead_id, at.isoformat(), from_status, crm_status, assigned_to_id],
+                separators=(",", ":"),
+            ))
+            out.write("\n")
+            count += 1
+    with open(tmp, "rb") as written:
+        os.fsync(written.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def archive(before, directory=None, dry_run=False):
+    """
+    Move the events of every whole month before ``before`` (a date; the
+    month it falls in is kept) into one segment per month, deleting them
+    from the table once the segment is on disk. Returns [(path, events)].
+    """
+    directory = directory or settings.LEAD_EVENT_ARCHIVE_DIR
+    cutoff, _ = _month_bounds(before.year, before.month)
+    months = (
+        LeadEvent.objects.filter(at__lt=cutoff)
+        .annotate(month=TruncMonth("at"))
+        .values_list("month", flat=True)
+        .distinct()
+        .order_by("month")
+    )
+
+    archived = []
+    for month in list(months):
+        start, end = _month_bounds(month.year, month.month)
+        events = LeadEvent.objects.filter(at__gte=start, at__lt=end)
+        first = events.order_by("id").values_list("id", flat=True).first()
+        path = os.path.join(directory, f"lead-events-{month:%Y-%m}-{first:012d}.jsonl.gz")
+        if dry_run:
+            archived.append((path, events.count()))
+            continue
+
+        os.makedirs(directory, exist_ok=True)
+        with transaction.atomic():
+            last = events.order_by("-id").values_list("id", flat=True).first()
+            events = events.filter(id__lte=last)
+            count = _write_segment(path, events.order_by("at", "id").values_list(*FIELDS).iterator(chunk_size=5000))
+            events.delete()
+        archived.append((path, count))
+    return archived
+
+
+# =====================================
+# REPLAY
+# =====================================
+
+def _read_segment(path):
+    with gzip.open(path, "rt", encoding="utf-8") as segment:
+        for line in segment:
+            event_id, lead_id, at, from_status, crm_status, assigned_to_id = json.loads(line)
+            yield Event(event_id, lead_id, datetime.fromisoformat(at), from_status, crm_status, assigned_to_id)
+
+
+def replay(start=None, end=None, lead_id=None, directory=None):
+    """
+    Every event with ``start <= at < end`` (either may be None), oldest
+    first, from the archive segments and then the table, streamed.
+    """
+    for path in segments(start, end, directory):
+        for event in _read_segment(path):
+            if ((start is None or event.at >= start) and (end is None or event.at < end)
+                    and (lead_id is None or event.lead_id == lead_id)):
+                yield event
+
+    events = LeadEvent.objects.all()
+    if start is not None:
+        events = events.filter(at__gte=start)
+    if end is not None:
+        events = events.filter(at__lt=end)
+    if lead_id is not None:
+        events = events.filter(lead_id=lead_id)
+    for row in events.order_by("at", "id").values_list(*FIELDS).iterator(chunk_size=5000):
+        yield Event(*row)
+
+
+# =====================================
+# FUNNEL TIMING
+# =====================================
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _summary(hours):
+    hours.sort()
+    return {
+        "leads": len(hours),
+        "median_hours": _round(_percentile(hours, 50)),
+        "p90_hours": _round(_percentile(hours, 90)),
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def conversion_times(start=None, end=None, directory=None):
+    """
+    Hours from creation to each funnel stage after "new", for the leads
+    that first reached it in [start, end). Only leads whose log starts
+    with their creation as "new" are timed: leads created before the log
+    existed, or imported in a later status, have no start to measure from.
+    """
+    created = {}
+    stages = {stage: [] for stage in FUNNEL[1:]}
+    reached = set()
+
+    for event in replay(end=end, directory=directory):
+        if not event.from_status:
+            if event.crm_status == FUNNEL[0]:
+                created[event.lead_id] = event.at
+            continue
+        born = created.get(event.lead_id)
+        if born is None or event.crm_status not in stages or (event.lead_id, event.crm_status) in reached:
+            continue
+        reached.add((event.lead_id, event.crm_status))
+        if start is None or event.at >= start:
+            stages[event.crm_status].append((event.at - born).total_seconds() / 3600)
+
+    report = {stage: _summary(hours) for stage, hours in stages.items()}
+    return {
+        "from": start,
+        "to": end,
+        "stages": [dict(stage=stage, **report[stage]) for stage in FUNNEL[1:]],
+        "converted": report[FUNNEL[-1]],
+    }
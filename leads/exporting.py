@@ -0,0 +1,116 @@
+"""
+Streaming lead exports.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` and
+written out chunk by chunk, so memory stays flat however many leads match.
+Formats:
+
+* ``csv``       same columns as the original export
+* ``ndjson``    one JSON object per line
+* ``columnar``  gzip-compressed row groups: each line holds ``chunk_size``
+                rows stored column by column (``{"Name": [...], ...}``),
+                the layout Parquet uses, without needing pyarrow
+"""
+import csv
+import itertools
+import json
+import zlib
+
+from django.conf import settings
+
+from .models import Lead
+
+
+COLUMNS = [
+    ("name", "Name"),
+    ("phone", "Phone"),
+    ("lead_score", "Score"),
+    ("lead_quality", "Quality"),
+    ("recommended_country", "Country"),
+    ("crm_status", "Status"),
+]
+
+FORMATS = {
+    "csv": ("text/csv", "leads.csv"),
+    "ndjson": ("application/x-ndjson", "leads.ndjson"),
+    "columnar": ("application/gzip", "leads.columns.jsonl.gz"),
+}
+
+_QUALITY = dict(Lead.Quality.choices)
+_COUNTRY = dict(Lead.Country.choices)
+
+
+def iter_chunks(queryset, chunk_size=None, fields=None):
+    """
+    Yield lists of export rows (tuples in COLUMNS order). ``fields`` are
+    the queryset's names for the COLUMNS fields, when it is not of Lead.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = (
+        queryset
+        .order_by()
+        .values_list(*(fields or [field for field, _ in COLUMNS]))
+        .iterator(chunk_size=chunk_size)
+    )
+
+    chunk = []
+    for name, phone, score, quality, country, crm_status in rows:
+        chunk.append((name, phone, score, _QUALITY.get(quality, ""), _COUNTRY.get(country, ""), crm_status))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back what it was given."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(chunks):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for _, header in COLUMNS])
+    for chunk in chunks:
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+def stream_ndjson(chunks):
+    headers = [header for _, header in COLUMNS]
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(dict(zip(headers, row)), ensure_ascii=False) + "\n" for row in chunk
+        )
+
+
+def stream_columnar(chunks):
+    headers = [header for _, header in COLUMNS]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        group = {header: list(values) for header, values in zip(headers, zip(*chunk))}
+        data = compressor.compress((json.dumps(group, ensure_ascii=False) + "\n").encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+WRITERS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "columnar": stream_columnar,
+}
+
+
+def stream_export(queryset, fmt="csv", chunk_size=None, archived=None):
+    """
+    Yield the export of ``queryset`` in ``fmt`` as str (text) or bytes
+    (columnar), followed by the ``archived`` LeadArchive rows if given.
+    """
+    chunks = iter_chunks(queryset, chunk_size)
+    if archived is not None:
+        from .archive import EXPORT_FIELDS
+
+        chunks = itertools.chain(chunks, iter_chunks(archived, chunk_size, EXPORT_FIELDS))
+    return WRITERS[fmt](chunks)
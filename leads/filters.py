@@ -0,0 +1,61 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Lead
+from .search import search_leads
+
+
+# Query parameters understood by filter_leads(); shared by the lead list,
+# the list API and every export path.
+FILTER_PARAMS = ("q", "status", "from", "to", "assigned_to")
+
+
+def start_of_day(day):
+    """Midnight at the start of ``day`` in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_leads(params, queryset=None):
+    """
+    Apply the lead list filters in ``params`` (a QueryDict or dict):
+
+    * ``q``           free-text search (see leads.search)
+    * ``status``      crm_status
+    * ``from``/``to`` inclusive created_at date range, YYYY-MM-DD
+    * ``assigned_to`` counsellor user id, or ``none`` for unassigned
+
+    Unparseable values are ignored rather than rejected.
+    """
+    leads = Lead.objects.all() if queryset is None else queryset
+
+    query = params.get("q")
+    if query:
+        leads = search_leads(leads, query)
+
+    status_filter = params.get("status")
+    if status_filter:
+        leads = leads.filter(crm_status=status_filter)
+
+    # Compare against datetimes, not created_at__date, so the index is usable.
+    date_from = parse_date(params.get("from") or "")
+    if date_from:
+        leads = leads.filter(created_at__gte=start_of_day(date_from))
+
+    date_to = parse_date(params.get("to") or "")
+    if date_to:
+        leads = leads.filter(created_at__lt=start_of_day(date_to + timedelta(days=1)))
+
+    assigned_to = params.get("assigned_to")
+    if assigned_to == "none":
+        leads = leads.filter(assigned_to__isnull=True)
+    elif assigned_to and assigned_to.isdigit():
+        leads = leads.filter(assigned_to_id=int(assigned_to))
+
+    return leads
+
+
+def only_status_filter(params):
+    """True when LeadStat alone can answer a count for these filters."""
+    return not any(params.get(name) for name in FILTER_PARAMS if name != "status")
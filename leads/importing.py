@@ -0,0 +1,275 @@
+"""
+Bulk lead import from CSV or NDJSON.
+
+Rows are read as a stream, validated, and written one batch at a time. For
+each batch we:
+
+1. score every row in one pass (leads.scoring),
+2. drop rows whose email or phone is already in the batch or the table
+   (compared as normalized, on Lead.email_key and phone_digits),
+3. assign the rest to counsellors (leads.assignment.assign_batch) when
+   AUTO_ASSIGN_LEADS is on,
+4. bulk_create them, apply the LeadStat and rollup deltas, log their
+   creation events and queue the hot lead notifications in one
+   transaction.
+
+Column names are the Lead field names (case-insensitive, spaces allowed):
+name, email, phone, ielts_score, budget, qualification, backlogs, intake,
+country_interest, course_interest.
+"""
+import csv
+import json
+import math
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from . import assignment, events, notify, rollups, stats
+from .models import Lead, name_key, normalize_email, normalize_phone
+from .scoring import score_leads
+
+
+QUALIFICATIONS = {value for value, _ in Lead.QUALIFICATION_CHOICES}
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"", "0", "false", "no", "n"}
+
+# Keep a report readable when a whole file is bad.
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.seconds, 1) if self.seconds else None
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+# =====================================
+# READING
+# =====================================
+
+def _column(name):
+    return (name or "").strip().lower().replace(" ", "_")
+
+
+def read_csv(stream):
+    """Yield (line, row dict) from a text stream of CSV with a header row."""
+    reader = csv.reader(stream)
+    header = [_column(name) for name in next(reader, [])]
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield reader.line_num, dict(zip(header, row))
+
+
+def read_ndjson(stream):
+    """Yield (line, row dict) from a text stream of JSON objects, one per line."""
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            yield line, None
+            continue
+        yield line, {_column(key): value for key, value in row.items()} if isinstance(row, dict) else None
+
+
+READERS = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+}
+
+
+def decode_lines(binary_lines):
+    """Text lines from an iterable of UTF-8 byte lines, e.g. an upload."""
+    for number, line in enumerate(binary_lines):
+        text = line.decode("utf-8", errors="replace")
+        yield text.lstrip("\ufeff") if number == 0 else text
+
+
+def guess_format(filename, default="csv"):
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+# =====================================
+# VALIDATION
+# =====================================
+
+def _text(row, field, max_length, required=False):
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValidationError(f"{field} is required")
+    if len(value) > max_length:
+        raise ValidationError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def _number(row, field, cast, low, high):
+    value = row.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = cast(float(value)) if cast is int else cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValidationError(f"{field} is not a number")
+    if not (math.isfinite(number) and low <= number <= high):
+        raise ValidationError(f"{field} must be between {low} and {high}")
+    return number
+
+
+def _flag(row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    value = "" if value is None else str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError(f"{field} must be yes/no")
+
+
+def build_lead(row):
+    """An unsaved Lead from one input row. Raises ValidationError."""
+    email = _text(row, "email", 254, required=True)
+    validate_email(email)
+
+    phone = _text(row, "phone", 15, required=True)
+    if not normalize_phone(phone):
+        raise ValidationError("phone has no digits")
+
+    qualification = _text(row, "qualification", 20) or "12th"
+    if qualification not in QUALIFICATIONS:
+        raise ValidationError(f"qualification must be one of {sorted(QUALIFICATIONS)}")
+
+    name = _text(row, "name", 100, required=True)
+    return Lead(
+        name=name,
+        email=email,
+        phone=phone,
+        phone_digits=normalize_phone(phone),
+        email_key=normalize_email(email),
+        name_key=name_key(name),
+        ielts_score=_number(row, "ielts_score", float, 0, 9),
+        budget=_number(row, "budget", int, 0, 10 ** 6),
+        qualification=qualification,
+        backlogs=_flag(row, "backlogs"),
+        intake=_text(row, "intake", 20),
+        country_interest=_text(row, "country_interest", 50),
+        course_interest=_text(row, "course_interest", 100),
+    )
+
+
+# =====================================
+# WRITING
+# =====================================
+
+def _existing_keys(leads):
+    emails = {lead.email_key for lead in leads}
+    digits = {lead.phone_digits for lead in leads}
+    rows = Lead.objects.filter(
+        Q(email_key__in=emails) | Q(phone_digits__in=digits)
+    ).values_list("email_key", "phone_digits")
+    return {email for email, _ in rows}, {phone for _, phone in rows}
+
+
+def _write_batch(batch, seen_emails, seen_phones, report, dry_run):
+    existing_emails, existing_phones = _existing_keys(batch)
+    fresh = []
+    for lead in batch:
+        email = lead.email_key
+        if (email in seen_emails or email in existing_emails
+                or lead.phone_digits in seen_phones or lead.phone_digits in existing_phones):
+            report.duplicates += 1
+            continue
+        seen_emails.add(email)
+        seen_phones.add(lead.phone_digits)
+        fresh.append(lead)
+
+    score_leads(fresh)
+    if fresh and not dry_run:
+        # bulk_create skips save() and the signal handlers, so leads are
+        # assigned, the dashboard buckets and rollups bumped and hot leads
+        # queued here in the same transaction.
+        with transaction.atomic():
+            if settings.AUTO_ASSIGN_LEADS:
+                assignment.assign_batch(fresh)
+            Lead.objects.bulk_create(fresh)
+            stats.apply_deltas(stats.count_keys(fresh))
+            rollups.apply(rollups.count_keys(fresh))
+            events.record_created(fresh)
+            if settings.WHATSAPP_NOTIFICATIONS:
+                notify.notify_hot_leads(fresh)
+    report.created += len(fresh)
+
+
+def import_rows(rows, batch_size=None, dry_run=False):
+    """
+    Import (line, row dict) pairs, e.g. from read_csv(). Each batch of
+    ``batch_size`` valid rows is written in its own transaction, so a
+    failure part way keeps the batches already written. Returns an
+    ImportReport.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    seen_emails, seen_phones = set(), set()
+    started = time.perf_counter()
+
+    batch = []
+    for line, row in rows:
+        report.rows += 1
+        if row is None:
+            report.error(line, "not a JSON object")
+            continue
+        try:
+            batch.append(build_lead(row))
+        except ValidationError as e:
+            report.error(line, "; ".join(e.messages))
+            continue
+        if len(batch) >= batch_size:
+            _write_batch(batch, seen_emails, seen_phones, report, dry_run)
+            batch = []
+    if batch:
+        _write_batch(batch, seen_emails, seen_phones, report, dry_run)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def import_stream(stream, fmt="csv", batch_size=None, dry_run=False):
+    """Import a text stream of CSV or NDJSON."""
+    return import_rows(READERS[fmt](stream), batch_size, dry_run)
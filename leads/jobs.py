@@ -0,0 +1,183 @@
+import hashlib
+import os
+import random
+import re
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import ai_cache, dedup, llm
+from .models import AIJob, AIWorkerStat
+
+
+# =====================================
+# ENQUEUE
+# =====================================
+
+def job_key(fields, user_summary, idempotency_key=None):
+    """
+    Stable key for a chat submission. A client supplied Idempotency-Key
+    wins; otherwise the normalized form contents are hashed so the same
+    visitor pressing submit twice lands on the same job.
+    """
+    if idempotency_key:
+        raw = "client:" + idempotency_key.strip()
+    else:
+        raw = "|".join([
+            (fields.get("name") or "").strip().lower(),
+            (fields.get("email") or "").strip().lower(),
+            re.sub(r"\D", "", fields.get("phone") or ""),
+            " ".join(user_summary.lower().split()),
+        ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def enqueue_chat(fields, user_summary, idempotency_key=None):
+    """
+    Persist the lead and queue its AI analysis. Returns (job, created);
+    a repeated submission returns the existing job and creates nothing.
+    """
+    key = job_key(fields, user_summary, idempotency_key)
+
+    existing = AIJob.objects.select_related("lead").filter(key=key).first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            lead, _ = dedup.save_chat_lead(fields, user_summary)
+            job = AIJob.objects.create(lead=lead, key=key, user_summary=user_summary)
+    except IntegrityError:
+        # Lost a race with an identical submission; theirs wins.
+        return AIJob.objects.select_related("lead").get(key=key), False
+
+    return job, True
+
+
+# =====================================
+# CLAIM / RUN
+# =====================================
+
+def claim_job(worker):
+    """
+    Atomically take the oldest runnable job. Jobs left ``running`` longer
+    than AI_JOB_LEASE seconds (a crashed worker) are claimable again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.AI_JOB_LEASE)
+    runnable = (
+        Q(status="pending", run_after__lte=now) |
+        Q(status="running", locked_at__lt=stale)
+    )
+
+    candidates = (
+        AIJob.objects
+        .filter(runnable)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:5]
+    )
+
+    for job_id in candidates:
+        claimed = (
+            AIJob.objects
+            .filter(runnable, id=job_id)
+            .update(status="running", locked_by=worker, locked_at=now,
+                    attempts=F("attempts") + 1)
+        )
+        if claimed:
+            return AIJob.objects.select_related("lead").get(id=job_id)
+
+    return None
+
+
+def backoff_seconds(attempts):
+    base = settings.AI_JOB_BACKOFF
+    return base * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+def run_job(job):
+    """Generate the reply for a claimed job. Returns True on success."""
+    lead = job.lead
+
+    try:
+        ai_text = ai_cache.complete_for_lead(lead, job.user_summary)
+    except Exception as e:
+        job.error = str(e)[:2000]
+        if job.attempts >= settings.AI_JOB_MAX_ATTEMPTS:
+            # Out of retries: the visitor still gets the templated reply.
+            job.status = "failed"
+            job.result = llm.fallback_reply(
+                lead.name, lead.ielts_score, lead.budget,
+                lead.lead_score,
+                lead.get_recommended_country_display(),
+                lead.get_lead_quality_display(),
+            )
+            job.finished_at = timezone.now()
+        else:
+            job.status = "pending"
+            job.run_after = timezone.now() + timedelta(seconds=backoff_seconds(job.attempts))
+        job.save(update_fields=["status", "result", "error", "run_after", "finished_at"])
+        return False
+
+    job.status = "done"
+    job.result = ai_text
+    job.error = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "error", "finished_at"])
+    return True
+
+
+# =====================================
+# WORKER
+# =====================================
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Worker:
+
+    def __init__(self, name=None, poll_interval=1.0):
+        self.name = name or default_worker_name()
+        self.poll_interval = poll_interval
+        self.stopping = False
+
+        now = timezone.now()
+        AIWorkerStat.objects.update_or_create(
+            worker=self.name,
+            defaults={"started_at": now, "last_seen": now,
+                      "jobs_done": 0, "jobs_failed": 0, "busy_seconds": 0},
+        )
+
+    def record(self, ok, busy):
+        AIWorkerStat.objects.filter(worker=self.name).update(
+            last_seen=timezone.now(),
+            jobs_done=F("jobs_done") + (1 if ok else 0),
+            jobs_failed=F("jobs_failed") + (0 if ok else 1),
+            busy_seconds=F("busy_seconds") + busy,
+        )
+
+    def run_once(self):
+        """Process one job if there is one. Returns False when the queue is empty."""
+        job = claim_job(self.name)
+        if job is None:
+            return False
+
+        started = time.perf_counter()
+        ok = run_job(job)
+        self.record(ok, time.perf_counter() - started)
+        return True
+
+    def run(self, burst=False):
+        while not self.stopping:
+            if self.run_once():
+                continue
+            if burst:
+                break
+            AIWorkerStat.objects.filter(worker=self.name).update(last_seen=timezone.now())
+            time.sleep(self.poll_interval)
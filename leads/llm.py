@@ -0,0 +1,363 @@
+"""
+The LLM gateway: prompt building and the shared OpenAI clients.
+
+The openai SDK (and httpx under it) is imported on first use, not at
+import time, so management commands and worker boot don't pay for it.
+Each process keeps one sync client and one async client per event loop
+(closed when that loop shuts down), each over a keep-alive connection
+pool (HTTP/2 when the optional ``h2`` package is installed and LLM_HTTP2
+is on). ``warm_up()`` builds the sync client ahead of the first request; it runs from ``LeadsConfig.ready()``
+with LLM_WARM_UP set and from the gunicorn hooks in gunicorn.conf.py.
+"""
+import asyncio
+import collections
+import importlib.util
+import logging
+import threading
+import weakref
+
+from django.conf import settings
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = (
+    "You are a professional Study Abroad Assistant. Use only provided data. "
+    "Do not assume extra details. Format response clearly."
+)
+
+
+class LLMSaturated(Exception):
+    """Raised when the LLM pool has no free slot and its wait queue is full."""
+
+
+# =====================================
+# PROMPTS
+# =====================================
+
+# Built once: every request shares the system message and fills the
+# user template. The SDK only reads them.
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+USER_TEMPLATE = """
+AI PROFILE ANALYSIS:
+Score: {score}
+Recommended Country: {recommended_country}
+Lead Category: {lead_quality}
+
+USER_SUMMARY:
+{user_summary}
+"""
+
+
+def build_messages(score, recommended_country, lead_quality, user_summary):
+    return [
+        SYSTEM_MESSAGE,
+        {
+            "role": "user",
+            "content": USER_TEMPLATE.format(
+                score=score,
+                recommended_country=recommended_country,
+                lead_quality=lead_quality,
+                user_summary=user_summary,
+            ),
+        },
+    ]
+
+
+def fallback_reply(name, ielts_score, budget, score, recommended_country, lead_quality):
+    return f"""
+📋 Student Profile Summary
+
+Name: {name}
+IELTS: {ielts_score}
+Budget: {budget} Lakhs
+
+🤖 AI Profile Analysis
+• Eligibility Score: {score}%
+• Recommended Country: {recommended_country}
+• Lead Category: {lead_quality}
+
+📌 Next Step:
+Our counsellor will contact you shortly.
+"""
+
+
+# =====================================
+# SHARED SYNC CLIENT
+# =====================================
+
+_client = None
+_http = None
+_client_lock = threading.Lock()
+
+
+def http2_enabled():
+    return settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def _http_client(client_class, max_connections):
+    import httpx
+
+    return client_class(
+        http2=http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=settings.LLM_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _client_kwargs():
+    return {
+        "api_key": settings.OPENAI_API_KEY,
+        "base_url": settings.OPENAI_BASE_URL,
+        "timeout": settings.LLM_TIMEOUT,
+        "max_retries": 0,
+    }
+
+
+def get_client():
+    global _client, _http
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import DefaultHttpxClient, OpenAI
+
+                _http = _http_client(DefaultHttpxClient, settings.LLM_KEEPALIVE_CONNECTIONS)
+                _client = OpenAI(http_client=_http, **_client_kwargs())
+    return _client
+
+
+def warm_up(connect=None):
+    """
+    Build the shared sync client now (importing the SDK and setting up
+    its connection pool and TLS context) instead of on the first request.
+    With ``connect`` (default LLM_WARM_UP_CONNECT) also open a keep-alive
+    connection to the API. Never raises.
+    """
+    if connect is None:
+        connect = settings.LLM_WARM_UP_CONNECT
+    try:
+        client = get_client()
+        # The SDK imports its resource modules on first attribute access.
+        client.chat.completions
+        if connect:
+            # Any answer will do; it leaves a pooled connection behind.
+            _http.head(str(client.base_url))
+    except Exception:
+        logger.warning("LLM warm-up failed", exc_info=True)
+
+
+def complete(messages):
+    with metrics.llm_call("sync"):
+        completion = get_client().chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.3,
+        )
+    metrics.llm_usage(completion)
+    return completion.choices[0].message.content
+
+
+# =====================================
+# BOUNDED ASYNC POOL
+# =====================================
+
+class _Slots:
+    """
+    A counting semaphore shared by every event loop in the process (an
+    asyncio.Semaphore belongs to one loop). A released slot is handed
+    straight to the oldest waiter, on that waiter's own loop.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.free = size
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    async def acquire(self, max_queue):
+        with self._lock:
+            if self.free and not self._waiters:
+                self.free -= 1
+                return
+            if len(self._waiters) >= max_queue:
+                raise LLMSaturated(
+                    f"{self.size - self.free} in flight, {len(self._waiters)} waiting"
+                )
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                    return
+                except RuntimeError:
+                    continue  # that waiter's loop is closed
+            self.free += 1
+
+
+def _grant(future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def _close_with_loop(client):
+    # Parked on its first yield. asyncio.run() (and so async_to_sync and
+    # the ASGI servers) acloses live async generators before closing the
+    # loop, which runs the finally and closes the client's pool.
+    try:
+        yield
+    finally:
+        await client.close()
+
+
+class AsyncLLMPool:
+    """
+    Shares one AsyncOpenAI client per event loop and caps how many
+    completions run at once across the whole process, whatever loop they
+    run on. Callers beyond ``max_concurrency`` wait for a slot; once
+    ``max_queue`` callers are already waiting, new ones get LLMSaturated
+    straight away so the view can answer with the fallback.
+    """
+
+    def __init__(self, max_concurrency, max_queue, timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = _Slots(max_concurrency)
+        # httpx pools are bound to the loop that created them, so keep one
+        # client per loop (one per request under WSGI, where async views
+        # run through async_to_sync), closed when that loop shuts down.
+        self._loops = weakref.WeakKeyDictionary()
+
+    @property
+    def in_flight(self):
+        return self._slots.size - self._slots.free
+
+    @property
+    def waiting(self):
+        return self._slots.waiting
+
+    async def _client(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            client = AsyncOpenAI(
+                http_client=_http_client(DefaultAsyncHttpxClient, self.max_concurrency),
+                **_client_kwargs(),
+            )
+            closer = _close_with_loop(client)
+            await closer.__anext__()
+            # The loop only tracks the generator weakly; keep it alive.
+            state = self._loops[loop] = (client, closer)
+        return state[0]
+
+    async def complete(self, messages):
+        client = await self._client()
+        await self._slots.acquire(self.max_queue)
+        try:
+            with metrics.llm_call("async"):
+                completion = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=settings.OPENAI_MODEL,
+                        messages=messages,
+                        temperature=0.3,
+                    ),
+                    timeout=self.timeout,
+                )
+        finally:
+            self._slots.release()
+
+        metrics.llm_usage(completion)
+        return completion.choices[0].message.content
+
+    async def stream(self, messages):
+        """
+        Yield reply text as the model produces it. The slot is held until
+        the stream finishes; ``timeout`` bounds the wait for each chunk.
+        """
+        client = await self._client()
+        await self._slots.acquire(self.max_queue)
+        chunks = None
+        try:
+            with metrics.llm_call("stream"):
+                chunks = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=settings.OPENAI_MODEL,
+                        messages=messages,
+                        temperature=0.3,
+                        stream=True,
+                    ),
+                    timeout=self.timeout,
+                )
+                iterator = chunks.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        finally:
+            if chunks is not None:
+                await chunks.close()
+            self._slots.release()
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = AsyncLLMPool(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_queue=settings.LLM_MAX_QUEUE,
+            timeout=settings.LLM_TIMEOUT,
+        )
+    return _pool
+
+
+async def acomplete(messages):
+    return await get_pool().complete(messages)
+
+
+def astream(messages):
+    return get_pool().stream(messages)
+
+
+def reset():
+    """
+    Drop the shared clients so the next call picks up new settings, or
+    builds its own after a fork (the parent's sockets are not closed).
+    """
+    global _client, _http, _pool
+    with _client_lock:
+        _client = _http = None
+    _pool = None
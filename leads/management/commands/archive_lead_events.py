@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leads import events
+
+
+class Command(BaseCommand):
+    help = "Move lead events older than --keep-months whole months into gzip segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months", type=int, default=settings.LEAD_EVENT_KEEP_MONTHS,
+                            help="months kept in the table, counting the current one")
+        parser.add_argument("--directory", default=settings.LEAD_EVENT_ARCHIVE_DIR)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="list the segments that would be written")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        months = today.year * 12 + today.month - 1 - (options["keep_months"] - 1)
+        before = today.replace(year=months // 12, month=months % 12 + 1, day=1)
+
+        archived = events.archive(before, directory=options["directory"], dry_run=options["dry_run"])
+        for path, count in archived:
+            self.stdout.write(f"  {path}: {count} events")
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {sum(count for _, count in archived)} events from before {before:%Y-%m} "
+            f"in {len(archived)} segments."
+        ))
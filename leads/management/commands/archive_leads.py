@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leads import archive
+
+
+class Command(BaseCommand):
+    help = "Move old lost and cold leads from the Lead table into LeadArchive, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.LEAD_ARCHIVE_AFTER_DAYS,
+                            help="archive leads created more than this many days ago")
+        parser.add_argument("--batch-size", type=int, default=settings.LEAD_ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=settings.LEAD_ARCHIVE_PAUSE,
+                            help="seconds to wait between batches")
+        parser.add_argument("--limit", type=int, help="stop after this many leads")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="count the leads that would be archived")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = archive.candidates(timezone.now() - timedelta(days=options["days"])).count()
+            self.stdout.write(f"{count} leads would be archived.")
+            return
+
+        started = time.perf_counter()
+
+        def progress(total):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {total} archived")
+
+        total = archive.archive_leads(
+            days=options["days"], batch_size=options["batch_size"], limit=options["limit"],
+            pause=options["pause"], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total} leads in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,120 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from leads.bench import bench_database
+from leads.bench import scenarios as bench_scenarios
+from leads.bench.synthetic import insert_leads, load_distribution
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _changes(results, baseline):
+    """Percent change of p50 latency and throughput against an earlier run."""
+    changes = {}
+    for name, result in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: round((result[key] - before[key]) / before[key] * 100, 1)
+            for key in ("p50_ms", "rps", "queries_mean")
+            if before.get(key)
+        }
+    return changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the request scenarios against a scratch database of synthetic "
+        "leads and print throughput, latency percentiles and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=sorted(bench_scenarios.SCENARIOS),
+                            help="run only this scenario (repeatable); default all")
+        parser.add_argument("--leads", type=int, default=20000)
+        parser.add_argument("--requests", type=int, default=200, help="per scenario")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--distribution", default=None,
+                            help="JSON file overriding leads.bench.synthetic.DEFAULT_DISTRIBUTION")
+        parser.add_argument("--llm-delay", type=float, default=0.0,
+                            help="latency of the stub OpenAI server in seconds")
+        parser.add_argument("--baseline", default=None,
+                            help="JSON output of an earlier run to compare against")
+        parser.add_argument("--output", "-o", default="-", help="file path, or - for stdout")
+
+    def handle(self, *args, **options):
+        from django.contrib.auth.models import User
+        from django.test import Client
+        from leads import ai_cache, llm
+        from leads.bench.fake_openai import FakeOpenAIServer
+
+        try:
+            distribution = load_distribution(options["distribution"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Bad distribution: {e}")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        names = options["scenario"] or list(bench_scenarios.SCENARIOS)
+        results = {}
+        with bench_database(), FakeOpenAIServer(delay=options["llm_delay"]) as server:
+            settings.OPENAI_BASE_URL = server.base_url
+            settings.OPENAI_API_KEY = "sk-bench"
+            llm.reset()
+            ai_cache.reset()
+
+            started = time.perf_counter()
+            insert_leads(options["leads"], seed=options["seed"], distribution=distribution)
+            seeded = time.perf_counter() - started
+            if options["verbosity"] > 1:
+                self.stderr.write(f"Inserted {options['leads']} leads in {seeded:.1f}s")
+
+            client = Client()
+            client.force_login(User.objects.create_superuser("bench"))
+            for name in names:
+                results[name] = bench_scenarios.run(name, client, options["requests"], options["warmup"])
+                if options["verbosity"] > 1:
+                    self.stderr.write(f"  {name}: {results[name]['rps']} req/s")
+            llm_calls = server.calls
+
+        output = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+            "leads": options["leads"],
+            "seed": options["seed"],
+            "distribution": options["distribution"] or "default",
+            "requests": options["requests"],
+            "llm_delay_s": options["llm_delay"],
+            "llm_calls": llm_calls,
+            "scenarios": results,
+        }
+        if baseline:
+            output["baseline_commit"] = baseline.get("commit")
+            output["change_percent"] = _changes(results, baseline)
+
+        text = json.dumps(output, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(text)
+        else:
+            with open(options["output"], "w") as f:
+                f.write(text + "\n")
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from leads import dedup
+
+
+class Command(BaseCommand):
+    help = "Find leads that are the same student and merge each group into its oldest lead."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="report the duplicate groups without merging them")
+        parser.add_argument("--fuzzy-names", action="store_true", default=settings.DEDUP_FUZZY_NAMES,
+                            help="also match similar names created within DEDUP_FUZZY_WINDOW_HOURS")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        groups = dedup.duplicate_groups(fuzzy=options["fuzzy_names"])
+        duplicates = sum(len(ids) - 1 for ids in groups)
+        self.stdout.write(
+            f"Found {len(groups)} duplicate groups ({duplicates} extra leads) "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+        if options["dry_run"]:
+            if options["verbosity"] > 1:
+                for ids in groups:
+                    self.stdout.write("  " + ", ".join(map(str, ids)))
+            return
+
+        for ids in groups:
+            dedup.merge_group(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {duplicates} leads into {len(groups)} in {time.perf_counter() - started:.1f}s."
+        ))
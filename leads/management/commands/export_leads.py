@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from leads import archive, exporting
+from leads.filters import filter_leads
+
+
+class Command(BaseCommand):
+    help = "Stream leads to a file (or stdout) as CSV, NDJSON or columnar gzip."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(exporting.FORMATS), default="csv")
+        parser.add_argument("--output", "-o", default="-", help="file path, or - for stdout")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument("--q", default="")
+        parser.add_argument("--status", default="")
+        parser.add_argument("--from", dest="from", default="", help="YYYY-MM-DD")
+        parser.add_argument("--to", default="", help="YYYY-MM-DD")
+        parser.add_argument("--assigned-to", dest="assigned_to", default="",
+                            help="counsellor user id, or 'none'")
+        parser.add_argument("--archived", action="store_true",
+                            help="also export the matching archived leads")
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        leads = filter_leads(options)
+        chunks = exporting.stream_export(
+            leads, fmt, options["chunk_size"],
+            archived=archive.archived(options) if options["archived"] else None,
+        )
+
+        binary = fmt == "columnar"
+        if options["output"] == "-":
+            out = sys.stdout.buffer if binary else sys.stdout
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+
+        mode = "wb" if binary else "w"
+        with open(options["output"], mode, **({} if binary else {"newline": "", "encoding": "utf-8"})) as out:
+            for chunk in chunks:
+                out.write(chunk)
+
+        self.stderr.write(self.style.SUCCESS(f"Exported leads to {options['output']}"))
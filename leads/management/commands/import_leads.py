@@ -0,0 +1,44 @@
+import io
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leads import importing
+
+
+class Command(BaseCommand):
+    help = "Bulk import leads from a CSV or NDJSON file (or - for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(importing.READERS),
+                            help="defaults to the file extension, else csv")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="valid rows per transaction")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="validate and dedupe without writing")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or importing.guess_format(path)
+
+        if path == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+        else:
+            try:
+                stream = open(path, encoding="utf-8-sig", newline="")
+            except OSError as e:
+                raise CommandError(e)
+
+        with stream:
+            report = importing.import_stream(
+                stream, fmt, options["batch_size"], options["dry_run"]
+            )
+
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        self.stderr.write(self.style.SUCCESS(
+            f"{report.created} created, {report.duplicates} duplicates, "
+            f"{report.invalid} invalid in {report.seconds:.1f}s "
+            f"({report.rows_per_second} rows/s)"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leads import assignment
+
+
+class Command(BaseCommand):
+    help = "Recount every counsellor's open_leads from the Lead table."
+
+    def handle(self, *args, **options):
+        counsellors = assignment.rebuild_load()
+        self.stdout.write(self.style.SUCCESS(f"Recounted open leads; {counsellors} counsellors have open leads."))
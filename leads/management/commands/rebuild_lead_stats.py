@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from leads import rollups, stats
+
+
+class Command(BaseCommand):
+    help = "Recount the LeadStat dashboard buckets and LeadRollup rows from the Lead table."
+
+    def handle(self, *args, **options):
+        buckets = stats.rebuild()
+        rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} lead stat buckets and {rows} rollup rows."))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leads import scoring
+
+
+class Command(BaseCommand):
+    help = "Recompute lead score, country and quality with the active scoring rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="rows per UPDATE statement")
+        parser.add_argument("--all", action="store_true",
+                            help="rescore rows already on the active version too")
+
+    def handle(self, *args, **options):
+        rules = scoring.active_rules()
+        started = time.perf_counter()
+
+        def progress(updated, scanned, total):
+            self.stderr.write(f"  {min(scanned, total)}/{total} ids scanned, {updated} rescored")
+
+        updated = scoring.rescore(
+            rules,
+            chunk_size=options["chunk_size"],
+            everything=options["all"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {updated} leads to rules v{rules.version} "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
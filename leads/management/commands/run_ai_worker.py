@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from leads.jobs import Worker
+from leads.models import AIWorkerStat
+
+
+def _work(poll_interval, burst):
+    # Each forked process needs its own database connection.
+    connections.close_all()
+    worker = Worker(poll_interval=poll_interval)
+
+    def stop(signum, frame):
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(burst=burst)
+
+
+class Command(BaseCommand):
+    help = "Process queued AI chat analyses (see AIJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1,
+                            help="number of worker processes to run")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="seconds to sleep when the queue is empty")
+        parser.add_argument("--burst", action="store_true",
+                            help="exit once the queue is drained")
+        parser.add_argument("--stats", action="store_true",
+                            help="print per-worker throughput and exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            return self.print_stats()
+
+        if options["processes"] == 1:
+            _work(options["poll"], options["burst"])
+            return
+
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_work, args=(options["poll"], options["burst"]))
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+    def print_stats(self):
+        for stat in AIWorkerStat.objects.order_by("-last_seen"):
+            self.stdout.write(
+                f"{stat.worker:<32} done={stat.jobs_done:<6} failed={stat.jobs_failed:<4} "
+                f"busy={stat.busy_seconds:8.1f}s  {stat.throughput():.2f} jobs/s"
+            )
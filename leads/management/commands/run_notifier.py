@@ -0,0 +1,38 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leads.models import Notification
+from leads.notify import Dispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver queued WhatsApp notifications (see Notification)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="seconds to sleep when the queue is empty")
+        parser.add_argument("--burst", action="store_true",
+                            help="exit once the queue is drained")
+        parser.add_argument("--retry-dead", action="store_true",
+                            help="requeue dead notifications and exit")
+
+    def handle(self, *args, **options):
+        if options["retry_dead"]:
+            count = Notification.objects.filter(status="dead").update(
+                status="pending", attempts=0, run_after=timezone.now()
+            )
+            self.stdout.write(self.style.SUCCESS(f"Requeued {count} notifications."))
+            return
+
+        dispatcher = Dispatcher(poll_interval=options["poll"])
+
+        def stop(signum, frame):
+            dispatcher.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        dispatcher.run(burst=options["burst"])
+
+        self.stdout.write(f"{dispatcher.sent} sent, {dispatcher.failed} failed deliveries.")
@@ -0,0 +1,164 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters and histograms live in this module, one set per process, and are
+updated by MetricsMiddleware (per view wall time and DB queries), by
+``leads.llm`` (OpenAI latency and token usage) and by ``leads.notify``
+(Twilio latency). ``/metrics`` renders them. Under several gunicorn
+workers each worker reports its own numbers, so scrape them per worker or
+sum them in Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for labels, value in sorted(values.items()):
+            yield self.name, list(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = {labels: list(row) for labels, row in self.values.items()}
+        for labels, row in sorted(values.items()):
+            pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", pairs + [("le", str(bound))], cumulative
+            yield f"{self.name}_count", pairs, cumulative
+            yield f"{self.name}_sum", pairs, row[-1]
+
+
+REGISTRY = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+HTTP_REQUESTS = _register(Counter(
+    "crm_http_requests_total", "HTTP requests by view, method and status.", ("view", "method", "status"),
+))
+HTTP_SECONDS = _register(Histogram(
+    "crm_http_request_duration_seconds", "Wall time until the view returned a response.", ("view",),
+))
+DB_QUERIES = _register(Counter(
+    "crm_db_queries_total", "Database queries run while serving a view.", ("view",),
+))
+DB_SECONDS = _register(Counter(
+    "crm_db_query_seconds_total", "Time spent in database queries per view.", ("view",),
+))
+LLM_SECONDS = _register(Histogram(
+    "crm_llm_request_duration_seconds", "OpenAI chat completion latency.", ("mode", "outcome"),
+))
+LLM_TOKENS = _register(Counter(
+    "crm_llm_tokens_total", "OpenAI tokens used, from the usage block.", ("kind",),
+))
+CHAT_LEADS = _register(Counter(
+    "crm_chat_leads_total", "Chat submissions that created a lead or merged into an existing one.", ("outcome",),
+))
+TWILIO_SECONDS = _register(Histogram(
+    "crm_twilio_request_duration_seconds", "Twilio Messages API latency.", ("outcome",),
+))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, pairs, value in metric.samples():
+            lines.append(f"{name}{_format_labels(pairs)} {value:.6g}" if isinstance(value, float)
+                         else f"{name}{_format_labels(pairs)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    for metric in REGISTRY:
+        with metric.lock:
+            metric.values.clear()
+
+
+# =====================================
+# HOOKS
+# =====================================
+
+@contextmanager
+def llm_call(mode):
+    """Time one OpenAI call; ``mode`` is sync, async or stream."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        LLM_SECONDS.observe((mode, outcome), time.perf_counter() - started)
+
+
+def llm_usage(completion):
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(("prompt",), usage.prompt_tokens or 0)
+    LLM_TOKENS.inc(("completion",), usage.completion_tokens or 0)
+
+
+def twilio_call(outcome, seconds):
+    TWILIO_SECONDS.observe((outcome,), seconds)
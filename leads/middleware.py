@@ -0,0 +1,122 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+request_log = logging.getLogger("leads.requests")
+slow_log = logging.getLogger("leads.slow")
+
+
+class QueryRecorder:
+    """
+    ``execute_wrapper`` hook counting queries and their time; installed on
+    every database alias, and kept queries are labelled with theirs.
+    """
+
+    def __init__(self, keep):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep = keep
+        self.queries = []
+
+    def install(self):
+        """Context manager wrapping every configured connection."""
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self))
+        return stack
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < self.keep:
+                self.queries.append((context["connection"].alias, sql, elapsed))
+
+
+class MetricsMiddleware:
+    """
+    Per request: wall time, status and (for sync requests) DB query count
+    and time, recorded in ``leads.metrics`` and logged as one JSON line on
+    ``leads.requests``. Requests slower than SLOW_REQUEST_SECONDS are
+    sampled at SLOW_REQUEST_SAMPLE_RATE onto ``leads.slow`` with their
+    queries. Streaming responses are timed to the first byte.
+
+    Under ASGI, ORM calls run on executor threads with their own
+    connections, so async requests report time but not queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        recorder = QueryRecorder(settings.SLOW_REQUEST_MAX_QUERIES)
+        started = time.perf_counter()
+        with recorder.install():
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, None)
+        return response
+
+    def record(self, request, response, elapsed, recorder):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+
+        metrics.HTTP_REQUESTS.inc((view, request.method, response.status_code))
+        metrics.HTTP_SECONDS.observe((view,), elapsed)
+        if recorder is not None:
+            metrics.DB_QUERIES.inc((view,), recorder.count)
+            metrics.DB_SECONDS.inc((view,), recorder.seconds)
+
+        fields = None
+        if request_log.isEnabledFor(logging.INFO):
+            fields = self.fields(request, response, view, elapsed, recorder)
+            request_log.info("request", extra=fields)
+
+        if elapsed >= settings.SLOW_REQUEST_SECONDS and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE:
+            fields = fields or self.fields(request, response, view, elapsed, recorder)
+            if recorder is not None:
+                fields["queries"] = [
+                    {"db": alias, "sql": sql[:1000], "ms": round(seconds * 1000, 3)}
+                    for alias, sql, seconds in recorder.queries
+                ]
+            slow_log.warning("slow request", extra=fields)
+
+    @staticmethod
+    def fields(request, response, view, elapsed, recorder):
+        fields = {
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+        }
+        if recorder is not None:
+            fields["db_queries"] = recorder.count
+            fields["db_ms"] = round(recorder.seconds * 1000, 2)
+        return fields
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0008_aijob_aiworkerstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIReplyCache',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('reply', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:01
+
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+
+
+def populate_stats(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+    LeadStat = apps.get_model("leads", "LeadStat")
+
+    rows = (
+        Lead.objects
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "lead_quality", "crm_status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    LeadStat.objects.bulk_create([LeadStat(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0009_aireplycache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('lead_quality', models.CharField(blank=True, max_length=20)),
+                ('crm_status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'lead_quality', 'crm_status'), name='leadstat_bucket')],
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+
+
+QUALITY = {"hot": 1, "warm": 2, "cold": 3}
+COUNTRY = {"singapore": 1, "dubai": 2, "uk": 3, "australia": 4}
+
+QUALITY_LABELS = {1: "Hot 🔥", 2: "Warm 🟡", 3: "Cold 🔵"}
+COUNTRY_LABELS = {1: "Singapore 🇸🇬", 2: "Dubai 🇦🇪", 3: "UK 🇬🇧", 4: "Australia 🇦🇺"}
+
+
+def _code(text, codes, default):
+    words = (text or "").lower().split()
+    return codes.get(words[0], default) if words else default
+
+
+def labels_to_codes(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+
+    for old_quality, old_country in (
+        Lead.objects.values_list("lead_quality", "recommended_country").distinct()
+    ):
+        Lead.objects.filter(lead_quality=old_quality, recommended_country=old_country).update(
+            quality_code=_code(old_quality, QUALITY, 3),
+            country_code=_code(old_country, COUNTRY, 1),
+        )
+
+
+def codes_to_labels(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+
+    for code, label in QUALITY_LABELS.items():
+        Lead.objects.filter(quality_code=code).update(lead_quality=label)
+    for code, label in COUNTRY_LABELS.items():
+        Lead.objects.filter(country_code=code).update(recommended_country=label)
+
+
+def clear_stats(apps, schema_editor):
+    apps.get_model("leads", "LeadStat").objects.all().delete()
+
+
+def rebuild_stats(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+    LeadStat = apps.get_model("leads", "LeadStat")
+
+    rows = (
+        Lead.objects
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "lead_quality", "crm_status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    LeadStat.objects.all().delete()
+    LeadStat.objects.bulk_create([LeadStat(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0010_leadstat"),
+    ]
+
+    operations = [
+        # LeadStat is derived data: empty it, change the column, refill at the end.
+        migrations.RunPython(clear_stats, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="leadstat",
+            name="lead_quality",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Hot 🔥"), (2, "Warm 🟡"), (3, "Cold 🔵")]
+            ),
+        ),
+
+        migrations.AddField(
+            model_name="lead",
+            name="quality_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="lead",
+            name="country_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(labels_to_codes, codes_to_labels),
+        migrations.RemoveField(model_name="lead", name="lead_quality"),
+        migrations.RemoveField(model_name="lead", name="recommended_country"),
+        migrations.RenameField(model_name="lead", old_name="quality_code", new_name="lead_quality"),
+        migrations.RenameField(model_name="lead", old_name="country_code", new_name="recommended_country"),
+        migrations.AlterField(
+            model_name="lead",
+            name="lead_quality",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Hot 🔥"), (2, "Warm 🟡"), (3, "Cold 🔵")], default=3
+            ),
+        ),
+        migrations.AlterField(
+            model_name="lead",
+            name="recommended_country",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Singapore 🇸🇬"), (2, "Dubai 🇦🇪"), (3, "UK 🇬🇧"), (4, "Australia 🇦🇺")],
+                default=1,
+            ),
+        ),
+
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(fields=["crm_status", "created_at"], name="lead_status_created"),
+        ),
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(fields=["lead_quality", "created_at"], name="lead_quality_created"),
+        ),
+        migrations.RunPython(rebuild_stats, clear_stats),
+    ]
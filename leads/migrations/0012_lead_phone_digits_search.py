@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:04
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_phone_digits(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+
+    for lead_id, phone in Lead.objects.values_list("id", "phone").iterator():
+        Lead.objects.filter(id=lead_id).update(phone_digits=re.sub(r"\D", "", phone or ""))
+
+
+def install_search(apps, schema_editor):
+    from leads import search
+    search.install(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    from leads import search
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0011_lead_quality_country_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15),
+        ),
+        migrations.RunPython(fill_phone_digits, migrations.RunPython.noop),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
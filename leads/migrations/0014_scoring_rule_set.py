@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0013_lead_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringRuleSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(editable=False, unique=True)),
+                ('rules', models.JSONField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='score_version',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0015_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounsellorProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('capacity', models.PositiveIntegerField(default=50)),
+                ('open_leads', models.IntegerField(default=0)),
+                ('countries', models.JSONField(blank=True, default=list)),
+                ('qualities', models.JSONField(blank=True, default=list)),
+                ('whatsapp', models.CharField(blank=True, max_length=40)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counsellor_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+# Frozen copy of leads.rollups.DIMENSIONS.
+DIMENSIONS = {
+    "all": None,
+    "lead_quality": "lead_quality",
+    "recommended_country": "recommended_country",
+    "intake": "intake",
+    "assigned_to": "assigned_to_id",
+}
+
+
+def populate_rollups(apps, schema_editor):
+    Lead = apps.get_model("leads", "Lead")
+    LeadRollup = apps.get_model("leads", "LeadRollup")
+
+    for dimension, field in DIMENSIONS.items():
+        rows = (
+            Lead.objects
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "crm_status", *([field] if field else []))
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        LeadRollup.objects.bulk_create(
+            [
+                LeadRollup(
+                    dimension=dimension,
+                    day=row["day"],
+                    value=str(row[field] if row[field] is not None else "") if field else "",
+                    crm_status=row["crm_status"],
+                    count=row["count"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0016_counsellor_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('value', models.CharField(blank=True, max_length=50)),
+                ('crm_status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'day', 'value', 'crm_status'), name='leadrollup_key')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
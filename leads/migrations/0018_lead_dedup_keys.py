@@ -0,0 +1,46 @@
+# Generated by Django 5.2.11 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+def fill_dedup_keys(apps, schema_editor):
+    # The live helpers, so existing rows get exactly the keys save() writes.
+    from leads.models import name_key, normalize_email
+
+    Lead = apps.get_model("leads", "Lead")
+
+    batch = []
+    for lead in Lead.objects.only("id", "name", "email").iterator(chunk_size=2000):
+        lead.email_key = normalize_email(lead.email)
+        lead.name_key = name_key(lead.name)
+        batch.append(lead)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ["email_key", "name_key"])
+            batch = []
+    Lead.objects.bulk_update(batch, ["email_key", "name_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0017_leadrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='ai_reply_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_dedup_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.11 on 2026-10-18 13:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def log_existing_leads(apps, schema_editor):
+    # Their earlier transitions are unknown: each existing lead gets one
+    # creation event with its current status, which the funnel timing
+    # skips unless that status is "new".
+    Lead = apps.get_model("leads", "Lead")
+    LeadEvent = apps.get_model("leads", "LeadEvent")
+
+    rows = Lead.objects.values_list("id", "created_at", "crm_status", "assigned_to_id").iterator(chunk_size=2000)
+    batch = []
+    for lead_id, created_at, crm_status, assigned_to_id in rows:
+        batch.append(LeadEvent(lead_id=lead_id, at=created_at, crm_status=crm_status, assigned_to_id=assigned_to_id))
+        if len(batch) >= 2000:
+            LeadEvent.objects.bulk_create(batch)
+            batch = []
+    LeadEvent.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0018_lead_dedup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_id', models.BigIntegerField()),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('crm_status', models.CharField(max_length=20)),
+                ('assigned_to_id', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['at'], name='leadevent_at'), models.Index(fields=['lead_id'], name='leadevent_lead')],
+            },
+        ),
+        migrations.RunPython(log_existing_leads, migrations.RunPython.noop),
+    ]
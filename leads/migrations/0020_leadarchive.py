@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 13:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0019_leadevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('crm_status', models.CharField(max_length=20)),
+                ('lead_quality', models.PositiveSmallIntegerField(choices=[(1, 'Hot 🔥'), (2, 'Warm 🟡'), (3, 'Cold 🔵')])),
+                ('recommended_country', models.PositiveSmallIntegerField(choices=[(1, 'Singapore 🇸🇬'), (2, 'Dubai 🇦🇪'), (3, 'UK 🇬🇧'), (4, 'Australia 🇦🇺')])),
+                ('intake', models.CharField(blank=True, max_length=20)),
+                ('assigned_to_id', models.IntegerField(blank=True, null=True)),
+                ('data', models.JSONField()),
+            ],
+        ),
+    ]
@@ -1,5 +1,122 @@
-from django.db import models
+import re
+import unicodedata
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import TruncDate
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def normalize_phone(phone):
+    """Digits only, so "+91 98765-43210" and "919876543210" compare equal."""
+    return re.sub(r"\D", "", phone or "")
+
+
+def normalize_email(email):
+    """
+    Lowercased, without a +tag, and without dots in the local part for
+    Gmail, so "Asha.R+uk@GMail.com" and "ashar@gmail.com" compare equal.
+    """
+    email = (email or "").strip().lower()
+    local, at, domain = email.rpartition("@")
+    if not at:
+        return email
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
+
+
+def name_tokens(name):
+    """Casefolded ASCII words of a name, sorted: "Ásha  RAO" -> ["asha", "rao"]."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().casefold()
+    return sorted(re.findall(r"[a-z]+", text))
+
+
+def name_key(name):
+    """
+    Blocking key for fuzzy name matching: each word reduced to its first
+    letter plus its consonants, with repeats collapsed, so spellings such
+    as "Aasha Rao" and "Asha Rao" land in the same block. Only names in
+    the same block are compared.
+    """
+    words = []
+    for token in name_tokens(name):
+        skeleton = token[0] + re.sub(r"[aeiouy]", "", token[1:])
+        words.append(re.sub(r"(.)\1+", r"\1", skeleton))
+    return " ".join(words)[:40]
+
+
+# Lead fields the LeadRollup rows depend on.
+ROLLUP_FIELDS = frozenset(
+    ["created_at", "crm_status", "lead_quality", "recommended_country", "intake", "assigned_to_id"]
+)
+
+
+# Lead fields the score, recommended country and quality are computed from.
+SCORE_INPUTS = frozenset(["ielts_score", "budget", "qualification", "backlogs"])
+
+# Marks an argument that was not passed, where None is a real value.
+UNCHANGED = object()
+
+
+class LeadQuerySet(models.QuerySet):
+
+    def bulk_set(self, crm_status=None, assigned_to_id=UNCHANGED):
+        """
+        Set ``crm_status`` and/or ``assigned_to_id`` (None unassigns) on every
+        lead in the queryset with one UPDATE, moving the LeadStat buckets,
+        LeadRollup rows and counsellor open_leads counters by what changed.
+        A fixed number of queries however many leads match: the counters
+        are adjusted from one grouped read of the rows being changed.
+        Capacity is not checked. Returns the number of leads updated.
+        """
+        from . import assignment, events, rollups, stats
+
+        changes = {}
+        if crm_status is not None:
+            changes["crm_status"] = crm_status
+        if assigned_to_id is not UNCHANGED:
+            changes["assigned_to_id"] = assigned_to_id
+        if not changes:
+            return 0
+
+        with transaction.atomic(using=self.db):
+            ids = list(self.select_for_update().order_by().values_list("id", flat=True))
+            if not ids:
+                return 0
+            leads = Lead.objects.filter(id__in=ids)
+            groups = (
+                leads
+                .annotate(day=TruncDate("created_at"))
+                .values_list("day", "crm_status", "lead_quality", "recommended_country", "intake", "assigned_to_id")
+                .annotate(n=models.Count("id"))
+                .order_by()
+            )
+
+            stat_deltas, rollup_deltas, load_deltas = Counter(), Counter(), Counter()
+            for day, status, quality, country, intake, owner, n in groups:
+                new_status = changes.get("crm_status", status)
+                new_owner = changes.get("assigned_to_id", owner)
+                month = day.replace(day=1)
+                stat_deltas[(month, quality, status)] -= n
+                stat_deltas[(month, quality, new_status)] += n
+                for key, delta in rollups.move(
+                    rollups.day_row(day, status, quality, country, intake, owner),
+                    rollups.day_row(day, new_status, quality, country, intake, new_owner),
+                ).items():
+                    rollup_deltas[key] += delta * n
+                load_deltas[Lead(crm_status=status, assigned_to_id=owner).load_owner()] -= n
+                load_deltas[Lead(crm_status=new_status, assigned_to_id=new_owner).load_owner()] += n
+
+            events.record_changes(leads, changes)
+            updated = leads.update(**changes)
+            stats.apply_deltas(stat_deltas)
+            rollups.apply(rollup_deltas)
+            assignment.apply_load(load_deltas)
+        return updated
 
 
 class Lead(models.Model):
@@ -9,6 +126,17 @@ class Lead(models.Model):
         ('Graduation', 'Graduation'),
     ]
 
+    class Quality(models.IntegerChoices):
+        HOT = 1, 'Hot 🔥'
+        WARM = 2, 'Warm 🟡'
+        COLD = 3, 'Cold 🔵'
+
+    class Country(models.IntegerChoices):
+        SINGAPORE = 1, 'Singapore 🇸🇬'
+        DUBAI = 2, 'Dubai 🇦🇪'
+        UK = 3, 'UK 🇬🇧'
+        AUSTRALIA = 4, 'Australia 🇦🇺'
+
     CRM_STATUS_CHOICES = [
         ('new', 'New'),
         ('contacted', 'Contacted'),
@@ -16,11 +144,19 @@ class Lead(models.Model):
         ('converted', 'Converted'),
         ('lost', 'Lost'),
     ]
+    # Leads in these statuses no longer count towards a counsellor's load.
+    CLOSED_STATUSES = ('converted', 'lost')
 
     # Basic Info
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
+    # Kept in sync by save(); used for phone prefix lookups in search.
+    phone_digits = models.CharField(max_length=15, blank=True, db_index=True, editable=False)
+    # Also kept in sync by save(); the duplicate checks in leads.dedup
+    # match on these and phone_digits.
+    email_key = models.CharField(max_length=254, blank=True, db_index=True, editable=False)
+    name_key = models.CharField(max_length=40, blank=True, db_index=True, editable=False)
 
     country_interest = models.CharField(max_length=50, blank=True)
     course_interest = models.CharField(max_length=100, blank=True)
@@ -46,8 +182,21 @@ class Lead(models.Model):
 
     # Intelligent Fields
     lead_score = models.IntegerField(default=0)
-    recommended_country = models.CharField(max_length=50, blank=True)
-    lead_quality = models.CharField(max_length=20, blank=True)
+    # Stored as small ints so filters and counts can use an index; the
+    # emoji labels come from get_*_display() at render time.
+    recommended_country = models.PositiveSmallIntegerField(
+        choices=Country.choices,
+        default=Country.SINGAPORE
+    )
+    lead_quality = models.PositiveSmallIntegerField(
+        choices=Quality.choices,
+        default=Quality.COLD
+    )
+    # ScoringRuleSet version the three fields above were computed with;
+    # 0 is the built-in rules.
+    score_version = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    # ai_cache fingerprint of the summary behind the last chat reply.
+    ai_reply_key = models.CharField(max_length=64, blank=True, editable=False)
 
     # CRM Field
     crm_status = models.CharField(
@@ -58,80 +207,377 @@ class Lead(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = LeadQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['crm_status', 'created_at'], name='lead_status_created'),
+            models.Index(fields=['lead_quality', 'created_at'], name='lead_quality_created'),
+            models.Index(fields=['created_at', 'id'], name='lead_created_id'),
+        ]
+
     # ---------------------------
     # SCORE CALCULATION
     # ---------------------------
+    # Thresholds live in leads.scoring (DEFAULT_RULES or the active
+    # ScoringRuleSet), compiled into lookup tables.
     def calculate_score(self):
-        score = 0
-
-        # IELTS
-        if self.ielts_score:
-            if self.ielts_score >= 7:
-                score += 30
-            elif self.ielts_score >= 6:
-                score += 20
-            elif self.ielts_score >= 5.5:
-                score += 10
-            else:
-                score += 5
-
-        # Budget
-        if self.budget:
-            if self.budget >= 30:
-                score += 30
-            elif self.budget >= 25:
-                score += 25
-            elif self.budget >= 20:
-                score += 15
-            elif self.budget >= 15:
-                score += 10
-            else:
-                score += 5
-
-        # Qualification
-        score += 20 if self.qualification == "Graduation" else 10
-
-        # Backlogs
-        score += 20 if not self.backlogs else -10
-
-        return score
+        from .scoring import active_rules
+        return active_rules().score(self.ielts_score, self.budget, self.qualification, self.backlogs)
 
     # ---------------------------
     # COUNTRY RECOMMENDATION
     # ---------------------------
     def get_country_recommendation(self):
-
-        if not self.budget:
-            return "Singapore 🇸🇬"
-
-        if self.budget >= 30:
-            return "Australia 🇦🇺"
-        elif self.budget >= 25:
-            return "UK 🇬🇧"
-        elif self.budget >= 15:
-            return "Dubai 🇦🇪"
-        else:
-            return "Singapore 🇸🇬"
+        from .scoring import active_rules
+        return active_rules().country(self.budget)
 
     # ---------------------------
     # LEAD QUALITY (Hot/Warm/Cold)
     # ---------------------------
     def get_lead_quality(self):
-        if self.lead_score >= 85:
-            return "Hot 🔥"
-        elif self.lead_score >= 65:
-            return "Warm 🟡"
-        else:
-            return "Cold 🔵"
+        from .scoring import active_rules
+        return active_rules().quality(self.lead_score)
 
     # ---------------------------
     # AUTO SAVE
     # ---------------------------
     def save(self, *args, **kwargs):
-        self.lead_score = self.calculate_score()
-        self.recommended_country = self.get_country_recommendation()
-        self.lead_quality = self.get_lead_quality()
+        # With update_fields, only the derived fields of the inputs being
+        # saved are recomputed (and saved with them): a status change does
+        # not rescore the lead.
+        fields = kwargs.get("update_fields")
+        fields = None if fields is None else set(fields)
+
+        def saving(*names):
+            if fields is None:
+                return True
+            return any(name in fields for name in names)
+
+        if saving("phone"):
+            self.phone_digits = normalize_phone(self.phone)
+        if saving("email"):
+            self.email_key = normalize_email(self.email)
+        if saving("name"):
+            self.name_key = name_key(self.name)
+        if saving(*SCORE_INPUTS):
+            from .scoring import active_rules
+
+            rules = active_rules()
+            self.lead_score = rules.score(self.ielts_score, self.budget, self.qualification, self.backlogs)
+            self.recommended_country = rules.country(self.budget)
+            self.lead_quality = rules.quality(self.lead_score)
+            self.score_version = rules.version
+            if fields is not None:
+                fields |= {"lead_score", "recommended_country", "lead_quality", "score_version"}
+
+        if fields is not None:
+            for source, derived in (("phone", "phone_digits"), ("email", "email_key"), ("name", "name_key")):
+                if source in fields:
+                    fields.add(derived)
+            kwargs["update_fields"] = fields
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which LeadStat bucket the row is counted in, so the
+        # post_save handler can move it if quality or status changes.
+        if {"created_at", "lead_quality", "crm_status"} <= instance.__dict__.keys():
+            from .stats import stat_key
+            instance._stat_key = stat_key(instance)
+        # Likewise for the counsellor whose open_leads counter it is in.
+        if {"assigned_to_id", "crm_status"} <= instance.__dict__.keys():
+            instance._load_owner = instance.load_owner()
+        # And the LeadRollup rows it is counted in.
+        if ROLLUP_FIELDS <= instance.__dict__.keys():
+            from .rollups import lead_row
+            instance._rollup_row = lead_row(instance)
+        return instance
+
+    def load_owner(self):
+        """Counsellor (user id) this lead counts against, or None once closed or unassigned."""
+        if self.crm_status in self.CLOSED_STATUSES:
+            return None
+        return int(self.assigned_to_id) if self.assigned_to_id else None
+
+    def __str__(self):
+        return f"{self.name} | {self.get_lead_quality_display()}"
+
+
+class ScoringRuleSet(models.Model):
+    """
+    A version of the scoring thresholds, in the format described in
+    ``leads.scoring``. The active row scores new and saved leads;
+    ``manage.py rescore_leads`` brings existing rows up to it. Versions are
+    numbered on first save and their rules shouldn't change afterwards.
+    """
+
+    version = models.PositiveIntegerField(unique=True, editable=False)
+    rules = models.JSONField()
+    is_active = models.BooleanField(default=False)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+
+    def clean(self):
+        from .scoring import InvalidRules, RuleSet
+        try:
+            RuleSet(self.rules)
+        except InvalidRules as e:
+            raise ValidationError({"rules": str(e)})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.version is None:
+                latest = ScoringRuleSet.objects.aggregate(v=models.Max("version"))["v"]
+                self.version = (latest or 0) + 1
+            if self.is_active:
+                ScoringRuleSet.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False)
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"v{self.version}{' (active)' if self.is_active else ''}"
+
+
+class LeadStat(models.Model):
+    """
+    Lead counts per month x quality x CRM status, kept current by the
+    signal handlers in ``leads.signals`` so the dashboard and analytics
+    never have to scan ``Lead``. Rebuild with ``manage.py rebuild_lead_stats``.
+    """
+
+    month = models.DateField()
+    lead_quality = models.PositiveSmallIntegerField(choices=Lead.Quality.choices)
+    crm_status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'lead_quality', 'crm_status'], name='leadstat_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%b %Y} | {self.get_lead_quality_display()} | {self.crm_status}: {self.count}"
+
+
+class LeadRollup(models.Model):
+    """
+    Lead counts per day x CRM status x one other dimension, for the
+    analytics API. Each lead is counted once per dimension in
+    ``leads.rollups.DIMENSIONS`` (``all`` has an empty value), kept
+    current like LeadStat. Rebuild with ``manage.py rebuild_lead_stats``.
+    """
+
+    dimension = models.CharField(max_length=20)
+    day = models.DateField()
+    value = models.CharField(max_length=50, blank=True)
+    crm_status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'day', 'value', 'crm_status'], name='leadrollup_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} | {self.dimension}={self.value} | {self.crm_status}: {self.count}"
+
+
+class LeadEvent(models.Model):
+    """
+    One change to a lead's CRM status or assignee, append-only, written
+    by ``leads.events``. ``lead_id`` is a plain integer, not a foreign
+    key, so history outlives the lead and reading it never joins ``Lead``.
+    The creation event has an empty ``from_status``. Old months are moved
+    to gzip segments by ``manage.py archive_lead_events``.
+    """
+
+    lead_id = models.BigIntegerField()
+    at = models.DateTimeField(default=timezone.now)
+    from_status = models.CharField(max_length=20, blank=True)
+    crm_status = models.CharField(max_length=20)
+    assigned_to_id = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['at'], name='leadevent_at'),
+            models.Index(fields=['lead_id'], name='leadevent_lead'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("LeadEvent rows are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.at:%Y-%m-%d %H:%M} | lead {self.lead_id}: {self.from_status or '-'} -> {self.crm_status}"
+
+
+class LeadArchive(models.Model):
+    """
+    A lead moved out of ``Lead`` by ``manage.py archive_leads``: old lost
+    or cold leads nobody works on any more. ``id`` is the lead's id; the
+    whole row is kept in ``data`` and the fields the counters and export
+    filters need are columns. Archived leads still count in LeadStat and
+    LeadRollup. See ``leads.archive`` for lookup and restore.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    crm_status = models.CharField(max_length=20)
+    lead_quality = models.PositiveSmallIntegerField(choices=Lead.Quality.choices)
+    recommended_country = models.PositiveSmallIntegerField(choices=Lead.Country.choices)
+    intake = models.CharField(max_length=20, blank=True)
+    assigned_to_id = models.IntegerField(null=True, blank=True)
+    data = models.JSONField()
+
+    def __str__(self):
+        return f"{self.data.get('name', '')} | {self.crm_status} (archived {self.archived_at:%Y-%m-%d})"
+
+
+class AIJob(models.Model):
+    """
+    One deferred AI analysis for a lead, picked up by ``run_ai_worker``.
+    ``key`` is unique so a re-submitted form maps back to the same job
+    (and the same lead) instead of creating a duplicate.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='ai_jobs')
+    key = models.CharField(max_length=64, unique=True)
+    user_summary = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='aijob_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"AIJob {self.key[:8]} | {self.status}"
+
+
+class CounsellorProfile(models.Model):
+    """
+    Assignment settings for a counsellor. ``open_leads`` is a counter of
+    assigned leads not yet converted or lost, maintained atomically by
+    ``leads.assignment`` and the Lead signal handlers; rebuild it with
+    ``manage.py rebuild_counsellor_load``. Empty ``countries`` or
+    ``qualities`` mean the counsellor takes any.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='counsellor_profile')
+    is_active = models.BooleanField(default=True)
+    capacity = models.PositiveIntegerField(default=50)
+    open_leads = models.IntegerField(default=0)
+    countries = models.JSONField(default=list, blank=True)
+    qualities = models.JSONField(default=list, blank=True)
+    whatsapp = models.CharField(max_length=40, blank=True)
+
+    def clean(self):
+        errors = {}
+        for field, choices in (("countries", Lead.Country), ("qualities", Lead.Quality)):
+            value = getattr(self, field)
+            if not isinstance(value, list) or any(item not in choices.values for item in value):
+                errors[field] = f"must be a list of {', '.join(map(str, choices.values))}"
+        if errors:
+            raise ValidationError(errors)
+
+    def __str__(self):
+        return f"{self.user} | {self.open_leads}/{self.capacity}"
+
+
+class Notification(models.Model):
+    """
+    A queued WhatsApp message for a counsellor, sent by ``run_notifier``.
+    Pending messages for the same number are delivered together as one
+    digest; ``dead`` messages ran out of attempts or were rejected.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    counsellor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    lead = models.ForeignKey(Lead, on_delete=models.SET_NULL, null=True, blank=True)
+    to = models.CharField(max_length=40)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    provider_sid = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='notification_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"Notification to {self.to} | {self.status}"
+
+
+class AIWorkerStat(models.Model):
+    """Running totals per ``run_ai_worker`` process, for throughput reporting."""
+
+    worker = models.CharField(max_length=64, unique=True)
+    started_at = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    jobs_done = models.PositiveIntegerField(default=0)
+    jobs_failed = models.PositiveIntegerField(default=0)
+    busy_seconds = models.FloatField(default=0)
+
+    def throughput(self):
+        """Jobs completed per second of wall time since the worker started."""
+        elapsed = (self.last_seen - self.started_at).total_seconds()
+        return self.jobs_done / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.worker} | {self.jobs_done} done"
+
+
+class AIReplyCache(models.Model):
+    """Rows for ``leads.ai_cache.DatabaseBackend``, keyed on the prompt fingerprint."""
+
+    key = models.CharField(max_length=64, primary_key=True)
+    reply = models.TextField()
+    created_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(db_index=True)
+
     def __str__(self):
-        return f"{self.name} | {self.lead_quality}"
+        return self.key
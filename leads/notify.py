@@ -0,0 +1,293 @@
+"""
+WhatsApp notifications for counsellors.
+
+Request handlers only insert a Notification row (``enqueue`` /
+``notify_hot_lead``, or ``notify_hot_leads`` for a bulk import).
+``manage.py run_notifier`` delivers them:
+
+* one requests.Session per worker, so the TLS connection to Twilio is
+  reused instead of a new Client per message (requests is imported when
+  the client is built, not by the web workers that only enqueue),
+* a token bucket caps messages per second (NOTIFY_RATE / NOTIFY_BURST),
+* everything pending for one number is claimed together and sent as a
+  single digest (up to NOTIFY_DIGEST_MAX messages); NOTIFY_DIGEST_WINDOW
+  holds new messages back a few seconds so bursts of hot leads coalesce,
+* 429/5xx/network errors are retried with backoff, and messages that run
+  out of attempts or are rejected outright are marked ``dead``.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Lead, Notification
+
+
+# Twilio rejects WhatsApp bodies longer than this.
+MAX_BODY = 1600
+
+
+# =====================================
+# TWILIO
+# =====================================
+
+class DeliveryError(Exception):
+
+    def __init__(self, message, permanent=False, retry_after=None):
+        super().__init__(message)
+        self.permanent = permanent
+        self.retry_after = retry_after
+
+
+class TwilioClient:
+    """Minimal Messages API client over one keep-alive session."""
+
+    def __init__(self, sid=None, token=None, api_base=None, timeout=None):
+        self.sid = sid or settings.TWILIO_SID
+        self.url = f"{(api_base or settings.TWILIO_API_BASE).rstrip('/')}/2010-04-01/Accounts/{self.sid}/Messages.json"
+        self.timeout = timeout or settings.NOTIFY_TIMEOUT
+        import requests
+
+        self.session = requests.Session()
+        self.session.auth = (self.sid, token or settings.TWILIO_TOKEN)
+
+    def send(self, to, body, from_=None):
+        """Send one message; returns Twilio's message sid."""
+        import requests
+
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, timeout=self.timeout, data={
+                "From": from_ or settings.TWILIO_WHATSAPP_FROM,
+                "To": to,
+                "Body": body,
+            })
+        except requests.RequestException as e:
+            metrics.twilio_call("network_error", time.perf_counter() - started)
+            raise DeliveryError(f"{type(e).__name__}: {e}")
+        metrics.twilio_call(str(response.status_code), time.perf_counter() - started)
+
+        if response.status_code in (200, 201):
+            return response.json().get("sid", "")
+
+        try:
+            detail = response.json().get("message", "")
+        except ValueError:
+            detail = response.text[:200]
+        message = f"HTTP {response.status_code}: {detail}"
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("Retry-After")
+            raise DeliveryError(message, retry_after=float(retry_after) if retry_after else None)
+        raise DeliveryError(message, permanent=True)
+
+    def close(self):
+        self.session.close()
+
+
+class TokenBucket:
+    """Blocking rate limiter: ``rate`` tokens per second, up to ``burst`` saved."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+# =====================================
+# ENQUEUE
+# =====================================
+
+def counsellor_number(counsellor):
+    """A counsellor's own WhatsApp number if set, else the shared desk number."""
+    profile = getattr(counsellor, "counsellor_profile", None) if counsellor else None
+    if profile and profile.whatsapp:
+        number = profile.whatsapp
+        return number if number.startswith("whatsapp:") else f"whatsapp:{number}"
+    return settings.COUNSELLOR_WHATSAPP
+
+
+def enqueue(body, counsellor=None, lead=None, to=None):
+    """Queue a message. Returns the Notification."""
+    delay = timedelta(seconds=settings.NOTIFY_DIGEST_WINDOW)
+    return Notification.objects.create(
+        counsellor=counsellor,
+        lead=lead,
+        to=to or counsellor_number(counsellor),
+        body=body,
+        run_after=timezone.now() + delay,
+    )
+
+
+def hot_lead_text(lead):
+    return (
+        f"New {lead.get_lead_quality_display()} lead: {lead.name} | {lead.phone} | "
+        f"Score {lead.lead_score} | {lead.get_recommended_country_display()}"
+    )
+
+
+def notify_hot_lead(lead):
+    return enqueue(hot_lead_text(lead), counsellor=lead.assigned_to, lead=lead)
+
+
+def notify_hot_leads(leads):
+    """
+    notify_hot_lead() for the hot leads among saved ``leads``, e.g. a
+    bulk import, with one query for the assignees and one insert.
+    Returns the number queued.
+    """
+    from django.contrib.auth.models import User
+
+    hot = [lead for lead in leads if lead.lead_quality == Lead.Quality.HOT]
+    counsellors = User.objects.select_related("counsellor_profile").in_bulk(
+        {lead.assigned_to_id for lead in hot if lead.assigned_to_id}
+    )
+    run_after = timezone.now() + timedelta(seconds=settings.NOTIFY_DIGEST_WINDOW)
+    Notification.objects.bulk_create([
+        Notification(
+            counsellor_id=lead.assigned_to_id,
+            lead=lead,
+            to=counsellor_number(counsellors.get(lead.assigned_to_id)),
+            body=hot_lead_text(lead),
+            run_after=run_after,
+        )
+        for lead in hot
+    ])
+    return len(hot)
+
+
+def digest_text(bodies):
+    if len(bodies) == 1:
+        return bodies[0][:MAX_BODY]
+    lines = [f"{len(bodies)} new updates:"]
+    lines += [f"{i}. {body}" for i, body in enumerate(bodies, start=1)]
+    text = "\n".join(lines)
+    return text if len(text) <= MAX_BODY else text[:MAX_BODY - 1] + "…"
+
+
+# =====================================
+# CLAIM / DELIVER
+# =====================================
+
+def _runnable(now):
+    stale = now - timedelta(seconds=settings.NOTIFY_LEASE)
+    return (
+        Q(status="pending", run_after__lte=now) |
+        Q(status="sending", locked_at__lt=stale)
+    )
+
+
+def claim_batch(worker):
+    """
+    Atomically take the oldest runnable message plus whatever else is
+    runnable for the same number. Returns a list (empty when idle).
+    """
+    now = timezone.now()
+    runnable = _runnable(now)
+
+    head = Notification.objects.filter(runnable).order_by("run_after", "id").values_list("to", flat=True).first()
+    if head is None:
+        return []
+
+    ids = list(
+        Notification.objects
+        .filter(runnable, to=head)
+        .order_by("id")
+        .values_list("id", flat=True)[:settings.NOTIFY_DIGEST_MAX]
+    )
+    Notification.objects.filter(runnable, id__in=ids).update(
+        status="sending", locked_by=worker, locked_at=now, attempts=F("attempts") + 1
+    )
+    return list(
+        Notification.objects
+        .filter(id__in=ids, status="sending", locked_by=worker, locked_at=now)
+        .order_by("id")
+    )
+
+
+def backoff_seconds(attempts):
+    base = settings.NOTIFY_BACKOFF
+    return base * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+def deliver(batch, client):
+    """Send a claimed batch as one message. Returns True on success."""
+    ids = [n.id for n in batch]
+    try:
+        sid = client.send(batch[0].to, digest_text([n.body for n in batch]))
+    except DeliveryError as e:
+        attempts = max(n.attempts for n in batch)
+        if e.permanent or attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            Notification.objects.filter(id__in=ids).update(status="dead", error=str(e)[:2000])
+        else:
+            delay = max(e.retry_after or 0, backoff_seconds(attempts))
+            Notification.objects.filter(id__in=ids).update(
+                status="pending", error=str(e)[:2000],
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+
+    Notification.objects.filter(id__in=ids).update(
+        status="sent", provider_sid=sid, error="", sent_at=timezone.now()
+    )
+    return True
+
+
+# =====================================
+# WORKER
+# =====================================
+
+class Dispatcher:
+
+    def __init__(self, name=None, poll_interval=1.0, client=None):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.client = client or TwilioClient()
+        self.bucket = TokenBucket(settings.NOTIFY_RATE, settings.NOTIFY_BURST)
+        self.stopping = False
+        self.sent = 0
+        self.failed = 0
+
+    def run_once(self):
+        """Deliver one batch if there is one. Returns False when the queue is empty."""
+        batch = claim_batch(self.name)
+        if not batch:
+            return False
+
+        self.bucket.acquire()
+        if deliver(batch, self.client):
+            self.sent += len(batch)
+        else:
+            self.failed += len(batch)
+        return True
+
+    def run(self, burst=False):
+        try:
+            while not self.stopping:
+                if self.run_once():
+                    continue
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            self.client.close()
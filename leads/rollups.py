@@ -0,0 +1,237 @@
+"""
+Daily lead rollups behind the analytics API.
+
+Every lead is counted in one LeadRollup row per dimension: the row for
+its creation day, its CRM status and its value of that dimension. A lead
+in status "contacted", quality HOT, created on 2025-03-04, adds one to
+
+    (all, 2025-03-04, "", contacted)
+    (lead_quality, 2025-03-04, "1", contacted)
+    (recommended_country, ...), (intake, ...), (assigned_to, ...)
+
+so any (day range x status x one dimension) question is a sum over a few
+thousand rows however many leads there are. The signal handlers in
+``leads.signals`` move a lead's rows when it changes; bulk writers call
+``apply(count_keys(leads))`` or ``rebuild()`` like they do for LeadStat.
+"""
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Lead, LeadRollup
+from .stats import add_counts
+
+
+# dimension -> Lead field
+DIMENSIONS = {
+    "all": None,
+    "lead_quality": "lead_quality",
+    "recommended_country": "recommended_country",
+    "intake": "intake",
+    "assigned_to": "assigned_to_id",
+}
+
+
+def row(created_at, crm_status, lead_quality, recommended_country, intake, assigned_to_id):
+    """The fields of a lead that decide its rollup rows."""
+    return day_row(
+        timezone.localtime(created_at).date(),
+        crm_status, lead_quality, recommended_country, intake, assigned_to_id,
+    )
+
+
+def day_row(day, crm_status, lead_quality, recommended_country, intake, assigned_to_id):
+    return (
+        day,
+        crm_status,
+        {
+            "all": "",
+            "lead_quality": str(lead_quality),
+            "recommended_country": str(recommended_country),
+            "intake": intake or "",
+            "assigned_to": str(assigned_to_id or ""),
+        },
+    )
+
+
+def lead_row(lead):
+    return row(
+        lead.created_at, lead.crm_status, lead.lead_quality,
+        lead.recommended_country, lead.intake, lead.assigned_to_id,
+    )
+
+
+def keys(lead_row):
+    day, crm_status, values = lead_row
+    return [(dimension, day, values[dimension], crm_status) for dimension in DIMENSIONS]
+
+
+def count_keys(leads):
+    return Counter(key for lead in leads for key in keys(lead_row(lead)))
+
+
+def move(old_row, new_row):
+    """Deltas that take a lead from ``old_row`` to ``new_row``."""
+    deltas = Counter(keys(new_row))
+    deltas.subtract(keys(old_row))
+    return deltas
+
+
+def apply(deltas):
+    """Add a {key: delta} mapping to LeadRollup in one statement."""
+    add_counts(LeadRollup, ("dimension", "day", "value", "crm_status"), deltas)
+
+
+def rebuild():
+    """
+    Recount every rollup from ``Lead`` and ``LeadArchive``, one grouped
+    pass per dimension and table.
+    """
+    from .archive import rollup_rows
+
+    with transaction.atomic():
+        LeadRollup.objects.all().delete()
+        for dimension, field in DIMENSIONS.items():
+            rows = (
+                Lead.objects
+                .annotate(day=TruncDate("created_at"))
+                .values("day", "crm_status", *([field] if field else []))
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            counts = Counter()
+            for source in (rows, rollup_rows(field)):
+                for r in source.iterator():
+                    value = str(r[field] if r[field] is not None else "") if field else ""
+                    counts[(r["day"], value, r["crm_status"])] += r["count"]
+            LeadRollup.objects.bulk_create(
+                (
+                    LeadRollup(dimension=dimension, day=day, value=value, crm_status=crm_status, count=count)
+                    for (day, value, crm_status), count in counts.items()
+                ),
+                batch_size=1000,
+            )
+    return LeadRollup.objects.count()
+
+
+# =====================================
+# QUERIES
+# =====================================
+
+class _DayTruncMonth(TruncMonth):
+    # ``day`` is a plain date, so SQLite's date() modifiers give the same
+    # answer as Django's timezone-aware Python function, without calling
+    # back into Python for every row.
+    def as_sqlite(self, compiler, connection):
+        sql, params = compiler.compile(self.lhs)
+        return f"date({sql}, 'start of month')", params
+
+
+class _DayTruncWeek(TruncWeek):
+    def as_sqlite(self, compiler, connection):
+        # Back six days, then forward to a Monday: the Monday on or before.
+        sql, params = compiler.compile(self.lhs)
+        return f"date({sql}, '-6 days', 'weekday 1')", params
+
+
+BUCKETS = ("day", "week", "month")
+_TRUNC = {"week": _DayTruncWeek, "month": _DayTruncMonth}
+
+# Forward stages of the pipeline; a lead counts towards every stage up to
+# its current status. Lost leads only count towards the total.
+FUNNEL = ["new", "contacted", "followup", "converted"]
+
+
+def counts(dimension, bucket="month", start=None, end=None, value=None, crm_status=None):
+    """(period, value, crm_status, count) rows for one dimension, oldest first."""
+    # Rows a lead has moved out of stay behind at zero.
+    rows = LeadRollup.objects.filter(dimension=dimension).exclude(count=0)
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    if value is not None:
+        rows = rows.filter(value=value)
+    if crm_status:
+        rows = rows.filter(crm_status=crm_status)
+    if bucket == "day":
+        # Already one row per key: read them in index order, no GROUP BY.
+        return rows.order_by("day").values_list("day", "value", "crm_status", "count")
+    return (
+        rows
+        .annotate(period=_TRUNC[bucket]("day", output_field=DateField()))
+        .values_list("period", "value", "crm_status")
+        .annotate(total=Sum("count"))
+        .order_by("period")
+    )
+
+
+def funnel(status_totals):
+    total = sum(status_totals.values())
+    stages = []
+    for i, stage in enumerate(FUNNEL):
+        reached = sum(status_totals.get(s, 0) for s in FUNNEL[i:])
+        stages.append({
+            "stage": stage,
+            "count": reached,
+            "rate": round(reached / total, 4) if total else None,
+        })
+    return stages
+
+
+def labels(dimension, values):
+    """Display names for the values of a dimension."""
+    if dimension == "crm_status":
+        names = dict(Lead.CRM_STATUS_CHOICES)
+    elif dimension == "lead_quality":
+        names = {str(v): label for v, label in Lead.Quality.choices}
+    elif dimension == "recommended_country":
+        names = {str(v): label for v, label in Lead.Country.choices}
+    elif dimension == "assigned_to":
+        ids = [v for v in values if v]
+        names = {str(pk): username for pk, username in User.objects.filter(pk__in=ids).values_list("pk", "username")}
+        names[""] = "Unassigned"
+    else:
+        names = {}
+    return {value: names.get(value, value) for value in values}
+
+
+def report(by="crm_status", bucket="month", start=None, end=None, segment=None, crm_status=None):
+    """
+    Time series, totals and funnel for the analytics API. ``by`` is
+    crm_status or a dimension; ``segment`` is an optional (dimension,
+    value) pair to restrict to, which must be ``by`` itself unless ``by``
+    is crm_status.
+    """
+    dimension = segment[0] if segment else ("all" if by == "crm_status" else by)
+    value = segment[1] if segment else None
+
+    series = {}
+    by_group = Counter()
+    by_status = Counter()
+    for period, group_value, status, total in counts(dimension, bucket, start, end, value, crm_status):
+        group = status if by == "crm_status" else group_value
+        point = series.setdefault(period, {"period": period, "total": 0, "counts": Counter()})
+        point["total"] += total
+        point["counts"][group] += total
+        by_group[group] += total
+        by_status[status] += total
+
+    total = sum(by_status.values())
+    return {
+        "by": by,
+        "bucket": bucket,
+        "from": start,
+        "to": end,
+        "total": total,
+        "series": [dict(point, counts=dict(point["counts"])) for point in series.values()],
+        "totals": dict(by_group),
+        "labels": labels(by, list(by_group)),
+        "funnel": funnel(by_status),
+        "conversion_rate": round(by_status["converted"] / total, 4) if total else None,
+        "lost": by_status["lost"],
+    }
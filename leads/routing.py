@@ -0,0 +1,136 @@
+"""
+Read-replica routing for the reporting views.
+
+ReplicaMiddleware marks GET/HEAD requests to the views named in
+REPLICA_VIEWS; while such a request runs (including the body of a
+streaming response), ReplicaRouter sends reads of ``leads`` models to
+the REPLICA_DATABASE alias. Everything else, sessions and users included,
+stays on ``default``.
+
+Replicas lag, so after any write request (e.g. a counsellor's
+update_status POST) the browser gets a short-lived cookie that keeps its
+reads on ``default`` for REPLICA_STICKY_SECONDS: the redirect back to the
+lead list shows the change that was just made.
+
+Without a REPLICA_DATABASE in DATABASES all of this is a no-op.
+"""
+import contextlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+
+STICKY_COOKIE = "crm_primary"
+SAFE_METHODS = ("GET", "HEAD")
+
+_read_alias = ContextVar("leads_read_alias", default=None)
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in connections.settings
+
+
+@contextlib.contextmanager
+def reads_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def _iterate_on(alias, chunks):
+    # Streaming bodies are produced after the view returns; route each
+    # chunk's queries without leaving the alias set between chunks.
+    chunks = iter(chunks)
+    while True:
+        with reads_from(alias):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label == "leads":
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication.
+        return db != settings.REPLICA_DATABASE
+
+
+class ReplicaMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        alias = self.read_alias(request)
+        if alias is None:
+            response = self.get_response(request)
+        else:
+            with reads_from(alias):
+                response = self.get_response(request)
+            self.route_stream(alias, response)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        alias = self.read_alias(request)
+        if alias is None:
+            response = await self.get_response(request)
+        else:
+            with reads_from(alias):
+                response = await self.get_response(request)
+            self.route_stream(alias, response)
+        return self.pin(request, response)
+
+    @staticmethod
+    def read_alias(request):
+        if request.method not in SAFE_METHODS or not replica_configured():
+            return None
+        if STICKY_COOKIE in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return settings.REPLICA_DATABASE if match.url_name in settings.REPLICA_VIEWS else None
+
+    @staticmethod
+    def route_stream(alias, response):
+        # The reporting views all stream from sync iterators.
+        if response.streaming and not response.is_async:
+            response.streaming_content = _iterate_on(alias, response.streaming_content)
+
+    @staticmethod
+    def pin(request, response):
+        if request.method not in SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                STICKY_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite="Lax",
+            )
+        return response
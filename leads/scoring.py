@@ -0,0 +1,309 @@
+"""
+Table-driven lead scoring.
+
+Thresholds are data: a rules dict (DEFAULT_RULES, or the active
+ScoringRuleSet row) is compiled once into a RuleSet of sorted bound/value
+tables looked up with bisect. The same tables drive:
+
+* Lead.save(), one row at a time,
+* score_leads(), whole columns at once for bulk imports, memoising each
+  distinct input,
+* rescore(), set-based ``UPDATE ... SET lead_score = CASE ...`` over
+  id-range chunks, for bringing existing rows up to a new rule version.
+
+Every lead records the ``score_version`` it was scored with. Version 0 is
+the built-in DEFAULT_RULES.
+
+Rules format (points lists are one longer than their bounds; a value x
+gets ``points[bisect_right(bounds, x)]``)::
+
+    {
+        "ielts": {"bounds": [5.5, 6, 7], "points": [5, 10, 20, 30]},
+        "budget": {"bounds": [15, 20, 25, 30], "points": [5, 10, 15, 25, 30]},
+        "qualification": {"Graduation": 20, "default": 10},
+        "backlogs": {"yes": -10, "no": 20},
+        "country": {"bounds": [15, 25, 30],
+                    "values": ["SINGAPORE", "DUBAI", "UK", "AUSTRALIA"],
+                    "missing": "SINGAPORE"},
+        "quality": {"bounds": [65, 85], "values": ["COLD", "WARM", "HOT"]},
+    }
+
+A missing or zero IELTS score or budget scores 0 points (and gets the
+``missing`` country), as the original ``if self.ielts_score:`` checks did.
+"""
+import threading
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+
+from .models import Lead
+
+
+DEFAULT_RULES = {
+    "ielts": {"bounds": [5.5, 6, 7], "points": [5, 10, 20, 30]},
+    "budget": {"bounds": [15, 20, 25, 30], "points": [5, 10, 15, 25, 30]},
+    "qualification": {"Graduation": 20, "default": 10},
+    "backlogs": {"yes": -10, "no": 20},
+    "country": {
+        "bounds": [15, 25, 30],
+        "values": ["SINGAPORE", "DUBAI", "UK", "AUSTRALIA"],
+        "missing": "SINGAPORE",
+    },
+    "quality": {"bounds": [65, 85], "values": ["COLD", "WARM", "HOT"]},
+}
+
+
+class InvalidRules(ValueError):
+    pass
+
+
+def _table(rules, name, values_key, convert=None):
+    try:
+        section = rules[name]
+        bounds = [float(b) for b in section["bounds"]]
+        values = [convert(v) if convert else int(v) for v in section[values_key]]
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidRules(f"{name}: {e!r}") from e
+    if bounds != sorted(bounds) or len(set(bounds)) != len(bounds):
+        raise InvalidRules(f"{name}: bounds must be strictly increasing")
+    if len(values) != len(bounds) + 1:
+        raise InvalidRules(f"{name}: needs {len(bounds) + 1} {values_key}, got {len(values)}")
+    return bounds, values
+
+
+def _enum(choices, name):
+    def convert(value):
+        try:
+            return choices[value]
+        except KeyError:
+            raise InvalidRules(f"{name}: unknown value {value!r}") from None
+    return convert
+
+
+class RuleSet:
+    """Compiled scoring rules for one version."""
+
+    def __init__(self, rules, version=0):
+        self.version = version
+        self.rules = rules
+
+        self.ielts_bounds, self.ielts_points = _table(rules, "ielts", "points")
+        self.budget_bounds, self.budget_points = _table(rules, "budget", "points")
+        self.country_bounds, self.country_values = _table(
+            rules, "country", "values", _enum(Lead.Country, "country")
+        )
+        self.quality_bounds, self.quality_values = _table(
+            rules, "quality", "values", _enum(Lead.Quality, "quality")
+        )
+        try:
+            qualification = dict(rules["qualification"])
+            self.qualification_default = int(qualification.pop("default"))
+            self.qualification_points = {k: int(v) for k, v in qualification.items()}
+            self.backlog_points = {True: int(rules["backlogs"]["yes"]), False: int(rules["backlogs"]["no"])}
+            self.country_missing = _enum(Lead.Country, "country")(rules["country"]["missing"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidRules(repr(e)) from e
+
+    # ---------------------------
+    # ONE ROW
+    # ---------------------------
+    def ielts(self, ielts_score):
+        if not ielts_score:
+            return 0
+        return self.ielts_points[bisect_right(self.ielts_bounds, ielts_score)]
+
+    def budget(self, budget):
+        if not budget:
+            return 0
+        return self.budget_points[bisect_right(self.budget_bounds, budget)]
+
+    def score(self, ielts_score, budget, qualification, backlogs):
+        return (
+            self.ielts(ielts_score)
+            + self.budget(budget)
+            + self.qualification_points.get(qualification, self.qualification_default)
+            + self.backlog_points[bool(backlogs)]
+        )
+
+    def country(self, budget):
+        if not budget:
+            return self.country_missing
+        return self.country_values[bisect_right(self.country_bounds, budget)]
+
+    def quality(self, score):
+        return self.quality_values[bisect_right(self.quality_bounds, score)]
+
+    # ---------------------------
+    # COLUMNS
+    # ---------------------------
+    def score_columns(self, ielts_scores, budgets, qualifications, backlogs):
+        """
+        Score parallel columns of inputs. Returns (scores, countries,
+        qualities) lists, equal to scoring each row on its own.
+        """
+        ielts = _memoised(self.ielts, ielts_scores)
+        budget = _memoised(self.budget, budgets)
+        quals = _memoised(lambda q: self.qualification_points.get(q, self.qualification_default), qualifications)
+        scores = [
+            i + b + q + self.backlog_points[bool(bl)]
+            for i, b, q, bl in zip(ielts, budget, quals, backlogs)
+        ]
+        return scores, _memoised(self.country, budgets), _memoised(self.quality, scores)
+
+    # ---------------------------
+    # SQL
+    # ---------------------------
+    @staticmethod
+    def _steps(field, bounds, values, missing=None):
+        """CASE over ``field`` equal to values[bisect_right(bounds, field)]."""
+        whens = []
+        if missing is not None:
+            whens.append(When(Q(**{f"{field}__isnull": True}) | Q(**{field: 0}), then=Value(missing)))
+        for bound, value in reversed(list(zip(bounds, values[1:]))):
+            whens.append(When(**{f"{field}__gte": bound}, then=Value(value)))
+        return Case(*whens, default=Value(values[0]))
+
+    def score_expression(self):
+        qualification = Case(
+            *[When(qualification=k, then=Value(v)) for k, v in self.qualification_points.items()],
+            default=Value(self.qualification_default),
+        )
+        backlogs = Case(
+            When(backlogs=True, then=Value(self.backlog_points[True])),
+            default=Value(self.backlog_points[False]),
+        )
+        return (
+            self._steps("ielts_score", self.ielts_bounds, self.ielts_points, missing=0)
+            + self._steps("budget", self.budget_bounds, self.budget_points, missing=0)
+            + qualification
+            + backlogs
+        )
+
+    def update_expressions(self):
+        """Field -> expression mapping for QuerySet.update()."""
+        score = self.score_expression()
+        quality = Case(
+            *[
+                When(GreaterThanOrEqual(score, bound), then=Value(value))
+                for bound, value in reversed(list(zip(self.quality_bounds, self.quality_values[1:])))
+            ],
+            default=Value(self.quality_values[0]),
+        )
+        return {
+            "lead_score": score,
+            "recommended_country": self._steps(
+                "budget", self.country_bounds, self.country_values, missing=self.country_missing
+            ),
+            "lead_quality": quality,
+            "score_version": Value(self.version),
+        }
+
+
+def _memoised(func, column):
+    cache = {}
+    out = []
+    for x in column:
+        try:
+            out.append(cache[x])
+        except KeyError:
+            out.append(cache.setdefault(x, func(x)))
+    return out
+
+
+# =====================================
+# ACTIVE RULES
+# =====================================
+
+_active = None
+_active_checked = 0.0
+_lock = threading.Lock()
+
+
+def active_rules():
+    """
+    The compiled active rule set: the active ScoringRuleSet row, else
+    DEFAULT_RULES as version 0. Re-read at most every SCORING_RULES_TTL
+    seconds; saving a ScoringRuleSet resets it in this process at once.
+    """
+    global _active, _active_checked
+
+    if _active is not None and time.monotonic() - _active_checked < settings.SCORING_RULES_TTL:
+        return _active
+
+    with _lock:
+        from .models import ScoringRuleSet
+
+        row = ScoringRuleSet.objects.filter(is_active=True).only("version", "rules").first()
+        if row is None:
+            version, rules = 0, DEFAULT_RULES
+        else:
+            version, rules = row.version, row.rules
+        if _active is None or _active.version != version:
+            _active = RuleSet(rules, version)
+        _active_checked = time.monotonic()
+        return _active
+
+
+def reset():
+    global _active
+    _active = None
+
+
+def score_leads(leads, rules=None):
+    """Fill lead_score, recommended_country, lead_quality and score_version on unsaved leads."""
+    rules = rules or active_rules()
+    scores, countries, qualities = rules.score_columns(
+        [lead.ielts_score for lead in leads],
+        [lead.budget for lead in leads],
+        [lead.qualification for lead in leads],
+        [lead.backlogs for lead in leads],
+    )
+    for lead, score, country, quality in zip(leads, scores, countries, qualities):
+        lead.lead_score = score
+        lead.recommended_country = country
+        lead.lead_quality = quality
+        lead.score_version = rules.version
+    return leads
+
+
+# =====================================
+# BULK RESCORING
+# =====================================
+
+def rescore(rules=None, chunk_size=None, everything=False, progress=None):
+    """
+    Bring stored scores up to ``rules`` (default: the active rules) with
+    one CASE UPDATE per id range of ``chunk_size``. Only rows on another
+    score_version are touched unless ``everything``. LeadStat and
+    LeadRollup are rebuilt afterwards, since quality may have moved.
+    Returns rows updated.
+    """
+    from . import rollups, stats
+
+    rules = rules or active_rules()
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    expressions = rules.update_expressions()
+
+    leads = Lead.objects.all()
+    if not everything:
+        leads = leads.exclude(score_version=rules.version)
+
+    ids = Lead.objects.order_by("id").values_list("id", flat=True)
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return 0
+
+    updated = 0
+    for start in range(first, last + 1, chunk_size):
+        with transaction.atomic():
+            updated += leads.filter(id__gte=start, id__lt=start + chunk_size).update(**expressions)
+        if progress:
+            progress(updated, start + chunk_size - first, last - first + 1)
+
+    stats.rebuild()
+    rollups.rebuild()
+    return updated
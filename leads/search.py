@@ -0,0 +1,159 @@
+"""
+Lead search for the ``q`` parameter of the lead list and the admin.
+
+* SQLite: an external-content FTS5 table (``leads_lead_fts``) with the
+  trigram tokenizer over name, email and phone digits, kept in sync by
+  triggers. Trigram matching is case-insensitive substring matching, the
+  same semantics as the old ``icontains`` filters, but served from an index.
+* PostgreSQL: ``pg_trgm`` GIN indexes on ``UPPER(name)`` / ``UPPER(email)``,
+  which the planner uses for the ``icontains`` filters Django generates.
+* Phone numbers: ``Lead.phone_digits`` answers digit-prefix lookups with an
+  index range scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import normalize_phone
+
+
+FTS_TABLE = "leads_lead_fts"
+
+# Trigram tokenizer can't match anything shorter than three characters.
+MIN_FTS_LENGTH = 3
+
+_phone_like = re.compile(r"^\+?[\d\s\-()]+$")
+
+
+SQLITE_SETUP = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, email, phone_digits,
+        content='leads_lead', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS leads_lead_fts_insert AFTER INSERT ON leads_lead BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email, phone_digits)
+        VALUES (new.id, new.name, new.email, new.phone_digits);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS leads_lead_fts_delete AFTER DELETE ON leads_lead BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, phone_digits)
+        VALUES ('delete', old.id, old.name, old.email, old.phone_digits);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS leads_lead_fts_update
+    AFTER UPDATE OF name, email, phone_digits ON leads_lead BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, phone_digits)
+        VALUES ('delete', old.id, old.name, old.email, old.phone_digits);
+        INSERT INTO {FTS_TABLE}(rowid, name, email, phone_digits)
+        VALUES (new.id, new.name, new.email, new.phone_digits);
+    END
+    """,
+]
+
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS leads_lead_fts_insert",
+    "DROP TRIGGER IF EXISTS leads_lead_fts_delete",
+    "DROP TRIGGER IF EXISTS leads_lead_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS lead_name_trgm ON leads_lead USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS lead_email_trgm ON leads_lead USING gin (UPPER(email) gin_trgm_ops)",
+]
+
+POSTGRES_TEARDOWN = [
+    "DROP INDEX IF EXISTS lead_name_trgm",
+    "DROP INDEX IF EXISTS lead_email_trgm",
+]
+
+
+# =====================================
+# INDEX MAINTENANCE
+# =====================================
+
+def _sqlite_triggers_missing(cursor):
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'leads_lead_fts_%'"
+    )
+    return cursor.fetchone()[0] < 3
+
+
+def install(conn=connection):
+    """
+    Create the search index for this backend. Safe to call repeatedly:
+    on SQLite, any migration that rebuilds ``leads_lead`` drops its
+    triggers, so this also runs after every migrate and re-syncs the
+    FTS table when the triggers had to be recreated.
+    """
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            missing = _sqlite_triggers_missing(cursor)
+            for sql in SQLITE_SETUP:
+                cursor.execute(sql)
+            if missing:
+                rebuild(conn)
+        elif conn.vendor == "postgresql":
+            for sql in POSTGRES_SETUP:
+                cursor.execute(sql)
+
+
+def uninstall(conn=connection):
+    statements = {"sqlite": SQLITE_TEARDOWN, "postgresql": POSTGRES_TEARDOWN}
+    with conn.cursor() as cursor:
+        for sql in statements.get(conn.vendor, []):
+            cursor.execute(sql)
+
+
+def rebuild(conn=connection):
+    if conn.vendor == "sqlite":
+        with conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+# =====================================
+# QUERY
+# =====================================
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _digit_prefix(digits):
+    """Range equivalent of startswith, so the B-tree index on phone_digits is used."""
+    upper = digits[:-1] + chr(ord(digits[-1]) + 1)
+    return Q(phone_digits__gte=digits, phone_digits__lt=upper)
+
+
+def search_leads(queryset, query):
+    query = " ".join((query or "").split())
+    if not query:
+        return queryset
+
+    digits = normalize_phone(query)
+    if _phone_like.match(query) and digits:
+        if connection.vendor == "sqlite" and len(digits) >= MIN_FTS_LENGTH:
+            # Substring match on the digits, like the old phone__icontains.
+            match = f"phone_digits : {_fts_phrase(digits)}"
+        else:
+            return queryset.filter(_digit_prefix(digits))
+    elif connection.vendor == "sqlite" and len(query) >= MIN_FTS_LENGTH:
+        match = "{name email} : " + _fts_phrase(query)
+    else:
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(phone__icontains=query) |
+            Q(email__icontains=query)
+        )
+
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    )
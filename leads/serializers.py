@@ -1,6 +1,9 @@
 from rest_framework import serializers  
 from .models import Lead
 class LeadSerializer(serializers.ModelSerializer):
+    lead_quality_display = serializers.CharField(source='get_lead_quality_display', read_only=True)
+    recommended_country_display = serializers.CharField(source='get_recommended_country_display', read_only=True)
+
     class Meta:
         model = Lead
         fields = '__all__'
@@ -0,0 +1,140 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import assignment, events, notify, rollups, scoring, search, stats
+from .models import CounsellorProfile, Lead, ScoringRuleSet
+
+
+@receiver(pre_save, sender=Lead)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    # Instances built with only()/defer() or by hand don't know which
+    # stat bucket, counsellor load or rollup rows they were counted in;
+    # look it up before it is overwritten.
+    if raw or instance._state.adding:
+        return
+    if all(hasattr(instance, name) for name in ("_stat_key", "_load_owner", "_rollup_row")):
+        return
+
+    old = (
+        Lead.objects
+        .filter(pk=instance.pk)
+        .values_list(
+            "created_at", "lead_quality", "crm_status", "assigned_to_id",
+            "recommended_country", "intake",
+        )
+        .first()
+    )
+    if old:
+        created_at, lead_quality, crm_status, assigned_to_id, recommended_country, intake = old
+        instance.__dict__.setdefault("_stat_key", stats.bucket(created_at, lead_quality, crm_status))
+        instance.__dict__.setdefault(
+            "_load_owner", Lead(crm_status=crm_status, assigned_to_id=assigned_to_id).load_owner()
+        )
+        instance.__dict__.setdefault(
+            "_rollup_row",
+            rollups.row(created_at, crm_status, lead_quality, recommended_country, intake, assigned_to_id),
+        )
+
+
+@receiver(post_save, sender=Lead)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    new_key = stats.stat_key(instance)
+
+    if created:
+        stats.bump(new_key, 1)
+    else:
+        old_key = getattr(instance, "_stat_key", new_key)
+        if old_key != new_key:
+            stats.bump(old_key, -1)
+            stats.bump(new_key, 1)
+
+    instance._stat_key = new_key
+
+
+@receiver(post_save, sender=Lead)
+def update_counsellor_load(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    new_owner = instance.load_owner()
+    old_owner = None if created else getattr(instance, "_load_owner", new_owner)
+    if old_owner != new_owner:
+        assignment.adjust_load(old_owner, -1)
+        assignment.adjust_load(new_owner, 1)
+    instance._load_owner = new_owner
+
+
+@receiver(post_save, sender=Lead)
+def auto_assign_new_lead(sender, instance, created, raw=False, **kwargs):
+    # Runs before the hot lead notification so it reaches the assignee.
+    if created and not raw and settings.AUTO_ASSIGN_LEADS:
+        assignment.assign(instance)
+
+
+@receiver(post_save, sender=Lead)
+def log_lead_event(sender, instance, created, raw=False, **kwargs):
+    # After auto-assignment, and before update_rollups_on_save replaces
+    # the _rollup_row that holds the status and assignee before this save.
+    if raw:
+        return
+
+    if created:
+        events.record(instance)
+        return
+    _, old_status, old_values = getattr(instance, "_rollup_row", rollups.lead_row(instance))
+    if (old_status, old_values["assigned_to"]) != (instance.crm_status, str(instance.assigned_to_id or "")):
+        events.record(instance, from_status=old_status)
+
+
+@receiver(post_save, sender=Lead)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    # After auto-assignment, which sets assigned_to with an UPDATE.
+    if raw:
+        return
+
+    new_row = rollups.lead_row(instance)
+    if created:
+        rollups.apply(Counter(rollups.keys(new_row)))
+    else:
+        rollups.apply(rollups.move(getattr(instance, "_rollup_row", new_row), new_row))
+    instance._rollup_row = new_row
+
+
+@receiver(post_save, sender=Lead)
+def notify_counsellor_of_hot_lead(sender, instance, created, raw=False, **kwargs):
+    # Only queues a row; run_notifier does the sending.
+    if created and not raw and settings.WHATSAPP_NOTIFICATIONS and instance.lead_quality == Lead.Quality.HOT:
+        notify.notify_hot_lead(instance)
+
+
+@receiver(post_delete, sender=Lead)
+def update_counts_on_delete(sender, instance, **kwargs):
+    stats.bump(getattr(instance, "_stat_key", None) or stats.stat_key(instance), -1)
+    assignment.adjust_load(getattr(instance, "_load_owner", instance.load_owner()), -1)
+    old_row = getattr(instance, "_rollup_row", None) or rollups.lead_row(instance)
+    rollups.apply(Counter({key: -1 for key in rollups.keys(old_row)}))
+
+
+@receiver(post_save, sender=CounsellorProfile)
+@receiver(post_delete, sender=CounsellorProfile)
+def reset_load_index(sender, **kwargs):
+    assignment.reset()
+
+
+@receiver(post_save, sender=ScoringRuleSet)
+@receiver(post_delete, sender=ScoringRuleSet)
+def reset_scoring_rules(sender, **kwargs):
+    # Other processes pick the change up within SCORING_RULES_TTL.
+    scoring.reset()
+
+
+def install_search_index(sender, using="default", **kwargs):
+    # Table rebuilds in later migrations drop the FTS triggers on SQLite.
+    search.install(connections[using])
@@ -0,0 +1,205 @@
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Lead, LeadStat
+
+
+# =====================================
+# INCREMENTAL MAINTENANCE
+# =====================================
+
+def bucket(created_at, lead_quality, crm_status):
+    month = timezone.localtime(created_at).date().replace(day=1)
+    return (month, lead_quality, crm_status)
+
+
+def stat_key(lead):
+    return bucket(lead.created_at, lead.lead_quality, lead.crm_status)
+
+
+def bump(key, delta):
+    """Add ``delta`` to one bucket, creating it on first use."""
+    if not delta:
+        return
+
+    month, lead_quality, crm_status = key
+    bucket = LeadStat.objects.filter(month=month, lead_quality=lead_quality, crm_status=crm_status)
+
+    changed()
+    if bucket.update(count=F("count") + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            LeadStat.objects.create(
+                month=month, lead_quality=lead_quality, crm_status=crm_status, count=delta
+            )
+    except IntegrityError:
+        # Another writer created the bucket between our update and insert.
+        bucket.update(count=F("count") + delta)
+
+
+def apply_deltas(deltas):
+    """Apply a {stat_key: delta} mapping, e.g. after a bulk insert or update."""
+    if add_counts(LeadStat, ("month", "lead_quality", "crm_status"), deltas):
+        changed()
+
+
+_UPSERT = (
+    "INSERT INTO {table} ({fields}, count) VALUES {rows} "
+    "ON CONFLICT ({fields}) DO UPDATE SET count = {table}.count + excluded.count"
+)
+
+
+def add_counts(model, key_fields, deltas):
+    """
+    Add a {key tuple: delta} mapping to the ``count`` column of a counter
+    table with a unique constraint on ``key_fields``, creating rows as
+    needed. One statement per 1000 keys on SQLite and PostgreSQL.
+    Returns whether anything changed.
+    """
+    deltas = [(key, delta) for key, delta in deltas.items() if delta]
+    if not deltas:
+        return False
+
+    if connection.vendor in ("sqlite", "postgresql"):
+        placeholders = "(%s)" % ", ".join(["%s"] * (len(key_fields) + 1))
+        with connection.cursor() as cursor:
+            # Chunked to stay under SQLite's bound parameter limit.
+            for start in range(0, len(deltas), 1000):
+                chunk = deltas[start:start + 1000]
+                sql = _UPSERT.format(
+                    table=model._meta.db_table,
+                    fields=", ".join(key_fields),
+                    rows=", ".join([placeholders] * len(chunk)),
+                )
+                cursor.execute(sql, [value for key, delta in chunk for value in (*key, delta)])
+        return True
+
+    for key, delta in deltas:
+        lookup = dict(zip(key_fields, key))
+        if not model.objects.filter(**lookup).update(count=F("count") + delta):
+            model.objects.create(count=delta, **lookup)
+    return True
+
+
+def count_keys(leads):
+    return Counter(stat_key(lead) for lead in leads)
+
+
+def rebuild():
+    """Recount every bucket from ``Lead`` and ``LeadArchive``, one grouped pass each."""
+    from .archive import stat_rows
+
+    rows = (
+        Lead.objects
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "lead_quality", "crm_status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    counts = Counter()
+    for source in (rows, stat_rows()):
+        for row in source.iterator():
+            counts[(row["month"], row["lead_quality"], row["crm_status"])] += row["count"]
+
+    with transaction.atomic():
+        LeadStat.objects.all().delete()
+        LeadStat.objects.bulk_create(
+            [
+                LeadStat(month=month, lead_quality=quality, crm_status=crm_status, count=count)
+                for (month, quality, crm_status), count in counts.items()
+            ],
+            batch_size=500,
+        )
+        changed()
+
+    return LeadStat.objects.count()
+
+
+# =====================================
+# VERSION
+# =====================================
+
+# The dashboard and analytics fragment caches and their ETag and
+# Last-Modified headers key on this timestamp, so any LeadStat change
+# invalidates them. It lives in the default cache: use a shared backend
+# (CACHE_BACKEND) when running several workers, or each one only sees
+# its own writes. The stamp expires after REPORT_FRAGMENT_TTL so such a
+# worker still moves to a new version (and stops answering 304) within
+# that time.
+VERSION_KEY = "leads:stats:version"
+
+
+def version():
+    """Time of the last LeadStat change this cache has seen."""
+    stamp = cache.get(VERSION_KEY)
+    if stamp is None:
+        cache.add(VERSION_KEY, time.time(), settings.REPORT_FRAGMENT_TTL)
+        # A dummy cache stores nothing: every request is then a new version.
+        stamp = cache.get(VERSION_KEY) or time.time()
+    return stamp
+
+
+def _bump_version():
+    cache.set(VERSION_KEY, time.time(), settings.REPORT_FRAGMENT_TTL)
+
+
+def changed():
+    # After commit: bumping earlier would let a concurrent request cache
+    # the old numbers under the new version.
+    transaction.on_commit(_bump_version)
+
+
+# =====================================
+# READS
+# =====================================
+
+def dashboard_counts():
+    return LeadStat.objects.aggregate(
+        total=Sum("count", default=0),
+        hot=Sum("count", filter=Q(lead_quality=Lead.Quality.HOT), default=0),
+        warm=Sum("count", filter=Q(lead_quality=Lead.Quality.WARM), default=0),
+        cold=Sum("count", filter=Q(lead_quality=Lead.Quality.COLD), default=0),
+        converted=Sum("count", filter=Q(crm_status="converted"), default=0),
+    )
+
+
+def approximate_count(crm_status=None):
+    """Lead total from LeadStat (optionally for one status), without touching Lead."""
+    buckets = LeadStat.objects.all()
+    if crm_status:
+        buckets = buckets.filter(crm_status=crm_status)
+    return buckets.aggregate(total=Sum("count", default=0))["total"]
+
+
+def monthly_counts():
+    """
+    Returns (months, quality_totals) from a single query: ``months`` is an
+    ordered list of (month, total, converted).
+    """
+    totals = defaultdict(int)
+    converted = defaultdict(int)
+    quality = {"hot": 0, "warm": 0, "cold": 0}
+    quality_names = {
+        Lead.Quality.HOT: "hot",
+        Lead.Quality.WARM: "warm",
+        Lead.Quality.COLD: "cold",
+    }
+
+    for row in LeadStat.objects.values_list("month", "lead_quality", "crm_status", "count"):
+        month, lead_quality, crm_status, count = row
+        totals[month] += count
+        if crm_status == "converted":
+            converted[month] += count
+        quality[quality_names[lead_quality]] += count
+
+    months = [(month, totals[month], converted[month]) for month in sorted(totals) if totals[month]]
+    return months, quality
@@ -7,9 +7,20 @@ urlpatterns = [
     path("", views.landing, name="landing"),
     path("chat/", views.chat_page, name="chat"),
     path("ai_chat/", views.ai_chat, name="ai_chat"),
+    path("ai_chat/async/", views.ai_chat_async, name="ai_chat_async"),
+    path("ai_chat/stream/", views.ai_chat_stream, name="ai_chat_stream"),
+    path("ai_chat/result/<str:key>/", views.ai_chat_result, name="ai_chat_result"),
+    path("ai_cache/stats/", views.ai_cache_stats, name="ai_cache_stats"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("leads/", views.lead_list, name="lead_list"),
+    path("api/leads/", views.lead_list_api, name="lead_list_api"),
+    path("api/leads/<int:lead_id>/", views.lead_detail_api, name="lead_detail_api"),
+    path("api/leads/import/", views.import_leads, name="import_leads"),
+    path("api/leads/bulk/", views.bulk_update_leads, name="bulk_update_leads"),
     path("update-status/<int:lead_id>/", views.update_status, name="update_status"),
     path("export/", views.export_csv, name="export_csv"),
     path("analytics/", views.analytics, name="analytics"),
+    path("api/analytics/", views.analytics_api, name="analytics_api"),
+    path("api/analytics/conversion/", views.conversion_api, name="conversion_api"),
+    path("metrics", views.metrics_view, name="metrics"),
 ]
@@ -1,15 +1,6 @@
-from twilio.rest import Client
-from django.conf import settings
-settings.TWILIO_SID
-settings.TWILIO_TOKEN
-settings.TWILIO_WHATSAPP_FROM
-settings.COUNSELLOR_WHATSAPP
+from . import notify
 
 
-def send_whatsapp_to_counsellor(summary_text):
-    client = Client(settings.TWILIO_SID, settings.TWILIO_TOKEN)
-    message = client.messages.create(
-        body=summary_text,
-        from_="whatsapp:+14155238886",
-        to="whatsapp:+917605021990" 
-    )
+def send_whatsapp_to_counsellor(summary_text, counsellor=None):
+    """Queue a WhatsApp message for ``run_notifier`` to deliver."""
+    return notify.enqueue(summary_text, counsellor=counsellor)
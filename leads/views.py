@@ -1,22 +1,36 @@
-import os
-import csv
-
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count
-from django.db.models.functions import TruncMonth
-from django.core.paginator import Paginator
-from django.http import HttpResponse
-
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.permissions import AllowAny
-from rest_framework.authentication import BasicAuthentication
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from rest_framework.decorators import api_view, authentication_classes, parser_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
 
-from openai import OpenAI
-from .models import Lead
+from . import ai_cache, archive, dedup, events, exporting, importing, jobs, llm, metrics, rollups, stats
+from .filters import start_of_day, filter_leads, only_status_filter
+from .models import AIJob, Lead
+from .pagination import InvalidCursor, keyset_page
+from .serializers import LeadSerializer
+
+
+logger = logging.getLogger(__name__)
 
 
 # =====================================
@@ -36,153 +50,481 @@ def chat_page(request):
 # DASHBOARD
 # =====================================
 
+def _report_etag(request, *args, **kwargs):
+    # The page header shows the user, so the ETag is per user.
+    return f'"{request.resolver_match.url_name}-{request.user.pk}-{stats.version():.6f}"'
+
+
+def _report_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(stats.version(), tz=dt_timezone.utc)
+
+
+def _report_context(**lazy):
+    """
+    Fragment-cached report context: each value is computed on first use,
+    so a page whose fragments are all cached runs no LeadStat query.
+    """
+    context = {name: SimpleLazyObject(func) for name, func in lazy.items()}
+    context["stats_version"] = stats.version()
+    context["fragment_ttl"] = settings.REPORT_FRAGMENT_TTL
+    return context
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_report_etag, last_modified_func=_report_last_modified)
 def dashboard(request):
-    total = Lead.objects.count()
-    hot = Lead.objects.filter(lead_quality__icontains="Hot").count()
-    warm = Lead.objects.filter(lead_quality__icontains="Warm").count()
-    cold = Lead.objects.filter(lead_quality__icontains="Cold").count()
-    converted = Lead.objects.filter(crm_status="converted").count()
-
-    return render(request, "leads/dashboard.html", {
-        "total": total,
-        "hot": hot,
-        "warm": warm,
-        "cold": cold,
-        "converted": converted,
-    })
+    return render(request, "leads/dashboard.html", _report_context(counts=stats.dashboard_counts))
 
 
 # =====================================
 # ANALYTICS
 # =====================================
 
-@login_required
-def analytics(request):
-
-    monthly_leads = (
-        Lead.objects
-        .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(total=Count('id'))
-        .order_by('month')
-    )
-
-    monthly_converted = (
-        Lead.objects
-        .filter(crm_status="converted")
-        .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(total=Count('id'))
-        .order_by('month')
-    )
+def _chart_data():
+    months, quality = stats.monthly_counts()
 
     labels = []
     lead_data = []
     converted_data = []
 
-    converted_dict = {item['month']: item['total'] for item in monthly_converted}
-
-    for item in monthly_leads:
-        month = item['month'].strftime("%b %Y")
-        labels.append(month)
-        lead_data.append(item['total'])
-        converted_data.append(converted_dict.get(item['month'], 0))
-
-    hot = Lead.objects.filter(lead_quality__icontains="Hot").count()
-    warm = Lead.objects.filter(lead_quality__icontains="Warm").count()
-    cold = Lead.objects.filter(lead_quality__icontains="Cold").count()
+    for month, total, converted in months:
+        labels.append(month.strftime("%b %Y"))
+        lead_data.append(total)
+        converted_data.append(converted)
 
-    context = {
+    return {
         "labels": labels,
         "lead_data": lead_data,
         "converted_data": converted_data,
-        "hot": hot,
-        "warm": warm,
-        "cold": cold
+        "hot": quality["hot"],
+        "warm": quality["warm"],
+        "cold": quality["cold"]
     }
 
-    return render(request, "leads/analytics.html", context)
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_report_etag, last_modified_func=_report_last_modified)
+def analytics(request):
+    return render(request, "leads/analytics.html", _report_context(charts=_chart_data))
+
+
+# Dimensions the analytics API can break down or filter by.
+ANALYTICS_DIMENSIONS = [name for name in rollups.DIMENSIONS if name != "all"]
+
+
+def _date_params(params):
+    """The ``from``/``to`` dates in ``params`` (None when absent), or raises ValueError."""
+    dates = {}
+    for name in ("from", "to"):
+        value = params.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            raise ValueError(f"{name} must be a YYYY-MM-DD date.")
+    return dates
+
+
+def _analytics_params(params):
+    """Validated rollups.report() arguments, or raises ValueError."""
+    bucket = params.get("bucket", "month")
+    if bucket not in rollups.BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(rollups.BUCKETS)}.")
+
+    by = params.get("by", "crm_status")
+    if by != "crm_status" and by not in ANALYTICS_DIMENSIONS:
+        raise ValueError(f"by must be crm_status or one of {', '.join(ANALYTICS_DIMENSIONS)}.")
+
+    dates = _date_params(params)
+
+    # Rollups are one dimension at a time, so only one of these can be
+    # combined with a breakdown by another.
+    segments = [name for name in ANALYTICS_DIMENSIONS if params.get(name)]
+    if len(segments) > 1 or (segments and by not in ("crm_status", segments[0])):
+        raise ValueError("Filter by at most one dimension, and only the one in by (or by=crm_status).")
+    segment = None
+    if segments:
+        value = params[segments[0]]
+        if segments[0] == "assigned_to" and value == "none":
+            value = ""
+        segment = (segments[0], value)
+
+    return {
+        "by": by,
+        "bucket": bucket,
+        "start": dates["from"],
+        "end": dates["to"],
+        "segment": segment,
+        "crm_status": params.get("status") or None,
+    }
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+def analytics_api(request):
+    """
+    Lead counts from the LeadRollup table, by ``bucket`` (day, week or
+    month) and broken down ``by`` crm_status (default) or one of
+    lead_quality, recommended_country, intake and assigned_to. Filters:
+    ``from``/``to`` (inclusive, YYYY-MM-DD), ``status`` and at most one
+    dimension, e.g. ``?by=crm_status&lead_quality=1``. Also returns the
+    status funnel for the selection.
+    """
+    try:
+        params = _analytics_params(request.query_params)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(rollups.report(**params))
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+def conversion_api(request):
+    """
+    Time from creation to each funnel stage, replayed from the lead event
+    log, for leads reaching the stage between ``from`` and ``to``
+    (inclusive, YYYY-MM-DD). Cached until the lead counts next change.
+    """
+    try:
+        dates = _date_params(request.query_params)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    start = start_of_day(dates["from"]) if dates["from"] else None
+    end = start_of_day(dates["to"] + timedelta(days=1)) if dates["to"] else None
+    key = f"lead-events:conversion:{stats.version():.6f}:{dates['from']}:{dates['to']}"
+    report = cache.get_or_set(key, lambda: events.conversion_times(start, end), settings.REPORT_FRAGMENT_TTL)
+    return Response(report)
 
 
 # =====================================
 # LEAD LIST
 # =====================================
 
-@login_required
-def lead_list(request):
+def _approximate_total(params):
+    # Only answerable from LeadStat when filtering by status alone.
+    if not only_status_filter(params):
+        return None
+    return stats.approximate_count(params.get("status") or None)
 
-    query = request.GET.get("q")
-    status_filter = request.GET.get("status")
 
-    leads = Lead.objects.all().order_by("-created_at")
+def _keyset_page(params, size):
+    return keyset_page(
+        filter_leads(params),
+        after=params.get("after"),
+        before=params.get("before"),
+        size=size,
+    )
 
-    if query:
-        leads = leads.filter(
-            Q(name__icontains=query) |
-            Q(phone__icontains=query) |
-            Q(email__icontains=query)
-        )
 
-    if status_filter:
-        leads = leads.filter(crm_status=status_filter)
+@login_required
+def lead_list(request):
 
-    paginator = Paginator(leads, 10)
-    page_number = request.GET.get("page")
-    leads = paginator.get_page(page_number)
+    try:
+        leads = _keyset_page(request.GET, 10)
+    except InvalidCursor:
+        return redirect("lead_list")
+
+    # Carry the filters into the next/previous links.
+    filters = request.GET.copy()
+    for key in ("after", "before"):
+        filters.pop(key, None)
 
     return render(request, "leads/lead_list.html", {
-        "leads": leads
+        "leads": leads,
+        "filters": filters.urlencode(),
+        "approximate_total": _approximate_total(request.GET),
     })
 
 
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+def lead_detail_api(request, lead_id):
+    """One lead by id, whether it is in the Lead table or archived."""
+    lead = archive.get_lead(lead_id)
+    if lead is None:
+        return Response({"error": "No such lead."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(dict(LeadSerializer(lead).data, archived=lead.archived))
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+def lead_list_api(request):
+    """
+    Cursor-paginated leads, newest first. Accepts the lead list filters
+    plus ``after``/``before`` cursors, ``page_size`` (max 100) and
+    ``count=approx`` for an O(1) approximate total.
+    """
+    try:
+        size = min(max(int(request.query_params.get("page_size", 25)), 1), 100)
+    except ValueError:
+        size = 25
+
+    try:
+        page = _keyset_page(request.query_params, size)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+    def link(**cursor):
+        params = request.query_params.copy()
+        for key in ("after", "before"):
+            params.pop(key, None)
+        params.update(cursor)
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    payload = {
+        "next": link(after=page.next_cursor) if page.next_cursor else None,
+        "previous": link(before=page.previous_cursor) if page.previous_cursor else None,
+        "results": LeadSerializer(page.object_list, many=True).data,
+    }
+    if request.query_params.get("count") == "approx":
+        payload["approximate_total"] = _approximate_total(request.query_params)
+
+    return Response(payload)
+
+
 # =====================================
-# UPDATE STATUS
+# UPDATE STATUS / BULK UPDATE
 # =====================================
 
 @login_required
 def update_status(request, lead_id):
-    lead = get_object_or_404(Lead, id=lead_id)
+    # Working an archived lead again brings it back into the Lead table.
+    lead = archive.get_lead(lead_id, restore_archived=request.method == "POST")
+    if lead is None:
+        raise Http404("No such lead.")
 
     if request.method == "POST":
         lead.crm_status = request.POST.get("status")
-        lead.assigned_to_id = request.POST.get("assigned_to")
-        lead.save()
+        lead.assigned_to_id = request.POST.get("assigned_to") or None
+        # Neither is a scoring input, so save() does not rescore.
+        lead.save(update_fields=["crm_status", "assigned_to"])
 
     return redirect("lead_list")
 
 
+CRM_STATUSES = [value for value, _ in Lead.CRM_STATUS_CHOICES]
+
+
+def _bulk_changes(data):
+    """Validated LeadQuerySet.bulk_set() arguments, or raises ValueError."""
+    changes = {}
+    if data.get("status"):
+        if data["status"] not in CRM_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(CRM_STATUSES)}.")
+        changes["crm_status"] = data["status"]
+    if "assigned_to" in data:
+        assigned_to = data["assigned_to"]
+        if assigned_to in (None, "", "none"):
+            changes["assigned_to_id"] = None
+        else:
+            try:
+                changes["assigned_to_id"] = int(assigned_to)
+            except (TypeError, ValueError):
+                raise ValueError("assigned_to must be a user id, or none to unassign.")
+            if not User.objects.filter(id=changes["assigned_to_id"]).exists():
+                raise ValueError("assigned_to is not a user.")
+    if not changes:
+        raise ValueError("Send status and/or assigned_to.")
+    return changes
+
+
+def _bulk_leads(request):
+    """The leads a bulk update applies to: ``ids``, or the lead list filters in the query string."""
+    ids = request.data.get("ids")
+    if ids is not None:
+        if hasattr(request.data, "getlist"):
+            ids = request.data.getlist("ids")
+        if not isinstance(ids, list):
+            ids = [ids]
+        try:
+            return Lead.objects.filter(id__in=[int(lead_id) for lead_id in ids])
+        except (TypeError, ValueError):
+            raise ValueError("ids must be lead ids.")
+    if not request.query_params:
+        raise ValueError("Send ids, or lead list filters in the query string.")
+    return filter_leads(request.query_params)
+
+
+@api_view(["POST"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+def bulk_update_leads(request):
+    """
+    Set ``status`` and/or ``assigned_to`` (a user id, or none/null to
+    unassign) on many leads at once: the ``ids`` in the body, or every lead
+    matching the lead list filters in the query string. One UPDATE however
+    many leads match, with no rescoring and no capacity check on the
+    assignee. Returns ``{"updated": n}``.
+    """
+    try:
+        changes = _bulk_changes(request.data)
+        leads = _bulk_leads(request)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"updated": leads.bulk_set(**changes)})
+
+
 # =====================================
-# EXPORT CSV
+# EXPORT
 # =====================================
 
 @login_required
 def export_csv(request):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="leads.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(["Name", "Phone", "Score", "Quality", "Country", "Status"])
+    """
+    Stream the leads matching the lead list filters. ``format`` is csv
+    (default), ndjson or columnar; see leads.exporting. ``archived=1``
+    appends the matching archived leads.
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exporting.FORMATS:
+        return HttpResponse(f"Unknown export format: {fmt}", status=400)
+
+    content_type, filename = exporting.FORMATS[fmt]
+    response = StreamingHttpResponse(
+        exporting.stream_export(
+            filter_leads(request.GET), fmt,
+            archived=archive.archived(request.GET) if request.GET.get("archived") in ("1", "true") else None,
+        ),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
-    leads = Lead.objects.all()
 
-    for lead in leads:
-        writer.writerow([
-            lead.name,
-            lead.phone,
-            lead.lead_score,
-            lead.lead_quality,
-            lead.recommended_country,
-            lead.crm_status
-        ])
+# =====================================
+# IMPORT
+# =====================================
 
-    return response
+@api_view(["POST"])
+@authentication_classes([SessionAuthentication, BasicAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_leads(request):
+    """
+    Bulk import leads. Send a multipart ``file`` upload, or the CSV/NDJSON
+    as the raw request body. ``format`` (csv or ndjson) defaults to the
+    upload's extension or the body's content type. Add ``dry_run=1`` to
+    validate without writing. Returns the import report.
+    """
+    if request.content_type.startswith("multipart/"):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Missing file."}, status=status.HTTP_400_BAD_REQUEST)
+        lines, default_format = upload, importing.guess_format(upload.name)
+    else:
+        lines = request.stream or []
+        default_format = "ndjson" if "ndjson" in request.content_type else "csv"
+
+    fmt = request.query_params.get("format", default_format)
+    if fmt not in importing.READERS:
+        return Response({"error": f"Unknown import format: {fmt}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    report = importing.import_stream(
+        importing.decode_lines(lines),
+        fmt,
+        dry_run=request.query_params.get("dry_run") in ("1", "true"),
+    )
+    return Response(report.as_dict())
 
 
 # =====================================
 # AI CHAT API (OPENAI INTEGRATED)
 # =====================================
 
+def _parse_chat_data(data):
+    """
+    Pull the lead fields out of a chat submission. Returns (fields,
+    user_summary), or None when a required field is missing.
+    """
+    user_summary = (data.get("user_summary") or "").strip()
+    name = data.get("name")
+    phone = data.get("phone")
+
+    try:
+        ielts_score = float(data.get("ielts_score")) if data.get("ielts_score") else None
+    except (TypeError, ValueError):
+        ielts_score = None
+
+    try:
+        budget = int(data.get("budget")) if data.get("budget") else None
+    except (TypeError, ValueError):
+        budget = None
+
+    if not user_summary or not name or not phone:
+        return None
+
+    fields = {
+        "name": name,
+        "email": data.get("email"),
+        "phone": phone,
+        "country_interest": data.get("country_interest", ""),
+        "course_interest": data.get("course_interest", ""),
+        "ielts_score": ielts_score,
+        "budget": budget,
+        "intake": data.get("intake", "September"),
+        "qualification": data.get("qualification", "12th"),
+        "backlogs": data.get("backlogs", False),
+    }
+    return fields, user_summary
+
+
+def _fallback_reply(lead):
+    return llm.fallback_reply(
+        lead.name,
+        lead.ielts_score,
+        lead.budget,
+        lead.lead_score,
+        lead.get_recommended_country_display(),
+        lead.get_lead_quality_display(),
+    )
+
+
+def _chat_payload(lead, ai_text):
+    return {
+        "success": True,
+        "ai_reply": ai_text,
+        "score": lead.lead_score,
+        "recommended_country": lead.get_recommended_country_display(),
+        "lead_quality": lead.get_lead_quality_display()
+    }
+
+
+def _wants_defer(request):
+    flag = request.query_params.get("defer") or request.data.get("defer")
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+def _defer_chat(request, fields, user_summary):
+    """
+    Persist the lead, queue the AI analysis for run_ai_worker and answer
+    straight away. The client polls ``result_url`` for the reply.
+    """
+    idempotency_key = (
+        request.headers.get("Idempotency-Key") or request.data.get("idempotency_key")
+    )
+    job, created = jobs.enqueue_chat(fields, user_summary, idempotency_key)
+    lead = job.lead
+
+    return Response({
+        "success": True,
+        "lead_id": lead.id,
+        "job": job.key,
+        "status": job.status,
+        "result_url": reverse("ai_chat_result", args=[job.key]),
+        "score": lead.lead_score,
+        "recommended_country": lead.get_recommended_country_display(),
+        "lead_quality": lead.get_lead_quality_display()
+    }, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+
 @csrf_exempt
 @api_view(["POST"])
 @authentication_classes([])
@@ -190,111 +532,183 @@ def export_csv(request):
 def ai_chat(request):
 
     try:
-        data = request.data
-
-        user_summary = data.get("user_summary", "").strip()
-        name = data.get("name")
-        email = data.get("email")
-        phone = data.get("phone")
-        country_interest = data.get("country_interest", "")
-        course_interest = data.get("course_interest", "")
-        intake = data.get("intake", "September")
-        qualification = data.get("qualification", "12th")
-        backlogs = data.get("backlogs", False)
-
-        try:
-            ielts_score = float(data.get("ielts_score")) if data.get("ielts_score") else None
-        except:
-            ielts_score = None
-
-        try:
-            budget = int(data.get("budget")) if data.get("budget") else None
-        except:
-            budget = None
+        parsed = _parse_chat_data(request.data)
 
-        if not user_summary or not name or not phone:
+        if parsed is None:
             return Response(
                 {"error": "Missing required fields."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create Lead (score auto calculated)
-        lead = Lead.objects.create(
-            name=name,
-            email=email,
-            phone=phone,
-            country_interest=country_interest,
-            course_interest=course_interest,
-            ielts_score=ielts_score,
-            budget=budget,
-            intake=intake,
-            qualification=qualification,
-            backlogs=backlogs
-        )
+        fields, user_summary = parsed
+
+        if _wants_defer(request):
+            return _defer_chat(request, fields, user_summary)
 
-        score = lead.lead_score
-        recommended_country = lead.recommended_country
-        lead_quality = lead.lead_quality
+        # Create the lead, or update the one this submission duplicates
+        # (score auto calculated)
+        lead, _ = dedup.save_chat_lead(fields, user_summary)
 
         # ===============================
         # OPENAI CALL
         # ===============================
 
         try:
-            client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional Study Abroad Assistant. Use only provided data. Do not assume extra details. Format response clearly."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""
-AI PROFILE ANALYSIS:
-Score: {score}
-Recommended Country: {recommended_country}
-Lead Category: {lead_quality}
-
-USER_SUMMARY:
-{user_summary}
-"""
-                    }
-                ],
-                temperature=0.3,
-            )
-
-            ai_text = completion.choices[0].message.content
-
+            ai_text = ai_cache.complete_for_lead(lead, user_summary)
         except Exception as e:
-            print("OpenAI Error:", e)
-            ai_text = f"""
-📋 Student Profile Summary
-
-Name: {name}
-IELTS: {ielts_score}
-Budget: {budget} Lakhs
-
-🤖 AI Profile Analysis
-• Eligibility Score: {score}%
-• Recommended Country: {recommended_country}
-• Lead Category: {lead_quality}
-
-📌 Next Step:
-Our counsellor will contact you shortly.
-"""
-
-        return Response({
-            "success": True,
-            "ai_reply": ai_text,
-            "score": score,
-            "recommended_country": recommended_country,
-            "lead_quality": lead_quality
-        })
+            logger.warning("OpenAI error, sending fallback reply: %s", e, extra={"lead_id": lead.id})
+            ai_text = _fallback_reply(lead)
+
+        return Response(_chat_payload(lead, ai_text))
 
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("ai_chat failed")
         return Response({"error": str(e)})
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def ai_chat_result(request, key):
+    job = get_object_or_404(AIJob.objects.select_related("lead"), key=key)
+
+    payload = {
+        "lead_id": job.lead_id,
+        "status": job.status,
+        "attempts": job.attempts,
+    }
+    if job.status in ("done", "failed"):
+        payload.update(_chat_payload(job.lead, job.result))
+
+    return Response(payload)
+
+
+@login_required
+def ai_cache_stats(request):
+    """Hit/miss counters for the AI reply cache in this worker process."""
+    payload = ai_cache.stats.as_dict()
+    payload["backend"] = settings.AI_REPLY_CACHE["BACKEND"]
+    return JsonResponse(payload)
+
+
+# =====================================
+# AI CHAT API (ASYNC, SERVED VIA ASGI)
+# =====================================
+
+async def _acreate_chat_lead(request):
+    """
+    Shared front half of the async chat views. Returns (lead, user_summary),
+    or a JsonResponse describing why the submission was rejected.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    parsed = _parse_chat_data(data)
+
+    if parsed is None:
+        return JsonResponse(
+            {"error": "Missing required fields."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    fields, user_summary = parsed
+
+    try:
+        lead, _ = await sync_to_async(dedup.save_chat_lead)(fields, user_summary)
+    except Exception as e:
+        logger.exception("Creating chat lead failed")
+        return JsonResponse({"error": str(e)})
+
+    return lead, user_summary
+
+
+@csrf_exempt
+async def ai_chat_async(request):
+    """
+    Same contract as ``ai_chat`` but never ties up a worker while the model
+    is generating. Completions go through the shared bounded pool in
+    ``leads.llm``; when the pool is saturated or the call times out the
+    templated reply is returned instead.
+    """
+    created = await _acreate_chat_lead(request)
+    if isinstance(created, JsonResponse):
+        return created
+    lead, user_summary = created
+
+    try:
+        ai_text = await ai_cache.acomplete_for_lead(lead, user_summary)
+    except Exception as e:
+        logger.warning("OpenAI error, sending fallback reply: %s", e, extra={"lead_id": lead.id})
+        ai_text = _fallback_reply(lead)
+
+    return JsonResponse(_chat_payload(lead, ai_text))
+
+
+# =====================================
+# AI CHAT API (SERVER-SENT EVENTS)
+# =====================================
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@csrf_exempt
+async def ai_chat_stream(request):
+    """
+    Streams the reply as server-sent events. The ``meta`` event carries the
+    score, recommended country and quality computed by ``Lead.save()``, so
+    it goes out as soon as the lead is written; ``token`` events follow as
+    the model produces text, then a final ``done``.
+
+    Tokens only reach the browser incrementally when served through ASGI;
+    under WSGI Django has to buffer an async stream before sending it.
+    """
+    created = await _acreate_chat_lead(request)
+    if isinstance(created, JsonResponse):
+        return created
+    lead, user_summary = created
+
+    async def stream_events():
+        meta = _chat_payload(lead, None)
+        meta.pop("ai_reply")
+        meta["lead_id"] = lead.id
+        yield _sse("meta", meta)
+
+        sent = False
+        try:
+            async for text in ai_cache.astream_for_lead(lead, user_summary):
+                sent = True
+                yield _sse("token", {"text": text})
+        except Exception as e:
+            logger.warning("OpenAI stream error: %s", e, extra={"lead_id": lead.id, "sent": sent})
+            if not sent:
+                yield _sse("token", {"text": _fallback_reply(lead)})
+
+        yield _sse("done", {})
+
+    response = StreamingHttpResponse(stream_events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# =====================================
+# METRICS
+# =====================================
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for this process's counters."""
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = request.headers.get("Authorization") == f"Bearer {token}"
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
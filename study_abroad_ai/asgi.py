@@ -3,6 +3,11 @@ ASGI config for study_abroad_ai project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI worker so ``ai_chat/async/`` can wait on the model
+without holding a process:
+
+    gunicorn study_abroad_ai.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_settings, replica_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "leads.middleware.MetricsMiddleware",
+    "leads.routing.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,12 +87,40 @@ WSGI_APPLICATION = "study_abroad_ai.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# DATABASE_URL selects PostgreSQL (or another SQLite file); pooling and
+# SQLite pragmas are described in study_abroad_ai/database.py.
 DATABASES = {
+    "default": database_settings(BASE_DIR),
+}
+
+# ===== CACHE SETTINGS =====
+
+# Local memory by default. Several workers should share one cache (e.g.
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache) so
+# that a write in one invalidates the report fragments in all of them.
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
 }
+# Upper bound on how long a dashboard/analytics fragment is reused.
+REPORT_FRAGMENT_TTL = int(os.environ.get("REPORT_FRAGMENT_TTL", "300"))
+
+# ===== REPLICA SETTINGS =====
+
+# With DATABASE_REPLICA_URL set, GET requests to REPLICA_VIEWS read leads
+# from this alias; see leads/routing.py.
+REPLICA_DATABASE = "replica"
+_replica = replica_settings(BASE_DIR)
+if _replica:
+    DATABASES[REPLICA_DATABASE] = _replica
+DATABASE_ROUTERS = ["leads.routing.ReplicaRouter"]
+REPLICA_VIEWS = set(filter(None, os.environ.get(
+    "REPLICA_VIEWS", "dashboard,analytics,analytics_api,conversion_api,lead_list,lead_list_api,export_csv"
+).split(",")))
+# After a write, that browser reads from the primary for this long.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "15"))
 
 
 # Password validation
@@ -127,9 +160,146 @@ USE_TZ = True
 STATIC_URL = "static/"
 # ===== TWILIO SETTINGS =====
 
+TWILIO_SID = os.environ.get("TWILIO_SID", "")
+TWILIO_TOKEN = os.environ.get("TWILIO_TOKEN", "")
+TWILIO_WHATSAPP_FROM = os.environ.get("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+# Point at a local stub for tests and load tests.
+TWILIO_API_BASE = os.environ.get("TWILIO_API_BASE", "https://api.twilio.com")
+COUNSELLOR_WHATSAPP = os.environ.get("COUNSELLOR_WHATSAPP", "whatsapp:+917605021990")
+
+# Queue a WhatsApp message when a hot lead comes in; see leads/notify.py.
+WHATSAPP_NOTIFICATIONS = os.environ.get("WHATSAPP_NOTIFICATIONS", "1" if TWILIO_SID else "0") == "1"
+NOTIFY_RATE = float(os.environ.get("NOTIFY_RATE", "10"))  # messages per second per worker
+NOTIFY_BURST = int(os.environ.get("NOTIFY_BURST", "10"))
+NOTIFY_TIMEOUT = float(os.environ.get("NOTIFY_TIMEOUT", "10"))
+NOTIFY_MAX_ATTEMPTS = int(os.environ.get("NOTIFY_MAX_ATTEMPTS", "5"))
+NOTIFY_BACKOFF = float(os.environ.get("NOTIFY_BACKOFF", "5"))  # seconds, doubled per retry
+NOTIFY_LEASE = int(os.environ.get("NOTIFY_LEASE", "120"))
+NOTIFY_DIGEST_WINDOW = float(os.environ.get("NOTIFY_DIGEST_WINDOW", "0"))  # seconds to hold for a digest
+NOTIFY_DIGEST_MAX = int(os.environ.get("NOTIFY_DIGEST_MAX", "10"))
+
+
+# ===== OPENAI / LLM SETTINGS =====
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+# Leave unset for api.openai.com; point at a local stub for load tests.
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+
+# Bounds for the shared async pool used by ai_chat_async.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "64"))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "20"))
+
+# Keep-alive pool of the shared clients; HTTP/2 needs the optional h2 package.
+LLM_HTTP2 = os.environ.get("LLM_HTTP2", "1") == "1"
+LLM_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "60"))  # seconds
+# Build the LLM client when the app loads instead of on the first chat
+# (gunicorn.conf.py does it per worker); _CONNECT also opens a connection.
+LLM_WARM_UP = os.environ.get("LLM_WARM_UP", "0") == "1"
+LLM_WARM_UP_CONNECT = os.environ.get("LLM_WARM_UP_CONNECT", "0") == "1"
+
+# Cache for AI profile analyses, see leads/ai_cache.py for the backends.
+AI_REPLY_CACHE = {
+    "BACKEND": os.environ.get("AI_REPLY_CACHE_BACKEND", "leads.ai_cache.LocMemBackend"),
+    "TTL": int(os.environ.get("AI_REPLY_CACHE_TTL", str(24 * 60 * 60))),
+    "MAX_ENTRIES": int(os.environ.get("AI_REPLY_CACHE_MAX_ENTRIES", "5000")),
+}
+
+# Deferred chat analyses processed by `manage.py run_ai_worker`.
+AI_JOB_MAX_ATTEMPTS = int(os.environ.get("AI_JOB_MAX_ATTEMPTS", "5"))
+AI_JOB_BACKOFF = float(os.environ.get("AI_JOB_BACKOFF", "2"))  # seconds, doubled per retry
+AI_JOB_LEASE = int(os.environ.get("AI_JOB_LEASE", "300"))  # reclaim jobs stuck this long
+
+
+# ===== IMPORT / EXPORT SETTINGS =====
+
+# Rows fetched and written per chunk by the streaming lead exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
+
+# Valid rows written per transaction by the bulk lead import.
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
+
+# ===== SCORING SETTINGS =====
+
+# How long a process trusts its cached copy of the active ScoringRuleSet.
+SCORING_RULES_TTL = float(os.environ.get("SCORING_RULES_TTL", "60"))
+# Rows per UPDATE when `manage.py rescore_leads` applies a new rule version.
+RESCORE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "20000"))
+
+
+# ===== ASSIGNMENT SETTINGS =====
 
+# Give each new lead to the least loaded matching counsellor; see leads/assignment.py.
+AUTO_ASSIGN_LEADS = os.environ.get("AUTO_ASSIGN_LEADS", "1") == "1"
+# How long a process trusts its in-memory counsellor load index.
+ASSIGN_INDEX_TTL = float(os.environ.get("ASSIGN_INDEX_TTL", "30"))
 
 
+# ===== DEDUP SETTINGS =====
+
+# "off" always creates a lead per chat submission; fold duplicates in later
+# with manage.py dedup_leads. "merge": a submission whose email or phone
+# matches an existing lead updates that lead's profile fields (never its
+# name, email or phone) instead.
+DEDUP_CHAT_MODE = os.environ.get("DEDUP_CHAT_MODE", "off")
+# Also match similar names created close together; see leads/dedup.py.
+DEDUP_FUZZY_NAMES = os.environ.get("DEDUP_FUZZY_NAMES", "0") == "1"
+DEDUP_NAME_SIMILARITY = float(os.environ.get("DEDUP_NAME_SIMILARITY", "0.85"))
+DEDUP_FUZZY_WINDOW_HOURS = float(os.environ.get("DEDUP_FUZZY_WINDOW_HOURS", "24"))
+
+
+# ===== LEAD EVENT SETTINGS =====
+
+# Status/assignment history; `manage.py archive_lead_events` moves months
+# older than LEAD_EVENT_KEEP_MONTHS from the table into gzip segments here.
+LEAD_EVENT_ARCHIVE_DIR = os.environ.get("LEAD_EVENT_ARCHIVE_DIR", str(BASE_DIR / "archive" / "lead_events"))
+LEAD_EVENT_KEEP_MONTHS = int(os.environ.get("LEAD_EVENT_KEEP_MONTHS", "6"))
+
+
+# ===== ARCHIVE SETTINGS =====
+
+# `manage.py archive_leads` moves lost, and unconverted cold, leads older
+# than this out of the Lead table; see leads/archive.py.
+LEAD_ARCHIVE_AFTER_DAYS = int(os.environ.get("LEAD_ARCHIVE_AFTER_DAYS", "365"))
+# Leads per archive transaction, and the pause (seconds) between them.
+LEAD_ARCHIVE_BATCH_SIZE = int(os.environ.get("LEAD_ARCHIVE_BATCH_SIZE", "500"))
+LEAD_ARCHIVE_PAUSE = float(os.environ.get("LEAD_ARCHIVE_PAUSE", "0.05"))
+
+
+# ===== METRICS / LOGGING SETTINGS =====
+
+# Bearer token for /metrics; when unset only staff users can read it.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+# Requests at least this slow are sampled onto the leads.slow logger with their queries.
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "1.0"))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+SLOW_REQUEST_MAX_QUERIES = int(os.environ.get("SLOW_REQUEST_MAX_QUERIES", "100"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "leads.logs.JsonFormatter"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "json"},
+    },
+    "loggers": {
+        "leads": {
+            "handlers": ["console"],
+            "level": os.environ.get("LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        # One JSON line per request costs ~2% of a fast request, so it is
+        # opt-in (REQUEST_LOG_LEVEL=INFO); slow requests are always logged.
+        "leads.requests": {
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "WARNING"),
+        },
+    },
+}
 
 
 # ===== REST FRAMEWORK SETTINGS =====
@@ -140,7 +310,6 @@ REST_FRAMEWORK = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-import os
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 CSRF_TRUSTED_ORIGINS = [